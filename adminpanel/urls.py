@@ -20,6 +20,16 @@ urlpatterns = [
     path('convenios/nuevo/', views.convenios_nuevo, name='convenios_nuevo'),
     path('convenios/<int:id>/codigos/', views.convenio_codigos, name='convenio_codigos'),
     path('convenios/<int:id>/codigos/nuevo/', views.codigos_nuevo, name='codigos_nuevo'),
+    path('convenios/<int:id>/menu/', views.convenio_menu, name='convenio_menu'),
+    path('convenios/<int:id>/facturas/', views.convenio_facturas, name='convenio_facturas'),
+    path('facturas/<int:factura_id>/csv/', views.factura_csv, name='factura_csv'),
+
+    path('tareas/metricas/', views.tareas_metricas, name='tareas_metricas'),
+    path('limites/metricas/', views.limites_metricas, name='limites_metricas'),
+    path('metricas/ventas/', views.ventas_serie, name='ventas_serie'),
+
+    path('despacho/', views.despacho, name='despacho'),
+    path('despacho/rutas/<int:ruta_id>/completar/', views.ruta_completar, name='ruta_completar'),
 
 
 ]
@@ -1,13 +1,27 @@
-from datetime import timedelta
+import csv
+from contextlib import nullcontext
+from datetime import date, timedelta
 
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db.models import Sum, F
-from django.db.models.functions import TruncDate
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
-from core.models import EmpresaConvenio, CodigoConvenio
+from core.facturacion import filas_detalle, filas_empleados
+from core.forms import MenuSemanaForm
+from core.menus import guardar_menu_empresa, leer_semana, publicar
+from core.models import EmpresaConvenio, CodigoConvenio, FacturaConvenio, MenuEmpresa, Plato
 
-from core.models import Pedido, Proveedor
+from core.models import Pedido, Proveedor, Ruta, TiemposProveedor
+from core.tareas import metricas as metricas_tareas
+from core.limites import metricas as metricas_limites
+from core.despacho import completar_ruta, despachar
+from core.eventos import CARRITO, cambiar_estado, registrar
+from core.replicas import leyendo_replica, primaria, usar_replica
+from core.ventas import GRANULARIDADES, serie_ventas
+from core.resumen import obtener_resumen
 
 
 # 🔐 Solo superusuarios pueden ver el panel
@@ -19,127 +33,30 @@ def admin_required(view_func):
 @admin_required
 def dashboard(request):
     # -----------------------------
-    # 1) MÉTRICAS BÁSICAS PEDIDOS
+    # 1) TARJETAS DE RESUMEN Y TOP PLATOS
     # -----------------------------
-    total_pedidos = Pedido.objects.count()
-
-    pedidos_pendientes = Pedido.objects.filter(estado='pendiente').count()
-    pedidos_preparando = Pedido.objects.filter(estado='preparando').count()
-    pedidos_entregados = Pedido.objects.filter(estado='entregado').count()
-
-    # -----------------------------
-    # 2) PROVEEDORES / CLIENTES
-    # -----------------------------
-    total_proveedores = Proveedor.objects.count()
-    proveedores_aprobados = Proveedor.objects.filter(aprobado=True).count()
-    proveedores_pendientes = Proveedor.objects.filter(aprobado=False).count()
-
-    total_clientes = Pedido.objects.values('cliente').distinct().count()
-
-    # -----------------------------
-    # 3) INGRESOS (solo pedidos confirmados)
-    # -----------------------------
-    hoy = timezone.localdate()
-    inicio_mes = hoy.replace(day=1)
-
-    pedidos_confirmados = Pedido.objects.filter(confirmado=True)
-
-    total_ingresos = pedidos_confirmados.aggregate(
-        total=Sum(F('plato__precio') * F('cantidad'))
-    )['total'] or 0
-
-    ingresos_hoy = pedidos_confirmados.filter(
-        fecha_pedido__date=hoy
-    ).aggregate(
-        total=Sum(F('plato__precio') * F('cantidad'))
-    )['total'] or 0
-
-    ingresos_mes = pedidos_confirmados.filter(
-        fecha_pedido__date__gte=inicio_mes
-    ).aggregate(
-        total=Sum(F('plato__precio') * F('cantidad'))
-    )['total'] or 0
+    # Pedidos, proveedores, clientes e ingresos salen de un resumen en caché
+    # que se recalcula en segundo plano cuando está atrasado
+    resumen = obtener_resumen()
 
     # -----------------------------
-    # 4) VENTAS ÚLTIMOS 7 DÍAS (gráfico)
-    # -----------------------------
-    # 4) VENTAS ÚLTIMOS 7 DÍAS (gráfico)
-    hoy = timezone.localdate()
-    hace_7_dias = hoy - timedelta(days=6)
-
-    # Crear rango fijo de 7 días
-    dias_dict = {
-        (hace_7_dias + timedelta(days=i)): 0
-        for i in range(7)
-    }
-
-    ventas = (
-        Pedido.objects.filter(confirmado=True)
-        .filter(fecha_pedido__date__gte=hace_7_dias)
-        .annotate(dia=TruncDate('fecha_pedido'))
-        .values('dia')
-        .annotate(total=Sum(F('plato__precio') * F('cantidad')))
-    )
-
-    # Llenar datos reales
-    for v in ventas:
-        dia = v['dia']
-        if dia in dias_dict:
-            dias_dict[dia] = float(v['total'])
-
-    # Preparar arrays para el gráfico
-    labels_dias = [d.strftime("%d/%m") for d in dias_dict.keys()]
-    data_dias = list(dias_dict.values())
-
-
-
-    # -----------------------------
-    # 5) TOP 5 PLATOS MÁS VENDIDOS
-    # -----------------------------
-    top_platos = (
-        pedidos_confirmados
-        .values('plato__nombre')
-        .annotate(total_cantidad=Sum('cantidad'))
-        .order_by('-total_cantidad')[:5]
-    )
-
-    # -----------------------------
-    # 6) ÚLTIMOS PEDIDOS
+    # 2) ÚLTIMOS PEDIDOS
     # -----------------------------
     ultimos_pedidos = (
         Pedido.objects
-        .select_related('plato', 'cliente', 'plato__proveedor')
+        .select_related('plato', 'cliente__user', 'plato__proveedor')
         .order_by('-fecha_pedido')[:5]
     )
 
     context = {
-        # tarjetas de resumen
-        'total_pedidos': total_pedidos,
-        'pedidos_pendientes': pedidos_pendientes,
-        'pedidos_preparando': pedidos_preparando,
-        'pedidos_entregados': pedidos_entregados,
-
-        'total_proveedores': total_proveedores,
-        'proveedores_aprobados': proveedores_aprobados,
-        'proveedores_pendientes': proveedores_pendientes,
-        'total_clientes': total_clientes,
-
-        'total_ingresos': float(total_ingresos),
-        'ingresos_hoy': float(ingresos_hoy),
-        'ingresos_mes': float(ingresos_mes),
-
-        # gráfico
-        'labels_dias': labels_dias,
-        'data_dias': data_dias,
-
-        # top platos y últimos pedidos
-        'top_platos': top_platos,
+        **resumen,
         'ultimos_pedidos': ultimos_pedidos,
     }
 
     return render(request, 'core/adminpanel/dashboard.html', context)
 
 
+@primaria
 @login_required
 @admin_required
 def aprobar_proveedor(request, proveedor_id):
@@ -149,6 +66,7 @@ def aprobar_proveedor(request, proveedor_id):
     return redirect('adminpanel:dashboard')
 
 
+@primaria
 @login_required
 @admin_required
 def rechazar_proveedor(request, proveedor_id):
@@ -325,47 +243,45 @@ def proveedor_detalle(request, proveedor_id):
         .order_by('-total_vendido')[:5]
     )
 
+    # Tiempos de cocina precalculados (comando calcular_tiempos)
+    tiempos = TiemposProveedor.objects.filter(proveedor=proveedor).first()
+    etapas = []
+    if tiempos:
+        for etapa, nombre in (('preparando', 'Hasta preparando'), ('listo', 'Hasta listo'), ('entregado', 'Hasta entregado')):
+            p50, p90 = getattr(tiempos, f'{etapa}_p50'), getattr(tiempos, f'{etapa}_p90')
+            etapas.append({
+                'nombre': nombre,
+                'p50': None if p50 is None else p50 / 60,
+                'p90': None if p90 is None else p90 / 60,
+            })
+
     return render(request, 'core/adminpanel/proveedor_detalle.html', {
         'proveedor': proveedor,
         'pedidos': pedidos,
         'total_ingresos': total_ingresos,
         'top_platos': top_platos,
+        'tiempos': tiempos,
+        'etapas': etapas,
     })
 
 
+@primaria
 @login_required
 def cambiar_estado_pedido(request, pedido_id, nuevo_estado):
-    pedido = get_object_or_404(Pedido, id=pedido_id)
+    pedido = get_object_or_404(Pedido.objects.select_related('plato'), id=pedido_id)
 
     # si pasa de pendiente → preparando, entonces se confirma
+    campos = {}
     if pedido.estado == "pendiente" and nuevo_estado == "preparando":
-        pedido.confirmado = True
+        campos['confirmado'] = True
+        if not pedido.confirmado:
+            # Confirmado directo desde el panel: sin evento de carrito no habría desde dónde medir
+            registrar([pedido], 'pendiente', CARRITO)
 
-    pedido.estado = nuevo_estado
-    pedido.save()
+    cambiar_estado(pedido, nuevo_estado, **campos)
 
     return redirect(request.META.get('HTTP_REFERER', 'adminpanel:pedidos_list'))
 
-@login_required
-def pedidos_proveedor_panel(request):
-    # Validar que el usuario sea proveedor
-    if not hasattr(request.user, "proveedor"):
-        return redirect("core:catalogo")
-
-    proveedor = request.user.proveedor
-
-    # Filtrar solo pedidos de sus platos
-    pedidos = Pedido.objects.filter(
-        plato__proveedor=proveedor
-    ).select_related("cliente", "plato").order_by("-fecha_pedido")
-
-    return render(request, "core/proveedor/pedidos_panel.html", {
-        "pedidos": pedidos,
-        "proveedor": proveedor
-    })
-
-
-
 @login_required
 @admin_required
 def convenios_list(request):
@@ -400,6 +316,86 @@ def convenio_codigos(request, id):
         'codigos': codigos
     })
 
+@login_required
+@admin_required
+def convenio_menu(request, id):
+    """Menú por defecto de la empresa para una semana: al guardarlo se publica a todos sus clientes."""
+    empresa = get_object_or_404(EmpresaConvenio, id=id)
+    semana = leer_semana(request.GET.get('semana'))
+    menu = MenuEmpresa.objects.filter(empresa=empresa, semana=semana).first()
+    items = {i.dia: i for i in menu.items.all()} if menu else {}
+
+    platos = Plato.objects.filter(proveedor__aprobado=True).select_related('proveedor').order_by('proveedor_id', 'nombre')
+    form = MenuSemanaForm(request.POST or None, platos=platos, items=items)
+
+    if request.method == 'POST' and form.is_valid():
+        menu = guardar_menu_empresa(empresa, semana, form.cambios())
+        publicados = publicar(menu)
+        messages.success(request, f"Menú publicado a {publicados} empleados.")
+        return redirect(f"{reverse('adminpanel:convenio_menu', args=[empresa.id])}?semana={semana.isoformat()}")
+
+    return render(request, 'core/adminpanel/convenio_menu.html', {
+        'empresa': empresa,
+        'menu': menu,
+        'form': form,
+        'semana': semana,
+        'semana_anterior': semana - timedelta(days=7),
+        'semana_siguiente': semana + timedelta(days=7),
+        'empleados': empresa.clientes.count(),
+    })
+
+
+@login_required
+@admin_required
+def convenio_facturas(request, id):
+    empresa = get_object_or_404(EmpresaConvenio, id=id)
+    return render(request, 'core/adminpanel/convenio_facturas.html', {
+        'empresa': empresa,
+        'facturas': empresa.facturas.order_by('-periodo'),
+    })
+
+
+class _Eco:
+    # csv.writer escribe aquí y cada fila vuelve como texto para el streaming
+    def write(self, valor):
+        return valor
+
+
+def _csv_en_streaming(filas, replica):
+    # El middleware reinicia el ruteo al retornar la vista, antes de que se
+    # consuman las filas: la decisión de leer en la réplica viaja con el generador
+    with usar_replica() if replica else nullcontext():
+        # BOM: Excel solo reconoce el CSV como UTF-8 (tildes, ñ) si empieza con él
+        yield '\ufeff'
+        escritor = csv.writer(_Eco())
+        for fila in filas:
+            yield escritor.writerow(fila)
+
+
+REPORTES_FACTURA = {
+    'detalle': filas_detalle,
+    'empleados': filas_empleados,
+}
+
+
+@login_required
+@admin_required
+def factura_csv(request, factura_id):
+    """Reporte de la factura (?tipo=detalle|empleados) en streaming: se genera por tandas mientras se descarga."""
+    factura = get_object_or_404(FacturaConvenio.objects.select_related('empresa'), id=factura_id)
+    tipo = request.GET.get('tipo', 'detalle')
+    if tipo not in REPORTES_FACTURA:
+        tipo = 'detalle'
+
+    respuesta = StreamingHttpResponse(
+        _csv_en_streaming(REPORTES_FACTURA[tipo](factura), leyendo_replica()),
+        content_type='text/csv; charset=utf-8',
+    )
+    nombre = f"factura-{factura.empresa_id}-{factura.periodo:%Y-%m}-{tipo}.csv"
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return respuesta
+
+
 @login_required
 @admin_required
 def codigos_nuevo(request, id):
@@ -417,3 +413,92 @@ def codigos_nuevo(request, id):
     return render(request, 'core/adminpanel/codigos_nuevo.html', {
         'empresa': empresa
     })
+
+
+@login_required
+@admin_required
+def tareas_metricas(request):
+    return JsonResponse(metricas_tareas())
+
+
+@login_required
+@admin_required
+def limites_metricas(request):
+    return JsonResponse(metricas_limites())
+
+
+# Rango máximo de la serie de ventas
+MAX_DIAS_SERIE = 5 * 366
+
+
+@login_required
+@admin_required
+def ventas_serie(request):
+    """
+    Serie de ventas para los gráficos: ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD
+    &granularidad=dia|semana|mes, y opcionalmente &proveedor=<id> o &empresa=<id>.
+    """
+    hoy = timezone.localdate()
+    try:
+        hasta = date.fromisoformat(request.GET['hasta']) if request.GET.get('hasta') else hoy
+        desde = date.fromisoformat(request.GET['desde']) if request.GET.get('desde') else hasta - timedelta(days=6)
+    except ValueError:
+        return JsonResponse({'error': 'Fechas inválidas (formato AAAA-MM-DD).'}, status=400)
+
+    if desde > hasta or (hasta - desde).days > MAX_DIAS_SERIE:
+        return JsonResponse({'error': 'Rango de fechas inválido.'}, status=400)
+
+    granularidad = request.GET.get('granularidad', 'dia')
+    if granularidad not in GRANULARIDADES:
+        return JsonResponse({'error': 'Granularidad inválida.'}, status=400)
+
+    filtros = {}
+    for campo in ('proveedor', 'empresa'):
+        valor = request.GET.get(campo)
+        if valor:
+            if not valor.isdigit():
+                return JsonResponse({'error': f'{campo.capitalize()} inválido.'}, status=400)
+            filtros[f'{campo}_id'] = int(valor)
+
+    return JsonResponse({
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'granularidad': granularidad,
+        'serie': serie_ventas(desde, hasta, granularidad, **filtros),
+    })
+
+
+@login_required
+@admin_required
+def despacho(request):
+    if request.method == 'POST':
+        resumen = despachar()
+        messages.success(
+            request,
+            f"Se crearon {resumen['rutas']} rutas con {resumen['asignados']} pedidos. "
+            f"{resumen['sin_asignar']} pedidos esperan repartidor."
+        )
+        return redirect('adminpanel:despacho')
+
+    rutas = (
+        Ruta.objects.filter(completada=False)
+        .select_related('repartidor', 'proveedor')
+        .prefetch_related('pedidos__cliente__user')
+        .order_by('creado_en')
+    )
+    pendientes = Pedido.objects.filter(estado='listo', ruta__isnull=True).count()
+
+    return render(request, 'core/adminpanel/despacho.html', {
+        'rutas': rutas,
+        'pendientes': pendientes,
+    })
+
+
+@login_required
+@admin_required
+def ruta_completar(request, ruta_id):
+    ruta = get_object_or_404(Ruta, id=ruta_id)
+    if request.method == 'POST':
+        completar_ruta(ruta)
+        messages.success(request, f"Ruta {ruta.id} completada.")
+    return redirect('adminpanel:despacho')
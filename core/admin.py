@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Proveedor, Plato, Pedido
+from .models import Proveedor, Plato, Pedido, Tarea, Repartidor, Ruta
 
 @admin.register(Proveedor)
 class ProveedorAdmin(admin.ModelAdmin):
@@ -14,3 +14,18 @@ class PlatoAdmin(admin.ModelAdmin):
 class PedidoAdmin(admin.ModelAdmin):
     list_display = ('id', 'cliente', 'plato', 'cantidad', 'estado', 'creado_en')
     list_filter = ('estado',)
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'funcion', 'estado', 'intentos', 'ejecutar_desde', 'actualizado_en')
+    list_filter = ('estado',)
+
+@admin.register(Repartidor)
+class RepartidorAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'telefono', 'disponible', 'capacidad')
+    list_filter = ('disponible',)
+
+@admin.register(Ruta)
+class RutaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'repartidor', 'proveedor', 'distancia_km', 'completada', 'creado_en')
+    list_filter = ('completada',)
@@ -0,0 +1,188 @@
+import base64
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from . import autocompletar
+from .models import Plato, Proveedor, VersionCatalogo
+from .ubicaciones import RADIO_KM, proveedores_cercanos
+
+
+# Límites de paginación de la API
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+
+# ---------------------------------------------------------
+# VERSIÓN DEL CATÁLOGO → ETAG / LAST-MODIFIED
+# ---------------------------------------------------------
+def _version(request):
+    # Se consulta una sola vez por request (la usan etag y last_modified)
+    if not hasattr(request, '_version_catalogo'):
+        request._version_catalogo = VersionCatalogo.actual()
+    return request._version_catalogo
+
+
+def _etag(request, *args, **kwargs):
+    # El ETag depende de la versión y de los parámetros (cursor, filtros)
+    version = _version(request)
+    consulta = hashlib.md5(request.get_full_path().encode()).hexdigest()[:12]
+    return f'{version.version}-{consulta}'
+
+
+def _last_modified(request, *args, **kwargs):
+    return _version(request).modificado_en
+
+
+# ---------------------------------------------------------
+# PAGINACIÓN POR CURSOR
+# ---------------------------------------------------------
+def _codificar_cursor(ultimo_id):
+    return base64.urlsafe_b64encode(str(ultimo_id).encode()).decode()
+
+
+def _decodificar_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+
+
+def _limite(request):
+    try:
+        limite = int(request.GET.get('limit', LIMITE_DEFECTO))
+    except ValueError:
+        limite = LIMITE_DEFECTO
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def _paginar(request, queryset):
+    """Aplica paginación keyset sobre `id` y devuelve (filas, siguiente_cursor)."""
+    cursor = request.GET.get('cursor')
+    if cursor:
+        ultimo_id = _decodificar_cursor(cursor)
+        if ultimo_id is None:
+            return None, None
+        queryset = queryset.filter(id__gt=ultimo_id)
+
+    limite = _limite(request)
+    filas = list(queryset.order_by('id')[:limite + 1])
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = _codificar_cursor(filas[-1]['id'])
+    return filas, siguiente
+
+
+def _url_media(request, ruta):
+    if not ruta:
+        return None
+    return request.build_absolute_uri(default_storage.url(ruta))
+
+
+def _respuesta(request, filas, siguiente):
+    if filas is None:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+    return JsonResponse({
+        'version': _version(request).version,
+        'results': filas,
+        'next': siguiente,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+# ---------------------------------------------------------
+# ENDPOINTS v1
+# ---------------------------------------------------------
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def proveedores_v1(request):
+    qs = Proveedor.objects.filter(aprobado=True).values('id', 'empresa', 'telefono', 'logo')
+    filas, siguiente = _paginar(request, qs)
+
+    for f in filas or []:
+        f['logo'] = _url_media(request, f['logo'])
+
+    return _respuesta(request, filas, siguiente)
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def proveedores_cercanos_v1(request):
+    try:
+        lat = float(request.GET['lat'])
+        lon = float(request.GET['lon'])
+        radio = min(float(request.GET.get('radio', RADIO_KM)), 50)
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Parámetros lat y lon requeridos.'}, status=400)
+
+    cercanos = proveedores_cercanos(lat, lon, radio, limite=_limite(request))
+    filas = [{
+        'id': p.id,
+        'empresa': p.empresa,
+        'telefono': p.telefono,
+        'logo': _url_media(request, p.logo.name),
+        'distancia_km': p.distancia_km,
+    } for p in cercanos]
+
+    return _respuesta(request, filas, None)
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def platos_v1(request):
+    qs = Plato.objects.filter(proveedor__aprobado=True).values(
+        'id', 'nombre', 'precio', 'proveedor_id', 'imagen'
+    )
+
+    proveedor = request.GET.get('proveedor')
+    if proveedor:
+        if not proveedor.isdigit():
+            return JsonResponse({'error': 'Proveedor inválido.'}, status=400)
+        qs = qs.filter(proveedor_id=proveedor)
+
+    filas, siguiente = _paginar(request, qs)
+
+    for f in filas or []:
+        f['precio'] = str(f['precio'])
+        f['imagen'] = _url_media(request, f['imagen'])
+
+    return _respuesta(request, filas, siguiente)
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def plato_detalle_v1(request, pk):
+    plato = (
+        Plato.objects.filter(pk=pk, proveedor__aprobado=True)
+        .values('id', 'nombre', 'descripcion', 'ingredientes', 'precio', 'proveedor_id', 'imagen')
+        .first()
+    )
+    if plato is None:
+        return JsonResponse({'error': 'Plato no encontrado.'}, status=404)
+
+    plato['precio'] = str(plato['precio'])
+    plato['imagen'] = _url_media(request, plato['imagen'])
+    plato['ingredientes'] = [i.strip() for i in plato['ingredientes'].split(',') if i.strip()]
+    return JsonResponse(plato, json_dumps_params={'ensure_ascii': False})
+
+
+@require_GET
+def autocompletar_v1(request):
+    """Sugerencias de platos, proveedores e ingredientes por prefijo (índice en memoria)."""
+    try:
+        limite = max(1, min(int(request.GET.get('limit', 8)), autocompletar.RESULTADOS_MAXIMOS))
+    except ValueError:
+        limite = 8
+
+    q = request.GET.get('q', '')[:100]
+    resultados = [
+        {'tipo': r['tipo'], 'id': r['id'], 'texto': r['texto'], 'url': autocompletar.url_item(r['tipo'], r['id'])}
+        for r in autocompletar.buscar(q, limite)
+    ]
+    respuesta = JsonResponse({'q': q, 'results': resultados}, json_dumps_params={'ensure_ascii': False})
+    respuesta['Cache-Control'] = 'public, max-age=30'
+    return respuesta
+
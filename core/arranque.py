@@ -0,0 +1,122 @@
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver, reverse
+
+
+logger = logging.getLogger(__name__)
+
+# Plantillas a compilar: las del proyecto (no las de django.contrib)
+EXTENSIONES_PLANTILLA = ('.html', '.txt')
+
+
+# ---------------------------------------------------------
+# PASOS DEL CALENTAMIENTO
+# ---------------------------------------------------------
+def precargar_urls():
+    """Importa los URLconf (y con ellos las vistas) y arma las tablas del resolver."""
+    resolver = get_resolver()
+    # El primer reverse importa los URLconf y llena el índice de nombres
+    reverse('core:catalogo')
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict
+    return len(resolver.reverse_dict)
+
+
+def _nombres_plantillas(motor):
+    base = Path(settings.BASE_DIR).resolve()
+    nombres = set()
+    for directorio in motor.template_dirs:
+        directorio = Path(directorio).resolve()
+        if not directorio.is_dir() or base not in directorio.parents:
+            continue
+        for archivo in directorio.rglob('*'):
+            if archivo.suffix in EXTENSIONES_PLANTILLA:
+                nombres.add(archivo.relative_to(directorio).as_posix())
+    return sorted(nombres)
+
+
+def compilar_plantillas():
+    """Compila cada plantilla del proyecto en el loader con caché de cada motor."""
+    compiladas = 0
+    for motor in engines.all():
+        for nombre in _nombres_plantillas(motor):
+            try:
+                motor.get_template(nombre)
+                compiladas += 1
+            except Exception:
+                logger.exception('No se pudo compilar la plantilla %s', nombre)
+    return compiladas
+
+
+def cebar_catalogo():
+    """Deja en caché las facetas del catálogo y construye el índice de autocompletado."""
+    from . import autocompletar
+    from .facetas import obtener_facetas
+
+    obtener_facetas()
+    autocompletar.construir()
+    return len(autocompletar.indice)
+
+
+def abrir_conexiones():
+    """Abre una conexión por alias (la primera consulta no paga el handshake)."""
+    for alias in connections:
+        connections[alias].ensure_connection()
+    return len(connections.all())
+
+
+PASOS = [
+    ('urls', precargar_urls),
+    ('plantillas', compilar_plantillas),
+    ('conexiones', abrir_conexiones),
+    ('catalogo', cebar_catalogo),
+]
+
+
+# ---------------------------------------------------------
+# CALENTAMIENTO
+# ---------------------------------------------------------
+def calentar(conexiones=True):
+    """
+    Prepara el worker antes de que llegue la primera solicitud. Retorna
+    {paso: segundos}; un paso que falla (p. ej. la base aún no responde) se
+    registra en el log y no impide que el worker arranque.
+
+    Se llama desde saboresgo/wsgi.py. Con gunicorn --preload ese módulo se
+    carga en el proceso maestro y los workers heredan lo que quede abierto:
+    con `conexiones=False` no se abren conexiones y las que usó el cebado del
+    catálogo se cierran al terminar; cada worker abre las suyas en post_fork.
+    """
+    tiempos = {}
+    for nombre, paso in PASOS:
+        if paso is abrir_conexiones and not conexiones:
+            continue
+        inicio = time.perf_counter()
+        try:
+            resultado = paso()
+        except Exception:
+            logger.exception('Calentamiento: falló el paso %s', nombre)
+            continue
+        tiempos[nombre] = time.perf_counter() - inicio
+        logger.info('Calentamiento: %s (%s) en %.0f ms', nombre, resultado, tiempos[nombre] * 1000)
+
+    if not conexiones:
+        connections.close_all()
+    return tiempos
+
+
+def post_fork(server, worker):
+    """
+    Hook de gunicorn para --preload (en gunicorn.conf.py:
+    `from core.arranque import post_fork`): el worker recién creado abre sus
+    propias conexiones; URLs, plantillas y catálogo ya vienen del maestro.
+    """
+    try:
+        abrir_conexiones()
+    except Exception:
+        logger.exception('Calentamiento: no se pudieron abrir las conexiones del worker')
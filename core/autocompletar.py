@@ -0,0 +1,285 @@
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import Count, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from .facetas import separar_ingredientes
+from .models import Ingrediente, Pedido, Plato, Proveedor, VersionCatalogo
+
+
+logger = logging.getLogger(__name__)
+
+# Popularidad: unidades confirmadas en esta ventana
+DIAS_POPULARIDAD = 90
+
+# Prefijos de hasta este largo tienen su top calculado al construir el índice
+# (son los que abarcan más claves: recorrerlas en cada tecla no sería sub-milisegundo)
+LARGO_PRECALCULADO = 3
+
+# Un prefijo más largo cuyo rango supera esta cantidad de claves guarda su top la primera vez
+UMBRAL_MEMO = 300
+
+# Cada cuánto un worker revisa si otro proceso cambió el catálogo
+SEGUNDOS_REVISION = 5
+
+RESULTADOS_MAXIMOS = 20
+
+
+def normalizar(texto):
+    """'  Ñoquis  al Pésto' -> 'noquis al pesto' (minúsculas, sin tildes, espacios simples)."""
+    sin_tildes = unicodedata.normalize('NFKD', texto or '')
+    sin_tildes = ''.join(c for c in sin_tildes if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.lower().split())
+
+
+def claves_de(texto):
+    """Cada sufijo que empieza en una palabra: 'arroz con pollo' también se encuentra por 'pollo'."""
+    palabras = normalizar(texto).split()
+    return [' '.join(palabras[i:]) for i in range(len(palabras))]
+
+
+# ---------------------------------------------------------
+# ÍNDICE (arreglo ordenado + top de prefijos frecuentes)
+# ---------------------------------------------------------
+def _orden(item):
+    # Más popular primero; a igual popularidad, el texto más corto
+    return (-item['peso'], len(item['texto']), item['texto'])
+
+
+class IndicePrefijos:
+    """
+    Índice de prefijos en memoria: una lista ordenada de (clave, tipo, id) en
+    la que un prefijo es un rango contiguo que se ubica con bisect. Los
+    prefijos cortos (y los largos muy frecuentes) guardan su top ya ordenado
+    por popularidad, así ninguna búsqueda recorre miles de claves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._claves = []
+        self._items = {}
+        self._top = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def cargar(self, items):
+        """Reemplaza el contenido completo. `items`: [(tipo, id, texto, peso)]."""
+        datos = {
+            (tipo, pk): {'tipo': tipo, 'id': pk, 'texto': texto, 'peso': peso}
+            for tipo, pk, texto, peso in items
+        }
+        claves = [(clave, ref[0], ref[1]) for ref, d in datos.items() for clave in claves_de(d['texto'])]
+        claves.sort()
+
+        # Recorriendo los ítems de más a menos popular, los primeros que
+        # llegan a cada prefijo corto son su top: no hace falta ordenar por prefijo
+        top = {}
+        for ref, item in sorted(datos.items(), key=lambda par: _orden(par[1])):
+            for clave in claves_de(item['texto']):
+                for largo in range(1, min(LARGO_PRECALCULADO, len(clave)) + 1):
+                    lista = top.setdefault(clave[:largo], [])
+                    if len(lista) < RESULTADOS_MAXIMOS and ref not in lista:
+                        lista.append(ref)
+
+        with self._lock:
+            self._claves, self._items, self._top = claves, datos, top
+
+    def agregar(self, tipo, pk, texto, peso=None):
+        """Inserta o actualiza un ítem (conserva su peso si no se entrega uno)."""
+        with self._lock:
+            anterior = self._quitar(tipo, pk)
+            if peso is None:
+                peso = anterior['peso'] if anterior else 0
+            self._items[(tipo, pk)] = {'tipo': tipo, 'id': pk, 'texto': texto, 'peso': peso}
+            for clave in claves_de(texto):
+                insort(self._claves, (clave, tipo, pk))
+            self._invalidar(texto)
+
+    def quitar(self, tipo, pk):
+        with self._lock:
+            self._quitar(tipo, pk)
+
+    def _quitar(self, tipo, pk):
+        item = self._items.pop((tipo, pk), None)
+        if item:
+            for clave in claves_de(item['texto']):
+                i = bisect_left(self._claves, (clave, tipo, pk))
+                if i < len(self._claves) and self._claves[i] == (clave, tipo, pk):
+                    del self._claves[i]
+            self._invalidar(item['texto'])
+        return item
+
+    def _invalidar(self, texto):
+        # Se recalculan en la próxima búsqueda que los pida
+        for clave in claves_de(texto):
+            for largo in range(1, len(clave) + 1):
+                self._top.pop(clave[:largo], None)
+
+    def _buscar_rango(self, prefijo):
+        inicio = bisect_left(self._claves, (prefijo,))
+        fin = bisect_left(self._claves, (prefijo + '\uffff',), inicio)
+        refs = {(tipo, pk) for _, tipo, pk in self._claves[inicio:fin]}
+        items = sorted((self._items[r] for r in refs), key=_orden)[:RESULTADOS_MAXIMOS]
+        top = [(i['tipo'], i['id']) for i in items]
+        if len(prefijo) <= LARGO_PRECALCULADO or fin - inicio > UMBRAL_MEMO:
+            self._top[prefijo] = top
+        return top
+
+    def buscar(self, texto, limite=8):
+        """Los `limite` ítems más populares con alguna palabra que empieza por `texto`."""
+        prefijo = normalizar(texto)
+        if not prefijo:
+            return []
+
+        with self._lock:
+            top = self._top.get(prefijo)
+            if top is None:
+                top = self._buscar_rango(prefijo)
+            return [self._items[r] for r in top[:limite]]
+
+
+# ---------------------------------------------------------
+# CONSTRUCCIÓN DESDE LA BASE DE DATOS
+# ---------------------------------------------------------
+def url_item(tipo, pk):
+    if tipo == 'plato':
+        return reverse('core:plato_detalle', args=[pk])
+    return f"{reverse('core:catalogo')}?{tipo}={pk}"
+
+
+def items_catalogo():
+    """(tipo, id, texto, peso) de platos y proveedores aprobados e ingredientes en uso."""
+    desde = timezone.now() - timedelta(days=DIAS_POPULARIDAD)
+    vendidos = dict(
+        Pedido.objects.filter(confirmado=True, fecha_pedido__gte=desde)
+        .values_list('plato_id')
+        .annotate(total=Sum('cantidad'))
+        .order_by()
+    )
+
+    items = []
+    por_proveedor = {}
+    for pk, nombre, proveedor_id in Plato.objects.filter(proveedor__aprobado=True).values_list(
+        'id', 'nombre', 'proveedor_id'
+    ):
+        peso = vendidos.get(pk, 0)
+        por_proveedor[proveedor_id] = por_proveedor.get(proveedor_id, 0) + peso
+        items.append(('plato', pk, nombre, peso))
+
+    for pk, empresa in Proveedor.objects.filter(aprobado=True).exclude(empresa=None).values_list('id', 'empresa'):
+        items.append(('proveedor', pk, empresa, por_proveedor.get(pk, 0)))
+
+    for pk, nombre, total in (
+        Ingrediente.objects.annotate(total=Count('platos')).filter(total__gt=0).values_list('id', 'nombre', 'total')
+    ):
+        items.append(('ingrediente', pk, nombre, total))
+
+    return items
+
+
+# ---------------------------------------------------------
+# ÍNDICE DEL PROCESO
+# ---------------------------------------------------------
+indice = IndicePrefijos()
+
+_estado = {'version': None, 'revisado': 0.0, 'construyendo': False}
+_lock_construccion = threading.Lock()
+
+
+def construir():
+    """Carga el índice completo desde la base de datos (al iniciar el worker o si cambió el catálogo)."""
+    version = VersionCatalogo.actual().version
+    indice.cargar(items_catalogo())
+    _estado['version'] = version
+    _estado['revisado'] = time.monotonic()
+
+
+def _construir_en_hilo():
+    close_old_connections()
+    try:
+        construir()
+    except Exception:
+        logger.exception('No se pudo construir el índice de autocompletado')
+    finally:
+        _estado['construyendo'] = False
+        close_old_connections()
+
+
+def construir_en_segundo_plano():
+    with _lock_construccion:
+        if _estado['construyendo']:
+            return
+        _estado['construyendo'] = True
+    threading.Thread(target=_construir_en_hilo, daemon=True).start()
+
+
+def buscar(texto, limite=8):
+    """
+    Sugerencias para `texto` desde el índice en memoria (sin consultas).
+
+    Si el índice aún no existe se construye aquí. Cada SEGUNDOS_REVISION se
+    compara la versión del catálogo: si otro worker la cambió (o hubo una
+    importación masiva, que no emite señales) se reconstruye en segundo plano
+    y mientras tanto se sigue respondiendo con el índice actual.
+    """
+    if _estado['version'] is None:
+        with _lock_construccion:
+            if _estado['version'] is None:
+                construir()
+    elif time.monotonic() - _estado['revisado'] > SEGUNDOS_REVISION:
+        _estado['revisado'] = time.monotonic()
+        if VersionCatalogo.actual().version != _estado['version']:
+            construir_en_segundo_plano()
+
+    return indice.buscar(texto, limite)
+
+
+# ---------------------------------------------------------
+# ACTUALIZACIÓN INCREMENTAL (desde las señales)
+# ---------------------------------------------------------
+# Cada cambio llega con la versión del catálogo que dejó su propio incremento.
+# Si es la siguiente a la del índice, el cambio queda aplicado y la revisión
+# de `buscar` no reconstruye; si hay un salto (otro worker o una importación
+# también cambió el catálogo) la versión no avanza y se reconstruye completo.
+def _aplicada(version):
+    if version == _estado['version'] + 1:
+        _estado['version'] = version
+
+
+def plato_guardado(plato, version):
+    if _estado['version'] is None:
+        return
+    if not plato.proveedor.aprobado:
+        indice.quitar('plato', plato.pk)
+    else:
+        indice.agregar('plato', plato.pk, plato.nombre)
+        for pk, nombre in Ingrediente.objects.filter(
+            nombre__in=separar_ingredientes(plato.ingredientes)
+        ).values_list('id', 'nombre'):
+            indice.agregar('ingrediente', pk, nombre)
+    _aplicada(version)
+
+
+def proveedor_guardado(proveedor, version):
+    if _estado['version'] is None:
+        return
+    if proveedor.aprobado and proveedor.empresa:
+        indice.agregar('proveedor', proveedor.pk, proveedor.empresa)
+    else:
+        indice.quitar('proveedor', proveedor.pk)
+    _aplicada(version)
+
+
+def eliminado(tipo, pk, version):
+    if _estado['version'] is None:
+        return
+    indice.quitar(tipo, pk)
+    _aplicada(version)
@@ -0,0 +1,272 @@
+import http.cookiejar
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .menus import menu_de, semana_actual
+from .models import Cliente, EmpresaConvenio, MenuSemanal, Plato, Proveedor
+
+
+PREFIJO_CLIENTE = 'carga_cliente_'
+PREFIJO_PROVEEDOR = 'carga_proveedor_'
+CLAVE = 'carga-1234'
+EMPRESA = 'Carga S.A.'
+
+DIAS = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes']
+
+# Siguiente estado que el proveedor aplica desde su panel
+RE_AVANZAR = re.compile(r'/proveedor/pedido/(\d+)/estado/(preparando|listo|entregado)/')
+
+
+def semana_carga():
+    """Los menús de carga son de la próxima semana: todos sus días se pueden elegir."""
+    return semana_actual() + timedelta(days=7)
+
+
+# ---------------------------------------------------------
+# DATOS DE PRUEBA
+# ---------------------------------------------------------
+def preparar_datos(clientes, proveedores, platos_por_proveedor=10):
+    """
+    Crea (si faltan) los usuarios, platos y menús que usan los escenarios.
+    La mitad de los clientes queda con convenio y saldo para pagar su menú.
+    """
+    clave = User(username='x')
+    clave.set_password(CLAVE)
+    hash_clave = clave.password
+
+    with transaction.atomic():
+        empresa, _ = EmpresaConvenio.objects.get_or_create(nombre=EMPRESA, defaults={'saldo_mensual': 10 ** 6})
+
+        for i in range(proveedores):
+            user, creado = User.objects.get_or_create(
+                username=f'{PREFIJO_PROVEEDOR}{i}', defaults={'password': hash_clave}
+            )
+            proveedor, _ = Proveedor.objects.get_or_create(
+                user=user, defaults={'empresa': f'Cocina de carga {i}', 'aprobado': True}
+            )
+            if creado:
+                Plato.objects.bulk_create([
+                    Plato(
+                        proveedor=proveedor,
+                        nombre=f'Plato {i}-{j}',
+                        ingredientes='arroz, pollo',
+                        precio=random.randint(30, 90) * 100,
+                    )
+                    for j in range(platos_por_proveedor)
+                ])
+
+        for i in range(clientes):
+            user, _ = User.objects.get_or_create(username=f'{PREFIJO_CLIENTE}{i}', defaults={'password': hash_clave})
+            cliente, _ = Cliente.objects.get_or_create(
+                user=user,
+                defaults={
+                    'direccion': f'Calle de carga {i}',
+                    'empresa': empresa if i % 2 else None,
+                    'saldo': 10 ** 6 if i % 2 else 0,
+                },
+            )
+            menu_de(cliente, semana_carga())
+
+
+def _ids_escenario():
+    """Ids que necesitan los usuarios virtuales (se leen una vez, antes de empezar)."""
+    return {
+        'platos': list(Plato.objects.filter(proveedor__user__username__startswith=PREFIJO_PROVEEDOR)
+                       .values_list('id', flat=True)),
+        # Solo los clientes con convenio pueden pagar su menú
+        'menus': dict(MenuSemanal.objects.filter(cliente__empresa__nombre=EMPRESA, semana=semana_carga())
+                      .values_list('cliente__user__username', 'id')),
+    }
+
+
+# ---------------------------------------------------------
+# ESTADÍSTICAS
+# ---------------------------------------------------------
+def percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not ordenados:
+        return 0
+    k = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[k]
+
+
+class Estadisticas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.errores = {}
+        self.inicio = time.monotonic()
+        self.fin = None
+
+    def registrar(self, paso, segundos, ok):
+        with self._lock:
+            self.latencias.setdefault(paso, []).append(segundos)
+            if not ok:
+                self.errores[paso] = self.errores.get(paso, 0) + 1
+
+    def terminar(self):
+        self.fin = time.monotonic()
+
+    def reporte(self):
+        """Filas por paso: solicitudes, errores, solicitudes/s y latencias en ms."""
+        duracion = (self.fin or time.monotonic()) - self.inicio
+        filas = []
+        for paso, latencias in sorted(self.latencias.items()):
+            ordenadas = sorted(latencias)
+            errores = self.errores.get(paso, 0)
+            filas.append({
+                'paso': paso,
+                'solicitudes': len(ordenadas),
+                'errores': errores,
+                'error_pct': round(100 * errores / len(ordenadas), 1),
+                'rps': round(len(ordenadas) / duracion, 1) if duracion else 0,
+                'p50': round(percentil(ordenadas, 50) * 1000, 1),
+                'p95': round(percentil(ordenadas, 95) * 1000, 1),
+                'p99': round(percentil(ordenadas, 99) * 1000, 1),
+            })
+        return filas, duracion
+
+
+# ---------------------------------------------------------
+# CLIENTE HTTP CON SESIÓN
+# ---------------------------------------------------------
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    # Cada paso mide una sola solicitud: el 302 de un POST cuenta como éxito
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Sesion:
+    """Navegador mínimo: cookies, token CSRF y registro de cada solicitud."""
+
+    def __init__(self, base, stats, timeout=30):
+        self.base = base.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones
+        )
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def pedir(self, paso, ruta, datos=None):
+        """Hace GET (o POST si hay `datos`) y retorna el cuerpo; None si falló."""
+        cabeceras = {'User-Agent': 'saboresgo-carga'}
+        cuerpo = None
+        if datos is not None:
+            datos = {**datos, 'csrfmiddlewaretoken': self._csrf()}
+            cuerpo = urllib.parse.urlencode(datos).encode()
+            cabeceras['X-CSRFToken'] = self._csrf()
+            cabeceras['Referer'] = self.base + ruta
+
+        solicitud = urllib.request.Request(self.base + ruta, data=cuerpo, headers=cabeceras)
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(solicitud, timeout=self.timeout) as respuesta:
+                contenido = respuesta.read().decode('utf-8', 'replace')
+                ok = True
+        except urllib.error.HTTPError as e:
+            # Los 3xx llegan como HTTPError al no seguir redirecciones
+            ok = 300 <= e.code < 400
+            contenido = '' if ok else None
+        except (urllib.error.URLError, OSError):
+            ok, contenido = False, None
+
+        self.stats.registrar(paso, time.perf_counter() - inicio, ok)
+        return contenido
+
+    def login(self, usuario):
+        self.pedir('login (GET)', '/login/')
+        self.pedir('login (POST)', '/login/', {'username': usuario, 'password': CLAVE})
+        return any(c.name == 'sessionid' for c in self.cookies)
+
+
+# ---------------------------------------------------------
+# ESCENARIOS
+# ---------------------------------------------------------
+def escenario_cliente(sesion, usuario, ids, rnd, seguir):
+    """Almuerzo de un cliente: mira el catálogo, agrega platos, confirma y a veces paga su menú."""
+    if not sesion.login(usuario):
+        return
+    menu_id = ids['menus'].get(usuario)
+
+    while seguir():
+        sesion.pedir('catalogo', '/')
+        plato = rnd.choice(ids['platos'])
+        sesion.pedir('plato_detalle', f'/plato/{plato}/')
+        sesion.pedir('pedido_rapido', f'/pedido/rapido/{plato}/', {'cantidad': rnd.randint(1, 3)})
+        sesion.pedir('pedido_list', '/cliente/pedidos/')
+        sesion.pedir('confirmar_carrito', '/cliente/pedidos/', {'confirmar_carrito': '1'})
+
+        if menu_id and rnd.random() < 0.2:
+            dia = rnd.choice(DIAS)
+            sesion.pedir(
+                'menu_semanal_select',
+                f'/menu-semanal/select/{dia}/?semana={semana_carga():%Y-%m-%d}',
+                {'plato_id': rnd.choice(ids['platos'])},
+            )
+            sesion.pedir('pagar_menu', f'/menu-semanal/pagar/{menu_id}/')
+
+        time.sleep(rnd.uniform(0, 0.2))
+
+
+def escenario_proveedor(sesion, usuario, ids, rnd, seguir):
+    """Un proveedor revisa su panel y avanza el estado de los pedidos que ve."""
+    if not sesion.login(usuario):
+        return
+
+    while seguir():
+        for estado in ('pendiente', 'preparando', 'listo'):
+            html = sesion.pedir('panel_proveedor', f'/proveedor/pedidos-panel/?estado={estado}')
+            for pedido_id, siguiente in RE_AVANZAR.findall(html or '')[:3]:
+                sesion.pedir('avanzar_estado', f'/proveedor/pedido/{pedido_id}/estado/{siguiente}/')
+        time.sleep(rnd.uniform(0.2, 0.5))
+
+
+def ejecutar_carga(base, clientes, proveedores, duracion, rampa=0, semilla=None):
+    """
+    Prueba de carga contra un servidor ya levantado en `base`: un hilo por
+    usuario virtual, cada uno con su propia sesión.
+
+    Lanza `clientes` + `proveedores` usuarios virtuales durante `duracion`
+    segundos (arrancando a lo largo de `rampa` segundos) y retorna las Estadisticas.
+    """
+    ids = _ids_escenario()
+    if not ids['platos']:
+        raise ValueError('No hay datos de carga: ejecuta primero con --preparar.')
+
+    stats = Estadisticas()
+    limite = time.monotonic() + duracion
+
+    def seguir():
+        return time.monotonic() < limite
+
+    usuarios = (
+        [(escenario_cliente, f'{PREFIJO_CLIENTE}{i}') for i in range(clientes)]
+        + [(escenario_proveedor, f'{PREFIJO_PROVEEDOR}{i}') for i in range(proveedores)]
+    )
+
+    def correr(n, escenario, usuario):
+        rnd = random.Random(f'{semilla}-{n}' if semilla is not None else None)
+        if rampa:
+            time.sleep(rampa * n / len(usuarios))
+        escenario(Sesion(base, stats), usuario, ids, rnd, seguir)
+
+    with ThreadPoolExecutor(max_workers=len(usuarios)) as pool:
+        for futuro in [pool.submit(correr, n, e, u) for n, (e, u) in enumerate(usuarios)]:
+            futuro.result()
+
+    stats.terminar()
+    return stats
@@ -0,0 +1,281 @@
+import time
+from collections import OrderedDict
+
+from django.db import transaction
+
+from .eventos import registrar
+from .geo import distancia_km, get_geocoder, normalizar_direccion
+from .models import Pedido, Repartidor, Ruta
+
+
+class Parada:
+    """Una dirección de entrega de un proveedor, con todos los pedidos que van ahí."""
+
+    def __init__(self, direccion, punto):
+        self.direccion = direccion
+        self.punto = punto
+        self.pedido_ids = []
+
+    def __len__(self):
+        return len(self.pedido_ids)
+
+
+class Lote:
+    """Pedidos de un proveedor asignados a un repartidor, en orden de visita."""
+
+    def __init__(self, proveedor_id, repartidor, origen, paradas):
+        self.proveedor_id = proveedor_id
+        self.repartidor = repartidor
+        self.origen = origen
+        self.paradas = paradas
+        self.distancia_km = longitud_ruta([origen] + [p.punto for p in paradas])
+
+    @property
+    def pedido_ids(self):
+        return [pid for parada in self.paradas for pid in parada.pedido_ids]
+
+
+# ---------------------------------------------------------
+# HEURÍSTICAS DE RUTA
+# ---------------------------------------------------------
+def longitud_ruta(puntos):
+    return sum(distancia_km(puntos[i], puntos[i + 1]) for i in range(len(puntos) - 1))
+
+
+def _matriz(puntos):
+    n = len(puntos)
+    m = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            m[i][j] = m[j][i] = distancia_km(puntos[i], puntos[j])
+    return m
+
+
+def vecino_mas_cercano(origen, paradas):
+    """Ordena las paradas partiendo desde `origen` y yendo siempre a la más cercana."""
+    pendientes = list(paradas)
+    actual = origen
+    orden = []
+    while pendientes:
+        siguiente = min(pendientes, key=lambda p: distancia_km(actual, p.punto))
+        pendientes.remove(siguiente)
+        orden.append(siguiente)
+        actual = siguiente.punto
+    return orden
+
+
+def dos_opt(origen, paradas):
+    """
+    Mejora una ruta abierta (origen fijo, sin volver) invirtiendo tramos
+    mientras alguna inversión la acorte.
+    """
+    if len(paradas) < 3:
+        return paradas
+
+    puntos = [origen] + [p.punto for p in paradas]
+    d = _matriz(puntos)
+    ruta = list(range(len(puntos)))
+    n = len(ruta)
+
+    mejorado = True
+    while mejorado:
+        mejorado = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                a, b = ruta[i - 1], ruta[i]
+                c = ruta[j]
+                e = ruta[j + 1] if j + 1 < n else None
+
+                antes = d[a][b] + (d[c][e] if e is not None else 0)
+                despues = d[a][c] + (d[b][e] if e is not None else 0)
+                if despues + 1e-9 < antes:
+                    ruta[i:j + 1] = reversed(ruta[i:j + 1])
+                    mejorado = True
+
+    return [paradas[k - 1] for k in ruta[1:]]
+
+
+def optimizar_ruta(origen, paradas):
+    return dos_opt(origen, vecino_mas_cercano(origen, paradas))
+
+
+# ---------------------------------------------------------
+# PLANIFICACIÓN (SIN BASE DE DATOS)
+# ---------------------------------------------------------
+def agrupar_paradas(pedidos, geocoder=None):
+    """
+    Agrupa filas de pedidos por proveedor y dirección normalizada.
+
+    Cada fila es un dict con `id`, `proveedor_id` y `direccion`.
+    Devuelve {proveedor_id: [Parada, ...]}.
+    """
+    geocoder = geocoder or get_geocoder()
+    por_proveedor = OrderedDict()
+
+    for fila in pedidos:
+        clave = normalizar_direccion(fila['direccion'])
+        paradas = por_proveedor.setdefault(fila['proveedor_id'], OrderedDict())
+        parada = paradas.get(clave)
+        if parada is None:
+            punto = geocoder.geocodificar(fila['direccion'])
+            if punto is None:
+                continue  # sin dirección no se puede despachar
+            parada = paradas[clave] = Parada(fila['direccion'], punto)
+        parada.pedido_ids.append(fila['id'])
+
+    return {pid: list(paradas.values()) for pid, paradas in por_proveedor.items() if paradas}
+
+
+def planificar(por_proveedor, origenes, repartidores):
+    """
+    Reparte las paradas entre los repartidores disponibles.
+
+    Por cada proveedor se recorren las paradas con vecino más cercano desde el
+    local y se cortan en lotes consecutivos según la capacidad del repartidor;
+    los proveedores se atienden por turnos para que uno grande no acapare a
+    todos los repartidores. Cada lote se afina con 2-opt.
+    """
+    colas = OrderedDict()
+    for proveedor_id, paradas in sorted(por_proveedor.items(), key=lambda kv: -sum(map(len, kv[1]))):
+        colas[proveedor_id] = vecino_mas_cercano(origenes[proveedor_id], paradas)
+
+    libres = list(repartidores)
+    lotes = []
+
+    while libres and colas:
+        for proveedor_id in list(colas):
+            if not libres:
+                break
+            repartidor = libres.pop(0)
+            cola = colas[proveedor_id]
+
+            tomadas, carga = [], 0
+            while cola and (not tomadas or carga + len(cola[0]) <= repartidor.capacidad):
+                parada = cola.pop(0)
+                tomadas.append(parada)
+                carga += len(parada)
+
+            origen = origenes[proveedor_id]
+            lotes.append(Lote(proveedor_id, repartidor, origen, optimizar_ruta(origen, tomadas)))
+
+            if not cola:
+                del colas[proveedor_id]
+
+    sin_asignar = [pid for cola in colas.values() for parada in cola for pid in parada.pedido_ids]
+    return lotes, sin_asignar
+
+
+def ubicacion_proveedor(proveedor_id, direccion, geocoder=None):
+    """Punto de retiro de un proveedor sin coordenadas guardadas."""
+    geocoder = geocoder or get_geocoder()
+    return geocoder.geocodificar(direccion or f'proveedor {proveedor_id}')
+
+
+# ---------------------------------------------------------
+# DESPACHO (CON BASE DE DATOS)
+# ---------------------------------------------------------
+def _vigentes(por_proveedor, ids):
+    """Quita de las paradas los pedidos que ya no están en `ids`; descarta las que quedan vacías."""
+    resultado = {}
+    for proveedor_id, paradas in por_proveedor.items():
+        for parada in paradas:
+            parada.pedido_ids = [pid for pid in parada.pedido_ids if pid in ids]
+        paradas = [parada for parada in paradas if parada.pedido_ids]
+        if paradas:
+            resultado[proveedor_id] = paradas
+    return resultado
+
+
+def despachar():
+    """
+    Asigna los pedidos listos sin ruta a los repartidores libres.
+
+    Las direcciones se geocodifican antes de abrir la transacción (es una
+    llamada externa); dentro solo se bloquean las filas de los pedidos y se
+    descartan los que otro proceso asignó o cambió mientras tanto.
+
+    Retorna un dict con las rutas creadas, los pedidos asignados, los que
+    quedaron esperando repartidor y el tiempo de planificación.
+    """
+    filas = list(
+        Pedido.objects.filter(estado='listo', ruta__isnull=True)
+        .values(
+            'id', 'direccion', 'cliente__direccion', 'plato__proveedor_id',
+            'plato__proveedor__empresa', 'plato__proveedor__direccion',
+            'plato__proveedor__latitud', 'plato__proveedor__longitud',
+        )
+    )
+
+    inicio = time.perf_counter()
+    geocoder = get_geocoder()
+
+    pedidos = [{
+        'id': f['id'],
+        'proveedor_id': f['plato__proveedor_id'],
+        # El pedido rápido no guarda dirección: se usa la del cliente
+        'direccion': f['direccion'] or f['cliente__direccion'],
+    } for f in filas]
+
+    origenes = {}
+    for f in filas:
+        pid = f['plato__proveedor_id']
+        if pid in origenes:
+            continue
+        if f['plato__proveedor__latitud'] is not None:
+            origenes[pid] = (f['plato__proveedor__latitud'], f['plato__proveedor__longitud'])
+        else:
+            origenes[pid] = ubicacion_proveedor(
+                pid, f['plato__proveedor__direccion'] or f['plato__proveedor__empresa'], geocoder
+            )
+
+    por_proveedor = agrupar_paradas(pedidos, geocoder)
+    segundos = time.perf_counter() - inicio
+
+    with transaction.atomic():
+        # Solo las filas de Pedido: no bloquea platos, clientes ni proveedores
+        ids = set(
+            Pedido.objects.select_for_update(of=('self',))
+            .filter(id__in=[f['id'] for f in filas], estado='listo', ruta__isnull=True)
+            .values_list('id', flat=True)
+        )
+
+        repartidores = list(
+            Repartidor.objects.filter(disponible=True)
+            .exclude(rutas__completada=False)
+            .order_by('-capacidad', 'id')
+        )
+
+        inicio = time.perf_counter()
+        lotes, sin_asignar = planificar(_vigentes(por_proveedor, ids), origenes, repartidores)
+        segundos += time.perf_counter() - inicio
+
+        cambios = []
+        for lote in lotes:
+            ruta = Ruta.objects.create(
+                repartidor=lote.repartidor,
+                proveedor_id=lote.proveedor_id,
+                distancia_km=round(lote.distancia_km, 2),
+            )
+            for orden, pedido_id in enumerate(lote.pedido_ids, start=1):
+                cambios.append(Pedido(id=pedido_id, ruta=ruta, orden_ruta=orden))
+
+        Pedido.objects.bulk_update(cambios, ['ruta', 'orden_ruta'], batch_size=500)
+
+    asignados = len(cambios)
+    return {
+        'rutas': len(lotes),
+        'asignados': asignados,
+        'sin_asignar': len(sin_asignar),
+        'sin_direccion': len(ids) - asignados - len(sin_asignar),
+        'segundos': round(segundos, 4),
+    }
+
+
+def completar_ruta(ruta):
+    """Marca la ruta como terminada y sus pedidos como entregados."""
+    with transaction.atomic():
+        pendientes = list(ruta.pedidos.exclude(estado='entregado').select_related('plato'))
+        registrar(pendientes, 'entregado')
+        Pedido.objects.filter(pk__in=[p.pk for p in pendientes]).update(estado='entregado')
+        ruta.completada = True
+        ruta.save(update_fields=['completada'])
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .metricas import PEDIDOS_CONFIRMADOS, contar
+from .models import EventoPedido, TiemposProveedor
+
+
+# Estado "anterior" del evento que marca la confirmación del carrito
+CARRITO = 'carrito'
+
+# Estados cuyo tiempo desde la confirmación se mide
+ETAPAS = ('preparando', 'listo', 'entregado')
+
+# Pedidos confirmados en esta ventana entran al cálculo de tiempos
+DIAS_VENTANA = 30
+
+
+# ---------------------------------------------------------
+# REGISTRO (un INSERT por cambio, sin importar cuántos pedidos)
+# ---------------------------------------------------------
+def registrar(pedidos, estado_nuevo, estado_anterior=None):
+    """
+    Agrega al historial el paso de `pedidos` a `estado_nuevo`.
+
+    `estado_anterior` por defecto es el estado de cada pedido antes del cambio
+    (llamar antes de asignar el nuevo). Los pedidos que ya estaban en
+    `estado_nuevo` se omiten. Necesita `plato` cargado para saber el proveedor.
+    """
+    ahora = timezone.now()
+    eventos = [
+        EventoPedido(
+            pedido_id=p.pk,
+            proveedor_id=p.plato.proveedor_id,
+            estado_anterior=estado_anterior or p.estado,
+            estado_nuevo=estado_nuevo,
+            ocurrido_en=ahora,
+        )
+        for p in pedidos
+        if (estado_anterior or p.estado) != estado_nuevo
+    ]
+    EventoPedido.objects.bulk_create(eventos, batch_size=1000)
+    if estado_anterior == CARRITO and eventos:
+        contar(PEDIDOS_CONFIRMADOS, len(eventos))
+    return len(eventos)
+
+
+def cambiar_estado(pedido, estado_nuevo, **campos):
+    """Cambia el estado de un pedido y registra el evento en la misma transacción."""
+    with transaction.atomic():
+        registrar([pedido], estado_nuevo)
+        pedido.estado = estado_nuevo
+        for campo, valor in campos.items():
+            setattr(pedido, campo, valor)
+        pedido.save()
+
+
+# ---------------------------------------------------------
+# TIEMPOS DE COCINA (p50 / p90 por proveedor)
+# ---------------------------------------------------------
+def _duraciones(desde):
+    """
+    {proveedor_id: {etapa: [segundos, ...]}} desde la confirmación de cada
+    pedido hasta la primera vez que llegó a cada etapa.
+    """
+    confirmados = {}
+    llegadas = {}
+    eventos = (
+        EventoPedido.objects.filter(ocurrido_en__gte=desde, pedido__isnull=False)
+        .values_list('pedido_id', 'proveedor_id', 'estado_anterior', 'estado_nuevo', 'ocurrido_en')
+        .order_by('ocurrido_en')
+    )
+    for pedido_id, proveedor_id, anterior, nuevo, momento in eventos.iterator(chunk_size=5000):
+        if anterior == CARRITO:
+            confirmados[pedido_id] = (proveedor_id, momento)
+        elif nuevo in ETAPAS:
+            llegadas.setdefault((pedido_id, nuevo), momento)
+
+    duraciones = {}
+    for (pedido_id, etapa), momento in llegadas.items():
+        if pedido_id not in confirmados:
+            continue
+        proveedor_id, inicio = confirmados[pedido_id]
+        segundos = (momento - inicio).total_seconds()
+        if segundos >= 0:
+            duraciones.setdefault(proveedor_id, {}).setdefault(etapa, []).append(segundos)
+    return duraciones, confirmados
+
+
+def calcular_tiempos(dias=DIAS_VENTANA):
+    """Recalcula TiemposProveedor con los pedidos confirmados en los últimos `dias`. Retorna los proveedores."""
+    # Import diferido: el módulo se carga con las vistas y numpy solo lo usa este cálculo
+    import numpy as np
+
+    duraciones, confirmados = _duraciones(timezone.now() - timedelta(days=dias))
+
+    por_proveedor = {}
+    for proveedor_id, _ in confirmados.values():
+        por_proveedor[proveedor_id] = por_proveedor.get(proveedor_id, 0) + 1
+
+    filas = []
+    for proveedor_id, total in por_proveedor.items():
+        fila = TiemposProveedor(proveedor_id=proveedor_id, pedidos=total, calculado_en=timezone.now())
+        for etapa in ETAPAS:
+            valores = duraciones.get(proveedor_id, {}).get(etapa)
+            if valores:
+                p50, p90 = np.percentile(valores, [50, 90])
+                setattr(fila, f'{etapa}_p50', round(float(p50), 1))
+                setattr(fila, f'{etapa}_p90', round(float(p90), 1))
+        filas.append(fila)
+
+    with transaction.atomic():
+        TiemposProveedor.objects.all().delete()
+        TiemposProveedor.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
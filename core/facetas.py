@@ -0,0 +1,188 @@
+import unicodedata
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .metricas import lectura_cache
+from .models import Ingrediente, Plato, Proveedor, VersionCatalogo
+
+
+# (clave, etiqueta, desde, hasta): rangos de precio del catálogo, hasta excluido
+RANGOS_PRECIO = [
+    ('economico', 'Hasta $3.000', None, 3000),
+    ('medio', '$3.000 – $5.000', 3000, 5000),
+    ('alto', '$5.000 – $8.000', 5000, 8000),
+    ('premium', 'Más de $8.000', 8000, None),
+]
+
+# Ingredientes que se muestran como faceta (los más frecuentes)
+MAX_INGREDIENTES = 30
+
+# Proveedores que se muestran como faceta (los de más platos); al resto se
+# llega con el buscador, así el catálogo no crece con el marketplace
+MAX_PROVEEDORES = 30
+
+# Las facetas se guardan por versión del catálogo: cualquier cambio en platos
+# o proveedores incrementa la versión y deja obsoleta la entrada anterior
+SEGUNDOS_CACHE = 24 * 60 * 60
+
+
+# ---------------------------------------------------------
+# INGREDIENTES NORMALIZADOS
+# ---------------------------------------------------------
+def normalizar_ingrediente(texto):
+    return ' '.join(texto.lower().split())
+
+
+def clave_ingrediente(nombre):
+    """
+    Cómo compara los nombres la base de datos: MySQL usa una intercalación sin
+    mayúsculas ni tildes, así que 'ají' y 'aji' son el mismo Ingrediente.
+    """
+    texto = unicodedata.normalize('NFKD', nombre)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def separar_ingredientes(texto):
+    """'Arroz, pollo ,  ARROZ' -> ['arroz', 'pollo'] (sin repetir, en orden)."""
+    vistos = {}
+    for parte in (texto or '').split(','):
+        nombre = normalizar_ingrediente(parte)[:100]
+        if nombre and clave_ingrediente(nombre) not in vistos:
+            vistos[clave_ingrediente(nombre)] = nombre
+    return list(vistos.values())
+
+
+def _ids_ingredientes(nombres):
+    """{clave: id} de los ingredientes ya guardados con alguno de esos nombres."""
+    return {
+        clave_ingrediente(nombre): pk
+        for pk, nombre in Ingrediente.objects.filter(nombre__in=nombres).values_list('id', 'nombre')
+    }
+
+
+def sincronizar_ingredientes(platos):
+    """
+    Rehace `lista_ingredientes` de los platos entregados a partir de su campo
+    de texto. Trabaja en lote: pocas consultas sin importar cuántos platos sean.
+    """
+    platos = [p for p in platos if p.pk]
+    if not platos:
+        return
+
+    por_plato = {p.pk: separar_ingredientes(p.ingredientes) for p in platos}
+    nombres = {n for lista in por_plato.values() for n in lista}
+
+    with transaction.atomic():
+        # Se busca por clave: con la intercalación de MySQL 'ají' encuentra a 'aji'
+        ids = _ids_ingredientes(nombres)
+        nuevos = {}
+        for nombre in nombres:
+            if clave_ingrediente(nombre) not in ids:
+                nuevos.setdefault(clave_ingrediente(nombre), Ingrediente(nombre=nombre))
+        if nuevos:
+            # Otro proceso pudo crear el mismo ingrediente entretanto
+            Ingrediente.objects.bulk_create(nuevos.values(), ignore_conflicts=True)
+            ids = _ids_ingredientes(nombres)
+
+        Relacion = Plato.lista_ingredientes.through
+        Relacion.objects.filter(plato_id__in=por_plato).delete()
+        Relacion.objects.bulk_create([
+            Relacion(plato_id=plato_id, ingrediente_id=ids[clave_ingrediente(nombre)])
+            for plato_id, lista in por_plato.items()
+            for nombre in lista
+            # Un conflicto que la base de datos descartó sin poder leerlo luego
+            # (no debería pasar) deja el plato sin ese ingrediente, no falla el guardado
+            if clave_ingrediente(nombre) in ids
+        ], batch_size=1000)
+
+
+# ---------------------------------------------------------
+# CONTEOS (CACHEADOS POR VERSIÓN DEL CATÁLOGO)
+# ---------------------------------------------------------
+def _q_rango(desde, hasta):
+    q = Q()
+    if desde is not None:
+        q &= Q(precio__gte=desde)
+    if hasta is not None:
+        q &= Q(precio__lt=hasta)
+    return q
+
+
+def calcular_facetas():
+    """Platos por proveedor, por rango de precio y por ingrediente (tres consultas agregadas)."""
+    proveedores = sorted(
+        Proveedor.objects.annotate(total=Count('platos'))
+        .filter(total__gt=0)
+        .order_by('-total', 'empresa')
+        .values('id', 'empresa', 'total')[:MAX_PROVEEDORES],
+        key=lambda f: f['empresa'] or '',
+    )
+
+    por_rango = Plato.objects.aggregate(**{
+        clave: Count('id', filter=_q_rango(desde, hasta))
+        for clave, _, desde, hasta in RANGOS_PRECIO
+    })
+
+    ingredientes = list(
+        Ingrediente.objects.annotate(total=Count('platos'))
+        .filter(total__gt=0)
+        .order_by('-total', 'nombre')
+        .values('id', 'nombre', 'total')[:MAX_INGREDIENTES]
+    )
+
+    return {
+        'proveedores': proveedores,
+        'precios': [
+            {'clave': clave, 'etiqueta': etiqueta, 'total': por_rango[clave]}
+            for clave, etiqueta, _, _ in RANGOS_PRECIO
+        ],
+        'ingredientes': ingredientes,
+    }
+
+
+def obtener_facetas():
+    clave = f'catalogo:facetas:{VersionCatalogo.actual().version}'
+    facetas = cache.get(clave)
+    lectura_cache('facetas', facetas is not None)
+    if facetas is None:
+        facetas = calcular_facetas()
+        cache.set(clave, facetas, SEGUNDOS_CACHE)
+    return facetas
+
+
+# ---------------------------------------------------------
+# FILTROS
+# ---------------------------------------------------------
+def leer_filtros(params):
+    """Filtros válidos de la query string: proveedor, precio e ingrediente."""
+    filtros = {}
+
+    proveedor = params.get('proveedor', '')
+    if proveedor.isdigit():
+        filtros['proveedor'] = int(proveedor)
+
+    if params.get('precio') in {r[0] for r in RANGOS_PRECIO}:
+        filtros['precio'] = params['precio']
+
+    ingrediente = params.get('ingrediente', '')
+    if ingrediente.isdigit():
+        filtros['ingrediente'] = int(ingrediente)
+
+    return filtros
+
+
+def filtrar_platos(filtros, queryset=None):
+    """Aplica los filtros a los platos: una sola consulta sobre columnas indexadas."""
+    qs = Plato.objects.all() if queryset is None else queryset
+
+    if 'proveedor' in filtros:
+        qs = qs.filter(proveedor_id=filtros['proveedor'])
+    if 'precio' in filtros:
+        _, _, desde, hasta = next(r for r in RANGOS_PRECIO if r[0] == filtros['precio'])
+        qs = qs.filter(_q_rango(desde, hasta))
+    if 'ingrediente' in filtros:
+        qs = qs.filter(lista_ingredientes=filtros['ingrediente'])
+
+    return qs
@@ -0,0 +1,133 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .menus import fecha_del_dia
+from .models import FacturaConvenio, ItemMenu, MenuSemanal
+from .ventas import siguiente_periodo
+
+
+# Menús por consulta al generar el detalle (el reporte se arma por tandas,
+# sin cargar todo el mes en memoria)
+LOTE_REPORTE = 1000
+
+COLUMNAS_DETALLE = ['empleado', 'correo', 'semana', 'fecha', 'dia', 'plato', 'cantidad', 'precio_unitario', 'subtotal']
+COLUMNAS_EMPLEADOS = ['empleado', 'correo', 'menus', 'platos', 'total']
+
+
+# ---------------------------------------------------------
+# PERÍODOS
+# ---------------------------------------------------------
+def mes_anterior():
+    return (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def leer_periodo(texto):
+    """'2026-09' -> date(2026, 9, 1); None si no es un mes válido."""
+    try:
+        return date.fromisoformat(f'{texto}-01')
+    except (TypeError, ValueError):
+        return None
+
+
+def menus_del_periodo(periodo, empresa_id=None):
+    """Menús pagados con saldo de convenio durante el mes `periodo`."""
+    desde = timezone.make_aware(datetime.combine(periodo, time.min))
+    hasta = timezone.make_aware(datetime.combine(siguiente_periodo(periodo, 'mes'), time.min))
+    qs = MenuSemanal.objects.filter(pagado=True, pagado_en__gte=desde, pagado_en__lt=hasta, empresa__isnull=False)
+    if empresa_id:
+        qs = qs.filter(empresa_id=empresa_id)
+    return qs
+
+
+# ---------------------------------------------------------
+# FACTURACIÓN MENSUAL
+# ---------------------------------------------------------
+def facturar(periodo):
+    """
+    Genera (o regenera) las facturas de todas las empresas para el mes `periodo`
+    con una sola consulta agregada por empresa. Retorna las facturas creadas.
+    """
+    filas = (
+        menus_del_periodo(periodo)
+        .values('empresa_id')
+        .annotate(
+            n_menus=Count('id'),
+            n_empleados=Count('cliente_id', distinct=True),
+            n_platos=Sum('cantidad'),
+            monto=Sum('total'),
+        )
+        .order_by()
+    )
+    facturas = [
+        FacturaConvenio(
+            empresa_id=f['empresa_id'],
+            periodo=periodo,
+            menus=f['n_menus'],
+            empleados=f['n_empleados'],
+            platos=f['n_platos'] or 0,
+            total=f['monto'] or 0,
+        )
+        for f in filas
+    ]
+
+    with transaction.atomic():
+        FacturaConvenio.objects.filter(periodo=periodo).delete()
+        FacturaConvenio.objects.bulk_create(facturas, batch_size=1000)
+    return facturas
+
+
+# ---------------------------------------------------------
+# REPORTES (filas para escribir en streaming)
+# ---------------------------------------------------------
+def _tandas_menus(factura):
+    """Ids de los menús facturados, por tandas de LOTE_REPORTE (paginación por id)."""
+    menus = menus_del_periodo(factura.periodo, factura.empresa_id).order_by('id').values_list('id', flat=True)
+    ultimo = 0
+    while True:
+        ids = list(menus.filter(id__gt=ultimo)[:LOTE_REPORTE])
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
+
+
+def filas_detalle(factura):
+    """Una fila por día de cada menú facturado; la suma de `subtotal` es el total de la factura."""
+    yield COLUMNAS_DETALLE
+    for ids in _tandas_menus(factura):
+        items = (
+            # Un plato borrado después del pago conserva su precio: se cobra igual
+            ItemMenu.objects.filter(Q(plato__isnull=False) | Q(precio_unitario__gt=0), menu_id__in=ids)
+            .order_by('menu_id', 'id')
+            .values_list(
+                'menu__cliente__user__username', 'menu__cliente__user__email', 'menu__semana',
+                'dia', 'plato__nombre', 'cantidad', 'precio_unitario',
+            )
+        )
+        for usuario, correo, semana, dia, plato, cantidad, precio in items:
+            yield [
+                usuario, correo, semana.isoformat(), fecha_del_dia(semana, dia).isoformat(),
+                dia, plato or 'Plato eliminado', cantidad, precio, cantidad * precio,
+            ]
+
+
+def filas_empleados(factura):
+    """Una fila por empleado con sus menús, platos y monto del mes."""
+    yield COLUMNAS_EMPLEADOS
+    menus = menus_del_periodo(factura.periodo, factura.empresa_id)
+    ultimo = 0
+    while True:
+        filas = list(
+            menus.filter(cliente_id__gt=ultimo)
+            .values('cliente_id', 'cliente__user__username', 'cliente__user__email')
+            .annotate(n_menus=Count('id'), n_platos=Sum('cantidad'), monto=Sum('total'))
+            .order_by('cliente_id')[:LOTE_REPORTE]
+        )
+        if not filas:
+            return
+        for f in filas:
+            yield [f['cliente__user__username'], f['cliente__user__email'], f['n_menus'], f['n_platos'], f['monto']]
+        ultimo = filas[-1]['cliente_id']
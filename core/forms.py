@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import AuthenticationForm
-from .models import Plato, Pedido, Proveedor
+from .franjas import franjas, leer_hora, opciones_franja
+from .models import DIAS_SEMANA, Plato, Pedido, Proveedor
 
 class UserRegisterForm(forms.ModelForm):
     password = forms.CharField(
@@ -59,7 +60,7 @@ class UserRegisterForm(forms.ModelForm):
 class ProveedorProfileForm(forms.ModelForm):
     class Meta:
         model = Proveedor
-        fields = ['empresa', 'descripcion', 'logo']
+        fields = ['empresa', 'descripcion', 'direccion', 'capacidad_franja', 'logo']
 
 class PlatoForm(forms.ModelForm):
     ingredientes = forms.CharField(
@@ -75,7 +76,7 @@ class PlatoForm(forms.ModelForm):
 
     class Meta:
         model = Plato
-        fields = ['nombre', 'descripcion', 'ingredientes', 'precio', 'imagen']
+        fields = ['nombre', 'descripcion', 'ingredientes', 'precio', 'stock_diario', 'imagen']
 
     def clean_ingredientes(self):
         data = self.cleaned_data['ingredientes']
@@ -83,15 +84,112 @@ class PlatoForm(forms.ModelForm):
         return ", ".join([i.strip() for i in data.split(",") if i.strip()])
 
 
+class PlatoImportForm(forms.Form):
+    archivo = forms.FileField(
+        label='Archivo de platos',
+        help_text="CSV o JSON con las columnas: nombre, descripcion, ingredientes, precio, imagen."
+    )
+    imagenes = forms.FileField(
+        label='Imágenes (zip)',
+        required=False,
+        help_text="Opcional. Zip con las imágenes nombradas en la columna 'imagen'."
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(('.csv', '.json', '.jsonl')):
+            raise forms.ValidationError("El archivo debe ser CSV o JSON.")
+        return archivo
+
+    def clean_imagenes(self):
+        imagenes = self.cleaned_data.get('imagenes')
+        if imagenes and not imagenes.name.lower().endswith('.zip'):
+            raise forms.ValidationError("Las imágenes deben venir en un archivo .zip.")
+        return imagenes
+
 
 class PedidoForm(forms.ModelForm):
     class Meta:
         model = Pedido
-        fields = ['plato', 'cantidad', 'direccion']
+        fields = ['plato', 'cantidad', 'direccion', 'hora_colacion']
+        labels = {
+            'hora_colacion': 'Hora de colación',
+        }
         widgets = {
             'plato': forms.Select(),
+            'hora_colacion': forms.Select(choices=[('', 'Lo antes posible')] + opciones_franja()),
+        }
+
+    def clean_cantidad(self):
+        cantidad = self.cleaned_data.get('cantidad')
+        if cantidad is not None and cantidad < 1:
+            raise forms.ValidationError("La cantidad debe ser al menos 1.")
+        return cantidad
+
+    def clean_hora_colacion(self):
+        hora = self.cleaned_data.get('hora_colacion')
+        if hora and hora not in franjas():
+            raise forms.ValidationError("Elige una de las franjas de colación.")
+        return hora
+
+
+class PedidoRapidoForm(forms.Form):
+    """Añadir un plato al carrito desde su ficha: cantidad y franja opcional."""
+    cantidad = forms.IntegerField(min_value=1, max_value=50, required=False)
+    hora_colacion = forms.CharField(required=False)
+
+    def clean_cantidad(self):
+        return self.cleaned_data.get('cantidad') or 1
+
+    def clean_hora_colacion(self):
+        return leer_hora(self.cleaned_data.get('hora_colacion'))
+
+
+class MenuSemanaForm(forms.Form):
+    """Los siete días del menú semanal en un solo envío: plato, hora y cantidad por día."""
+
+    def __init__(self, *args, platos=(), items=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Opciones agrupadas por proveedor; los platos elegidos se cargan juntos en cambios()
+        grupos = {}
+        for plato in platos:
+            grupos.setdefault(str(plato.proveedor), []).append((plato.pk, f'{plato.nombre} (${plato.precio:.0f})'))
+        opciones = [('', 'Sin plato')] + list(grupos.items())
+        items = items or {}
+
+        for dia, nombre in DIAS_SEMANA:
+            item = items.get(dia)
+            self.fields[f'plato_{dia}'] = forms.TypedChoiceField(
+                label=nombre, choices=opciones, coerce=int, required=False, empty_value=None,
+                initial=item.plato_id if item else None,
+            )
+            self.fields[f'hora_{dia}'] = forms.TypedChoiceField(
+                label='Hora de colación', choices=[('', 'Lo antes posible')] + opciones_franja(),
+                coerce=leer_hora, required=False, empty_value=None,
+                initial=item.hora_colacion.strftime('%H:%M') if item and item.hora_colacion else '',
+            )
+            self.fields[f'cantidad_{dia}'] = forms.IntegerField(
+                label='Cantidad', min_value=1, max_value=50, initial=item.cantidad if item else 1,
+            )
+
+    def dias(self):
+        """(nombre, campo plato, campo hora, campo cantidad) por día, para la tabla de la plantilla."""
+        return [
+            (nombre, self[f'plato_{dia}'], self[f'hora_{dia}'], self[f'cantidad_{dia}'])
+            for dia, nombre in DIAS_SEMANA
+        ]
+
+    def cambios(self):
+        """{dia: (plato, hora, cantidad)} para core.menus.asignar_dias (una consulta por los platos)."""
+        datos = self.cleaned_data
+        ids = [datos[f'plato_{dia}'] for dia, _ in DIAS_SEMANA if datos[f'plato_{dia}']]
+        platos = Plato.objects.select_related('proveedor').in_bulk(ids)
+        return {
+            dia: (platos.get(datos[f'plato_{dia}']), datos[f'hora_{dia}'], datos[f'cantidad_{dia}'])
+            for dia, _ in DIAS_SEMANA
         }
 
+
 class LoginForm(AuthenticationForm):
     username = forms.CharField(label='Usuario')
     password = forms.CharField(widget=forms.PasswordInput, label='Contraseña')
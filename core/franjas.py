@@ -0,0 +1,163 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OcupacionFranja
+
+
+# Horario de colación y largo de cada franja
+INICIO = getattr(settings, 'FRANJAS_INICIO', time(12, 0))
+FIN = getattr(settings, 'FRANJAS_FIN', time(15, 0))
+MINUTOS_FRANJA = getattr(settings, 'FRANJAS_MINUTOS', 15)
+
+DIAS = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+
+
+class FranjaLlena(Exception):
+    """La franja elegida (o todas las que quedan) no tiene capacidad para el pedido."""
+
+    def __init__(self, proveedor, hora=None):
+        self.proveedor = proveedor
+        self.hora = hora
+        if hora:
+            super().__init__(f'La franja de las {hora:%H:%M} en {proveedor} no está disponible.')
+        else:
+            super().__init__(f'{proveedor} no tiene franjas disponibles.')
+
+
+# ---------------------------------------------------------
+# FRANJAS
+# ---------------------------------------------------------
+def franjas():
+    """Horas de inicio de cada franja, de INICIO a FIN (excluido)."""
+    horas = []
+    actual = datetime.combine(datetime.min, INICIO)
+    fin = datetime.combine(datetime.min, FIN)
+    while actual < fin:
+        horas.append(actual.time())
+        actual += timedelta(minutes=MINUTOS_FRANJA)
+    return horas
+
+
+def opciones_franja():
+    return [(h.strftime('%H:%M'), h.strftime('%H:%M')) for h in franjas()]
+
+
+def leer_hora(texto):
+    """'12:30' -> time(12, 30) si es el inicio de una franja; None si no."""
+    try:
+        hora = datetime.strptime((texto or '').strip(), '%H:%M').time()
+    except ValueError:
+        return None
+    return hora if hora in franjas() else None
+
+
+def fecha_para_dia(dia, hoy=None):
+    """Próxima fecha (hoy incluido) que cae en `dia` ('lunes', 'martes', ...)."""
+    hoy = hoy or timezone.localdate()
+    return hoy + timedelta(days=(DIAS.index(dia) - hoy.weekday()) % 7)
+
+
+def _vigentes(fecha):
+    # Las franjas de hoy que ya empezaron no se ofrecen
+    ahora = timezone.localtime()
+    if fecha != ahora.date():
+        return franjas()
+    return [h for h in franjas() if h > ahora.time()]
+
+
+# ---------------------------------------------------------
+# DISPONIBILIDAD (desde la ocupación precalculada)
+# ---------------------------------------------------------
+def disponibilidad(proveedores, fecha):
+    """
+    {proveedor_id: [(hora, libres), ...]} con las franjas vigentes de `fecha`.
+    `libres` es None si el proveedor no tiene tope. Una sola consulta a
+    OcupacionFranja, sin contar pedidos.
+    """
+    con_tope = {p.pk: p.capacidad_franja for p in proveedores if p.capacidad_franja is not None}
+    horas = _vigentes(fecha)
+
+    reservados = {}
+    if con_tope:
+        reservados = {
+            (proveedor_id, hora): n
+            for proveedor_id, hora, n in OcupacionFranja.objects.filter(
+                proveedor_id__in=con_tope, fecha=fecha
+            ).values_list('proveedor_id', 'hora', 'reservados')
+        }
+
+    resultado = {}
+    for p in proveedores:
+        tope = con_tope.get(p.pk)
+        resultado[p.pk] = [
+            (h, None if tope is None else max(0, tope - reservados.get((p.pk, h), 0)))
+            for h in horas
+        ]
+    return resultado
+
+
+# ---------------------------------------------------------
+# RESERVA ATÓMICA
+# ---------------------------------------------------------
+def _fila(proveedor_id, fecha, hora):
+    fila = (
+        OcupacionFranja.objects.filter(proveedor_id=proveedor_id, fecha=fecha, hora=hora)
+        .values_list('id', flat=True).first()
+    )
+    if fila:
+        return fila
+    try:
+        with transaction.atomic():
+            return OcupacionFranja.objects.create(proveedor_id=proveedor_id, fecha=fecha, hora=hora).id
+    except IntegrityError:
+        return OcupacionFranja.objects.get(proveedor_id=proveedor_id, fecha=fecha, hora=hora).id
+
+
+def _reservar(proveedor, fecha, hora, cantidad):
+    fila = _fila(proveedor.pk, fecha, hora)
+    return OcupacionFranja.objects.filter(
+        pk=fila, reservados__lte=proveedor.capacidad_franja - cantidad
+    ).update(reservados=F('reservados') + cantidad) == 1
+
+
+def reservar_franja(proveedor, fecha, cantidad, hora=None):
+    """
+    Reserva `cantidad` porciones en la franja `hora` del proveedor y la retorna.
+
+    Sin hora se asigna la primera franja vigente con espacio, así la demanda
+    del mediodía se reparte en las siguientes en vez de saturar la cocina.
+    Cada intento es un UPDATE condicional (reservados + cantidad <= capacidad);
+    lanza FranjaLlena si no hay espacio.
+    """
+    if cantidad < 1:
+        raise ValueError(f'Cantidad inválida: {cantidad}')
+    if hora is not None and hora not in _vigentes(fecha):
+        raise FranjaLlena(proveedor, hora)
+    if proveedor.capacidad_franja is None:
+        return hora
+
+    if hora is not None:
+        if not _reservar(proveedor, fecha, hora, cantidad):
+            raise FranjaLlena(proveedor, hora)
+        return hora
+
+    for candidata, libres in disponibilidad([proveedor], fecha)[proveedor.pk]:
+        # Otra solicitud puede ganar la franja entre la lectura y el UPDATE: se sigue con la próxima
+        if libres >= cantidad and _reservar(proveedor, fecha, candidata, cantidad):
+            return candidata
+    raise FranjaLlena(proveedor)
+
+
+def liberar_franja(proveedor_id, fecha, hora, cantidad):
+    """Devuelve porciones a la franja (pedido eliminado, plato u hora cambiados)."""
+    if hora is None or fecha is None:
+        return
+    if cantidad < 1:
+        raise ValueError(f'Cantidad inválida: {cantidad}')
+    OcupacionFranja.objects.filter(
+        proveedor_id=proveedor_id, fecha=fecha, hora=hora, reservados__gte=cantidad
+    ).update(reservados=F('reservados') - cantidad)
@@ -0,0 +1,143 @@
+import hashlib
+import math
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+# Radio medio de la Tierra en km
+RADIO_TIERRA_KM = 6371.0088
+
+
+def normalizar_direccion(direccion):
+    """Minúsculas, sin tildes y con espacios simples: sirve como clave de agrupación."""
+    texto = unicodedata.normalize('NFKD', direccion or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().replace(',', ' ').split())
+
+
+def distancia_km(a, b):
+    """Distancia haversine entre dos puntos (lat, lon)."""
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(h))
+
+
+# ---------------------------------------------------------
+# GEOHASH (índice espacial en una columna de texto)
+# ---------------------------------------------------------
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precisión guardada en la base de datos (~5 m)
+PRECISION_GEOHASH = 9
+
+
+def geohash(lat, lon, precision=PRECISION_GEOHASH):
+    """Codifica (lat, lon) como geohash de `precision` caracteres."""
+    lat_rango = [-90.0, 90.0]
+    lon_rango = [-180.0, 180.0]
+    resultado = []
+    caracter, bit, es_lon = 0, 0, True
+
+    while len(resultado) < precision:
+        valor, rango = (lon, lon_rango) if es_lon else (lat, lat_rango)
+        medio = (rango[0] + rango[1]) / 2
+        if valor >= medio:
+            caracter |= 1 << (4 - bit)
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        es_lon = not es_lon
+
+        if bit < 4:
+            bit += 1
+        else:
+            resultado.append(_BASE32[caracter])
+            caracter, bit = 0, 0
+
+    return ''.join(resultado)
+
+
+def tamano_celda(precision):
+    """Alto y ancho en grados de una celda geohash."""
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def precision_para_radio(lat, radio_km):
+    """Mayor precisión cuya celda mide al menos `radio_km` por lado."""
+    km_por_grado = math.pi * RADIO_TIERRA_KM / 180
+    for precision in range(PRECISION_GEOHASH, 0, -1):
+        alto, ancho = tamano_celda(precision)
+        if (alto * km_por_grado >= radio_km
+                and ancho * km_por_grado * math.cos(math.radians(lat)) >= radio_km):
+            return precision
+    return 1
+
+
+def celdas_vecinas(lat, lon, precision):
+    """La celda que contiene el punto y sus 8 vecinas (sin repetir)."""
+    alto, ancho = tamano_celda(precision)
+    celdas = []
+    for dlat in (-alto, 0, alto):
+        for dlon in (-ancho, 0, ancho):
+            vlat = max(-90.0, min(90.0, lat + dlat))
+            vlon = (lon + dlon + 180.0) % 360.0 - 180.0
+            celda = geohash(vlat, vlon, precision)
+            if celda not in celdas:
+                celdas.append(celda)
+    return celdas
+
+
+# ---------------------------------------------------------
+# GEOCODIFICADORES
+# ---------------------------------------------------------
+class Geocoder:
+    """Convierte una dirección en (lat, lon). Las subclases implementan `_buscar`."""
+
+    def geocodificar(self, direccion):
+        clave = normalizar_direccion(direccion)
+        if not clave:
+            return None
+        return self._buscar(clave)
+
+    def _buscar(self, direccion_normalizada):
+        raise NotImplementedError
+
+
+class GeocoderLocal(Geocoder):
+    """
+    Geocodificador sin conexión para desarrollo y pruebas.
+
+    Asigna a cada dirección un punto estable dentro de un rectángulo alrededor
+    de Santiago, derivado del hash de la dirección normalizada.
+    """
+
+    # (lat_min, lat_max, lon_min, lon_max)
+    LIMITES = (-33.60, -33.35, -70.80, -70.50)
+
+    @lru_cache(maxsize=65536)
+    def _buscar(self, direccion_normalizada):
+        digest = hashlib.sha1(direccion_normalizada.encode()).digest()
+        fx = int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF
+        fy = int.from_bytes(digest[4:8], 'big') / 0xFFFFFFFF
+        lat_min, lat_max, lon_min, lon_max = self.LIMITES
+        return (
+            round(lat_min + fx * (lat_max - lat_min), 6),
+            round(lon_min + fy * (lon_max - lon_min), 6),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    """Instancia del geocodificador configurado en settings.GEOCODER."""
+    ruta = getattr(settings, 'GEOCODER', 'core.geo.GeocoderLocal')
+    return import_string(ruta)()
@@ -0,0 +1,309 @@
+import csv
+import io
+import json
+import os
+import zipfile
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .facetas import sincronizar_ingredientes
+from .forms import PlatoForm
+from .models import Plato, VersionCatalogo
+from .tareas import encolar
+
+
+# Cantidad de platos que se insertan por cada INSERT masivo
+TAMANO_LOTE = 100
+
+# Columnas aceptadas en el archivo (la imagen es opcional y apunta al zip)
+COLUMNAS = ['nombre', 'descripcion', 'ingredientes', 'precio', 'imagen']
+
+# Carpeta del almacenamiento donde esperan los zip de imágenes hasta que corre la tarea
+CARPETA_ZIP = 'importaciones'
+
+# Bytes que se miran para detectar la codificación y caracteres por lectura de un arreglo JSON
+MUESTRA_CODIFICACION = 64 * 1024
+BLOQUE_JSON = 64 * 1024
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede seguir leyendo (codificación o JSON inválidos)."""
+
+    def __init__(self, fila, mensaje):
+        super().__init__(mensaje)
+        self.fila = fila
+
+
+class ResultadoImportacion:
+    """Resumen de una importación: cuántos platos se crearon y errores por fila."""
+
+    def __init__(self):
+        self.creados = 0
+        self.errores = []  # [(numero_fila, [mensajes])]
+        self.imagenes_pendientes = 0
+        self.tarea_imagenes = None
+
+    @property
+    def total_errores(self):
+        return len(self.errores)
+
+    def agregar_error(self, fila, mensajes):
+        self.errores.append((fila, mensajes))
+
+
+# ---------------------------------------------------------
+# LECTURA DE FILAS (STREAMING)
+# ---------------------------------------------------------
+def _detectar_formato(nombre_archivo):
+    nombre = (nombre_archivo or '').lower()
+    if nombre.endswith('.json') or nombre.endswith('.jsonl'):
+        return 'json'
+    return 'csv'
+
+
+def _codificacion(binario):
+    """UTF-8 si el comienzo del archivo lo es; si no, Windows-1252 (CSV exportado desde Excel)."""
+    if not binario.seekable():
+        return 'utf-8-sig'
+    muestra = binario.read(MUESTRA_CODIFICACION)
+    binario.seek(0)
+    try:
+        muestra.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Un carácter cortado al final de la muestra no cuenta
+        if e.start < len(muestra) - 3:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+def leer_filas(archivo, formato=None):
+    """
+    Genera (numero_fila, datos) leyendo el archivo de a poco.
+
+    CSV se lee línea a línea; JSON acepta JSON Lines (un objeto por línea) o
+    un arreglo de objetos, que se decodifica elemento a elemento. El número
+    es la línea del archivo (el elemento, en un arreglo). Un archivo que no
+    se puede decodificar lanza ArchivoInvalido.
+    """
+    formato = formato or _detectar_formato(getattr(archivo, 'name', ''))
+    binario = getattr(archivo, 'file', archivo)
+    texto = io.TextIOWrapper(binario, encoding=_codificacion(binario), newline='')
+    numero = 0
+    try:
+        if formato == 'csv':
+            lector = csv.DictReader(texto)
+            for fila in lector:
+                numero = lector.line_num
+                yield numero, fila
+            return
+
+        primera = ''
+        for numero, primera in enumerate(texto, start=1):
+            if primera.strip():
+                break
+        if primera.lstrip().startswith('['):
+            yield from _elementos_arreglo(primera.lstrip()[1:], texto)
+            return
+
+        if primera.strip():
+            yield numero, _parsear_linea_json(primera)
+        for numero, linea in enumerate(texto, start=numero + 1):
+            if linea.strip():
+                yield numero, _parsear_linea_json(linea)
+    except UnicodeDecodeError:
+        raise ArchivoInvalido(numero + 1, 'El archivo no está en UTF-8 ni en Windows-1252.')
+    except csv.Error as e:
+        raise ArchivoInvalido(numero + 1, f'CSV inválido: {e}')
+
+
+def _elementos_arreglo(resto, texto):
+    """Decodifica un arreglo JSON elemento a elemento, leyendo bloques de BLOQUE_JSON caracteres."""
+    decodificador = json.JSONDecoder()
+    buffer, fin_archivo, numero = resto, False, 0
+
+    def llenar():
+        nonlocal buffer, fin_archivo
+        bloque = texto.read(BLOQUE_JSON)
+        fin_archivo = not bloque
+        buffer = buffer.lstrip() + bloque
+
+    def siguiente_caracter():
+        nonlocal buffer
+        buffer = buffer.lstrip()
+        while not buffer and not fin_archivo:
+            llenar()
+        return buffer[:1]
+
+    if siguiente_caracter() == ']':
+        return
+    while True:
+        if not siguiente_caracter():
+            raise ArchivoInvalido(numero + 1, 'El arreglo JSON está incompleto.')
+        try:
+            datos, fin = decodificador.raw_decode(buffer)
+        except ValueError:
+            datos, fin = None, None
+        # Sin decodificar, o un número que podría seguir en el próximo bloque: leer más
+        if (fin is None or fin == len(buffer)) and not fin_archivo:
+            llenar()
+            continue
+        if fin is None:
+            raise ArchivoInvalido(numero + 1, f'JSON inválido en el elemento {numero + 1}.')
+
+        numero += 1
+        yield numero, datos
+        buffer = buffer[fin:]
+        separador = siguiente_caracter()
+        if separador == ']':
+            return
+        if separador != ',':
+            raise ArchivoInvalido(numero + 1, f'JSON inválido después del elemento {numero}.')
+        buffer = buffer[1:]
+
+
+def _parsear_linea_json(linea):
+    try:
+        return json.loads(linea)
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------
+# VALIDACIÓN E INSERCIÓN POR LOTES
+# ---------------------------------------------------------
+def validar_fila(datos):
+    """Valida una fila con las mismas reglas que PlatoForm. Devuelve (plato, errores)."""
+    if not isinstance(datos, dict):
+        return None, ['Fila con formato inválido.']
+
+    valores = {c: (str(datos.get(c)).strip() if datos.get(c) is not None else '') for c in COLUMNAS}
+    form = PlatoForm(data=valores)
+
+    if not form.is_valid():
+        mensajes = []
+        for campo, errores in form.errors.items():
+            for error in errores:
+                mensajes.append(f'{campo}: {error}' if campo != '__all__' else error)
+        return None, mensajes
+
+    return form.save(commit=False), []
+
+
+def importar_platos(proveedor, archivo, formato=None, imagenes=None):
+    """
+    Importa platos para `proveedor` desde un CSV/JSON.
+
+    Las filas válidas se insertan en lotes de TAMANO_LOTE; las inválidas se
+    reportan en el resultado sin detener la importación. Si se entrega un zip
+    de imágenes, las columnas `imagen` se resuelven en segundo plano.
+    """
+    resultado = ResultadoImportacion()
+    lote = []
+    # Posición del plato entre los creados -> archivo dentro del zip (dos platos
+    # pueden llamarse igual y tener imágenes distintas)
+    imagenes_por_fila = {}
+    # bulk_create no devuelve ids en todas las bases: los nuevos son los mayores a este
+    ultimo_id = Plato.objects.filter(proveedor=proveedor).aggregate(m=Max('id'))['m'] or 0
+
+    def guardar_lote():
+        with transaction.atomic():
+            Plato.objects.bulk_create(lote)
+        resultado.creados += len(lote)
+        lote.clear()
+
+    try:
+        for numero, datos in leer_filas(archivo, formato):
+            plato, errores = validar_fila(datos)
+            if errores:
+                resultado.agregar_error(numero, errores)
+                continue
+
+            plato.proveedor = proveedor
+            nombre_imagen = (datos.get('imagen') or '').strip()
+            if nombre_imagen:
+                imagenes_por_fila[resultado.creados + len(lote)] = nombre_imagen
+            lote.append(plato)
+
+            if len(lote) >= TAMANO_LOTE:
+                guardar_lote()
+    except ArchivoInvalido as e:
+        # Las filas anteriores se importan igual; el resto del archivo no se puede leer
+        resultado.agregar_error(e.fila, [str(e)])
+
+    if lote:
+        guardar_lote()
+
+    # bulk_create no dispara señales: indexar los ingredientes y avisar a la
+    # API y a las facetas que el catálogo cambió
+    if resultado.creados:
+        sincronizar_ingredientes(
+            Plato.objects.filter(proveedor=proveedor, id__gt=ultimo_id).only('id', 'ingredientes')
+        )
+        VersionCatalogo.incrementar()
+
+    if imagenes and imagenes_por_fila:
+        imagenes_por_id = _imagenes_por_id(proveedor, ultimo_id, imagenes_por_fila)
+        resultado.imagenes_pendientes = len(imagenes_por_id)
+        resultado.tarea_imagenes = encolar_imagenes(proveedor.id, imagenes, imagenes_por_id)
+
+    return resultado
+
+
+def _imagenes_por_id(proveedor, ultimo_id, imagenes_por_fila):
+    """Pares [id, archivo]: el n-ésimo plato creado es el n-ésimo id nuevo del proveedor."""
+    ids = (
+        Plato.objects.filter(proveedor=proveedor, id__gt=ultimo_id)
+        .order_by('id').values_list('id', flat=True).iterator()
+    )
+    return [[pk, imagenes_por_fila[i]] for i, pk in enumerate(ids) if i in imagenes_por_fila]
+
+
+# ---------------------------------------------------------
+# IMÁGENES EN SEGUNDO PLANO
+# ---------------------------------------------------------
+def encolar_imagenes(proveedor_id, imagenes, imagenes_por_id):
+    """
+    Guarda el zip en el almacenamiento compartido (cualquier worker lo puede
+    abrir) y deja su procesamiento en la cola de tareas.
+    """
+    nombre = f'{CARPETA_ZIP}/{proveedor_id}/imagenes.zip'
+    if isinstance(imagenes, (str, os.PathLike)):
+        with open(imagenes, 'rb') as f:
+            nombre_zip = default_storage.save(nombre, File(f))
+    else:
+        nombre_zip = default_storage.save(nombre, imagenes)
+
+    return encolar(procesar_imagenes, proveedor_id, nombre_zip, imagenes_por_id)
+
+
+def procesar_imagenes(proveedor_id, nombre_zip, imagenes_por_id):
+    """Asigna a cada plato importado su imagen dentro del zip. Devuelve cuántas se guardaron."""
+    archivos = dict(imagenes_por_id)
+    guardadas = 0
+    with default_storage.open(nombre_zip, 'rb') as zip_guardado, zipfile.ZipFile(zip_guardado) as zf:
+        # Índice por nombre de archivo, ignorando carpetas dentro del zip
+        entradas = {os.path.basename(n): n for n in zf.namelist() if not n.endswith('/')}
+
+        platos = Plato.objects.filter(
+            proveedor_id=proveedor_id,
+            id__in=list(archivos),
+        ).filter(Q(imagen='') | Q(imagen__isnull=True))
+
+        for plato in platos:
+            entrada = entradas.get(os.path.basename(archivos[plato.id]))
+            if not entrada:
+                continue
+
+            with zf.open(entrada) as f:
+                plato.imagen.save(os.path.basename(entrada), ContentFile(f.read()), save=False)
+            plato.save(update_fields=['imagen'])
+            guardadas += 1
+
+    # Solo se borra si todo salió bien; si falla, el reintento necesita el zip
+    default_storage.delete(nombre_zip)
+
+    return guardadas
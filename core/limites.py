@@ -0,0 +1,212 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from .metricas import RECHAZOS_LIMITE
+
+
+# ---------------------------------------------------------
+# BALDE DE FICHAS (token bucket)
+# ---------------------------------------------------------
+def recargar(fichas, ultimo, ahora, tasa, capacidad):
+    """Fichas disponibles tras recargar `tasa` fichas por segundo desde `ultimo`."""
+    return min(capacidad, fichas + (ahora - ultimo) * tasa)
+
+
+def espera(fichas, tasa):
+    """Segundos hasta que vuelva a haber una ficha completa."""
+    return max(1, math.ceil((1 - fichas) / tasa))
+
+
+class Limitador:
+    """
+    Guarda un balde por clave. `consumir` retorna (permitido, segundos_de_espera).
+    Las subclases implementan `consumir`, `rechazar` y `rechazos`.
+    """
+
+    def consumir(self, clave, tasa, capacidad):
+        raise NotImplementedError
+
+    def rechazar(self, nombre):
+        """Suma un rechazo al contador del límite `nombre`."""
+        raise NotImplementedError
+
+    def rechazos(self, nombre):
+        raise NotImplementedError
+
+
+class LimitadorMemoria(Limitador):
+    """
+    Baldes en memoria del proceso. Sin dependencias y sin consultas, pero cada
+    worker lleva su propia cuenta: el límite efectivo se multiplica por la
+    cantidad de procesos.
+    """
+
+    # Claves recordadas; al pasarse se olvidan las menos usadas
+    MAX_CLAVES = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baldes = OrderedDict()
+        self._rechazos = {}
+
+    def consumir(self, clave, tasa, capacidad):
+        ahora = time.monotonic()
+        with self._lock:
+            fichas, ultimo = self._baldes.pop(clave, (capacidad, ahora))
+            fichas = recargar(fichas, ultimo, ahora, tasa, capacidad)
+
+            permitido = fichas >= 1
+            if permitido:
+                fichas -= 1
+
+            self._baldes[clave] = (fichas, ahora)
+            if len(self._baldes) > self.MAX_CLAVES:
+                self._baldes.popitem(last=False)
+
+        return permitido, 0 if permitido else espera(fichas, tasa)
+
+    def rechazar(self, nombre):
+        with self._lock:
+            self._rechazos[nombre] = self._rechazos.get(nombre, 0) + 1
+
+    def rechazos(self, nombre):
+        with self._lock:
+            return self._rechazos.get(nombre, 0)
+
+
+class LimitadorCache(Limitador):
+    """
+    Baldes en la caché compartida de Django (settings.LIMITES_CACHE, por
+    defecto 'default'), así todos los workers comparten el límite.
+
+    Leer y escribir el balde no es atómico: con muchas solicitudes simultáneas
+    de la misma clave puede dejar pasar alguna de más, nunca de menos.
+    """
+
+    PREFIJO = 'limite:'
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'LIMITES_CACHE', 'default')]
+
+    def consumir(self, clave, tasa, capacidad):
+        ahora = time.time()
+        llave = self.PREFIJO + clave
+        fichas, ultimo = self.cache.get(llave, (capacidad, ahora))
+        fichas = recargar(fichas, ultimo, ahora, tasa, capacidad)
+
+        permitido = fichas >= 1
+        if permitido:
+            fichas -= 1
+
+        # Un balde que se llenaría solo no necesita seguir guardado
+        self.cache.set(llave, (fichas, ahora), timeout=math.ceil(capacidad / tasa) + 1)
+        return permitido, 0 if permitido else espera(fichas, tasa)
+
+    def rechazar(self, nombre):
+        llave = f'{self.PREFIJO}rechazos:{nombre}'
+        # add() crea el contador si no existe; incr() es atómico en Redis/Memcached
+        self.cache.add(llave, 0, timeout=None)
+        try:
+            self.cache.incr(llave)
+        except ValueError:
+            self.cache.set(llave, 1, timeout=None)
+
+    def rechazos(self, nombre):
+        return self.cache.get(f'{self.PREFIJO}rechazos:{nombre}', 0)
+
+
+@lru_cache(maxsize=None)
+def get_limitador():
+    """Instancia del limitador configurado en settings.LIMITADOR."""
+    ruta = getattr(settings, 'LIMITADOR', 'core.limites.LimitadorMemoria')
+    return import_string(ruta)()
+
+
+# ---------------------------------------------------------
+# CLAVES POR SOLICITUD
+# ---------------------------------------------------------
+def ip_cliente(request):
+    # Detrás de un proxy confiable se puede leer la IP real de una cabecera (ej: HTTP_X_REAL_IP)
+    cabecera = getattr(settings, 'LIMITES_CABECERA_IP', None)
+    if cabecera and request.META.get(cabecera):
+        return request.META[cabecera].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def clave_usuario(request):
+    """
+    Identifica al usuario autenticado por su id. La sesión ya la validó el
+    middleware: una cookie inventada no es una sesión y cae en el balde de la
+    IP, así que cambiar de cookie en cada solicitud no da fichas nuevas.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'u:{user.pk}'
+    return f'ip:{ip_cliente(request)}'
+
+
+CLAVES = {
+    'ip': lambda request: f'ip:{ip_cliente(request)}',
+    'usuario': clave_usuario,
+}
+
+
+# ---------------------------------------------------------
+# DECORADOR
+# ---------------------------------------------------------
+# Límites declarados con @limitar: {nombre: (tasa, capacidad)}
+REGISTRADOS = {}
+
+
+def limitar(nombre, tasa, capacidad, por='ip', metodos=('POST',)):
+    """
+    Limita la vista con un balde de `capacidad` fichas que se recarga a `tasa`
+    fichas por segundo, uno por IP o por usuario (`por`).
+
+    Debe ir por encima de @login_required: una solicitud rechazada no llega a
+    escribir nada (por usuario solo se lee la sesión, que login_required leería
+    igual). Responde 429 con Retry-After.
+    """
+    obtener_clave = CLAVES[por]
+    REGISTRADOS[nombre] = (tasa, capacidad)
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method in metodos and getattr(settings, 'LIMITES_ACTIVOS', True):
+                limitador = get_limitador()
+                permitido, segundos = limitador.consumir(f'{nombre}:{obtener_clave(request)}', tasa, capacidad)
+                if not permitido:
+                    limitador.rechazar(nombre)
+                    RECHAZOS_LIMITE.labels(nombre).inc()
+                    respuesta = HttpResponse(
+                        'Demasiadas solicitudes. Intenta nuevamente en unos segundos.',
+                        status=429,
+                        content_type='text/plain; charset=utf-8',
+                    )
+                    respuesta['Retry-After'] = str(segundos)
+                    return respuesta
+            return vista(request, *args, **kwargs)
+        return envoltura
+
+    return decorador
+
+
+def metricas():
+    """Configuración y rechazos acumulados de cada límite declarado."""
+    limitador = get_limitador()
+    return {
+        'backend': type(limitador).__name__,
+        'limites': {
+            nombre: {'tasa': tasa, 'capacidad': capacidad, 'rechazos': limitador.rechazos(nombre)}
+            for nombre, (tasa, capacidad) in sorted(REGISTRADOS.items())
+        },
+    }
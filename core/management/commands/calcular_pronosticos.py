@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.pronosticos import DIAS_PRONOSTICO, SEMANAS, calcular_pronosticos, pronosticar
+
+
+class Command(BaseCommand):
+    help = "Recalcula el pronóstico de demanda de cada plato para los próximos días."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semanas', type=int, default=SEMANAS, help="Semanas de historial a considerar.")
+        parser.add_argument('--dias', type=int, default=DIAS_PRONOSTICO, help="Días a pronosticar desde mañana.")
+        parser.add_argument(
+            '--simular', type=int, metavar='PLATOS',
+            help="No toca la base de datos: pronostica N platos con historial sintético y mide el tiempo."
+        )
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            return self._simular(options)
+
+        resumen = calcular_pronosticos(semanas=options['semanas'], dias=options['dias'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Platos: {resumen['platos']} · Pronósticos guardados: {resumen['filas']} · "
+            f"Cálculo: {resumen['segundos']}s"
+        ))
+
+    def _simular(self, options):
+        semanas = options['semanas']
+        rng = np.random.default_rng(42)
+        matriz = rng.poisson(rng.uniform(0, 20, size=(options['simular'], 1)), size=(options['simular'], semanas * 7))
+
+        inicio = time.perf_counter()
+        estimado = pronosticar(matriz.astype(float), 0, semanas)
+        segundos = time.perf_counter() - inicio
+
+        self.stdout.write(
+            f"{options['simular']} platos × {semanas} semanas → {int(estimado.sum())} unidades/semana, "
+            f"en {segundos * 1000:.1f} ms"
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.recomendaciones import TOP_K, actualizar_recomendaciones
+
+
+class Command(BaseCommand):
+    help = "Actualiza las recomendaciones 'se piden juntos' con los pedidos de los días cerrados."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help="Recalcular desde cero con todo el historial.")
+        parser.add_argument('--top', type=int, default=TOP_K, help="Recomendaciones por plato.")
+
+    def handle(self, *args, **options):
+        platos = actualizar_recomendaciones(completo=options['completo'], k=options['top'])
+        self.stdout.write(self.style.SUCCESS(f"Platos con recomendaciones actualizadas: {platos}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.eventos import DIAS_VENTANA, calcular_tiempos
+
+
+class Command(BaseCommand):
+    help = "Recalcula los percentiles de tiempos de cocina por proveedor desde el historial de estados."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=DIAS_VENTANA, help="Días de pedidos a considerar.")
+
+    def handle(self, *args, **options):
+        proveedores = calcular_tiempos(dias=options['dias'])
+        self.stdout.write(self.style.SUCCESS(f"Proveedores con tiempos calculados: {proveedores}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.ventas import actualizar_ventas_diarias
+
+
+class Command(BaseCommand):
+    help = "Actualiza las ventas pre-agregadas por día que usan los gráficos del panel."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help="Recalcular todo el historial.")
+
+    def handle(self, *args, **options):
+        dias = actualizar_ventas_diarias(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(f"Días con ventas recalculados: {dias}"))
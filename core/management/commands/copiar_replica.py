@@ -0,0 +1,25 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.replicas import REPLICA, replica_configurada
+
+
+class Command(BaseCommand):
+    help = "Solo para desarrollo con SQLite: copia la base 'default' sobre la réplica, simulando la replicación."
+
+    def handle(self, *args, **options):
+        if not replica_configurada():
+            raise CommandError("No hay réplica configurada (DATABASE_REPLICA_URL).")
+
+        origen, destino = connections['default'], connections[REPLICA]
+        if origen.vendor != 'sqlite' or destino.vendor != 'sqlite':
+            raise CommandError("La copia solo está disponible cuando ambas bases son SQLite.")
+
+        with sqlite3.connect(origen.settings_dict['NAME']) as src, \
+                sqlite3.connect(destino.settings_dict['NAME']) as dst:
+            src.backup(dst)
+
+        destino.close()
+        self.stdout.write(self.style.SUCCESS("Réplica actualizada."))
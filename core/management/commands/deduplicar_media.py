@@ -0,0 +1,92 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Plato, Proveedor, VersionCatalogo
+from core.storage import hash_contenido, nombre_por_hash
+
+
+# Carpetas de MEDIA_ROOT y los campos que las referencian
+CARPETAS = {
+    'logos': (Proveedor, 'logo'),
+    'platos': (Plato, 'imagen'),
+}
+
+
+class Command(BaseCommand):
+    help = "Renombra la media existente por hash de contenido, colapsa duplicados y actualiza las referencias."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Hilos para calcular hashes en paralelo.")
+        parser.add_argument('--dry-run', action='store_true', help="Solo informar, sin mover ni borrar archivos.")
+
+    def handle(self, *args, **options):
+        raiz = settings.MEDIA_ROOT
+        dry_run = options['dry_run']
+        liberado = 0
+        referencias = 0
+
+        for carpeta, (modelo, campo) in CARPETAS.items():
+            rutas = self._listar(raiz, carpeta)
+            if not rutas:
+                continue
+
+            # Hash de todos los archivos en paralelo (I/O de disco)
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                hashes = pool.map(lambda r: self._hash(raiz, r), rutas)
+                grupos = defaultdict(list)
+                for ruta, digest in zip(rutas, hashes):
+                    grupos[digest].append(ruta)
+
+            for digest, nombres in grupos.items():
+                extension = os.path.splitext(nombres[0])[1]
+                destino = nombre_por_hash(f'{carpeta}/archivo{extension}', digest)
+                sobrantes = [n for n in nombres if n != destino]
+                if not sobrantes:
+                    continue
+
+                self.stdout.write(f"{destino} ← {', '.join(sobrantes)}")
+                if dry_run:
+                    continue
+
+                ruta_destino = os.path.join(raiz, destino)
+                borrar = sobrantes
+                if not os.path.exists(ruta_destino):
+                    # El primer archivo pasa a ser la copia canónica
+                    os.makedirs(os.path.dirname(ruta_destino), exist_ok=True)
+                    os.replace(os.path.join(raiz, sobrantes[0]), ruta_destino)
+                    borrar = sobrantes[1:]
+
+                with transaction.atomic():
+                    referencias += modelo.objects.filter(
+                        **{f'{campo}__in': sobrantes}
+                    ).update(**{campo: destino})
+
+                for nombre in borrar:
+                    liberado += os.path.getsize(os.path.join(raiz, nombre))
+                    os.remove(os.path.join(raiz, nombre))
+
+        if referencias:
+            # update() no dispara señales: las URLs del catálogo cambiaron
+            VersionCatalogo.incrementar()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Referencias actualizadas: {referencias}. Espacio liberado: {liberado / 1024:.1f} KB."
+        ))
+
+    def _listar(self, raiz, carpeta):
+        rutas = []
+        base = os.path.join(raiz, carpeta)
+        for directorio, _, archivos in os.walk(base):
+            for archivo in archivos:
+                relativa = os.path.relpath(os.path.join(directorio, archivo), raiz).replace(os.sep, '/')
+                rutas.append(relativa)
+        return rutas
+
+    def _hash(self, raiz, relativa):
+        with open(os.path.join(raiz, relativa), 'rb') as f:
+            return hash_contenido(f)
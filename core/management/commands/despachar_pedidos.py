@@ -0,0 +1,59 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.despacho import agrupar_paradas, despachar, planificar, ubicacion_proveedor
+from core.geo import get_geocoder
+
+
+class _RepartidorSimulado:
+    def __init__(self, i, capacidad):
+        self.id = i
+        self.nombre = f'Repartidor {i}'
+        self.capacidad = capacidad
+
+
+class Command(BaseCommand):
+    help = "Asigna los pedidos listos a repartidores libres y ordena cada ruta."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simular', type=int, metavar='PEDIDOS',
+            help="No toca la base de datos: planifica N pedidos sintéticos y mide el tiempo."
+        )
+        parser.add_argument('--proveedores', type=int, default=20, help="Proveedores en la simulación.")
+        parser.add_argument('--repartidores', type=int, default=60, help="Repartidores en la simulación.")
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            return self._simular(options)
+
+        resumen = despachar()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rutas: {resumen['rutas']} · Pedidos asignados: {resumen['asignados']} · "
+            f"Esperando repartidor: {resumen['sin_asignar']} · Sin dirección: {resumen['sin_direccion']} · "
+            f"Planificación: {resumen['segundos']}s"
+        ))
+
+    def _simular(self, options):
+        rnd = random.Random(42)
+        geocoder = get_geocoder()
+        direcciones = [f'Calle {rnd.randint(1, 400)} #{rnd.randint(100, 9999)}' for _ in range(options['simular'] // 2 or 1)]
+        pedidos = [{
+            'id': i,
+            'proveedor_id': rnd.randint(1, options['proveedores']),
+            'direccion': rnd.choice(direcciones),
+        } for i in range(options['simular'])]
+        repartidores = [_RepartidorSimulado(i, rnd.choice([6, 8, 10])) for i in range(options['repartidores'])]
+
+        inicio = time.perf_counter()
+        origenes = {pid: ubicacion_proveedor(pid, None, geocoder) for pid in {p['proveedor_id'] for p in pedidos}}
+        lotes, sin_asignar = planificar(agrupar_paradas(pedidos, geocoder), origenes, repartidores)
+        segundos = time.perf_counter() - inicio
+
+        km = sum(l.distancia_km for l in lotes)
+        self.stdout.write(
+            f"{len(pedidos)} pedidos → {len(lotes)} rutas ({km:.1f} km), "
+            f"{len(sin_asignar)} esperando repartidor, en {segundos * 1000:.1f} ms"
+        )
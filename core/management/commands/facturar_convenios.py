@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.facturacion import facturar, leer_periodo, mes_anterior
+
+
+class Command(BaseCommand):
+    help = "Genera las facturas mensuales de las empresas con convenio a partir de los menús pagados con saldo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', help="Mes a facturar (AAAA-MM). Por defecto, el mes anterior.")
+
+    def handle(self, *args, **options):
+        periodo = leer_periodo(options['periodo']) if options['periodo'] else mes_anterior()
+        if periodo is None:
+            raise CommandError("El período debe tener el formato AAAA-MM.")
+        facturas = facturar(periodo)
+        total = sum(f.total for f in facturas)
+        self.stdout.write(self.style.SUCCESS(
+            f"Facturas de {periodo:%m/%Y}: {len(facturas)} empresas, total ${total}"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from core.geo import get_geocoder
+from core.models import Cliente, Proveedor
+from core.ubicaciones import geocodificar_pendientes
+
+
+class Command(BaseCommand):
+    help = "Geocodifica en lotes las direcciones de proveedores y clientes que no tienen coordenadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--geocoder', help="Ruta a la clase geocodificadora (por defecto settings.GEOCODER).")
+        parser.add_argument('--lote', type=int, default=500, help="Filas por lote.")
+        parser.add_argument('--todos', action='store_true', help="Recalcular también las que ya tienen coordenadas.")
+
+    def handle(self, *args, **options):
+        geocoder = import_string(options['geocoder'])() if options['geocoder'] else get_geocoder()
+
+        for Modelo in (Proveedor, Cliente):
+            total = geocodificar_pendientes(Modelo, geocoder, lote=options['lote'], todos=options['todos'])
+            self.stdout.write(f"{Modelo.__name__}: {total} geocodificados")
+
+        self.stdout.write(self.style.SUCCESS("Listo."))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacion import importar_platos
+from core.tareas import ejecutar
+from core.models import Proveedor
+
+
+class Command(BaseCommand):
+    help = "Importa platos de un proveedor desde un CSV/JSON (y opcionalmente un zip de imágenes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('proveedor_id', type=int)
+        parser.add_argument('archivo', help="Ruta al CSV o JSON con los platos.")
+        parser.add_argument('--imagenes', help="Ruta a un zip con las imágenes de los platos.")
+        parser.add_argument('--formato', choices=['csv', 'json'], help="Forzar formato (por defecto según extensión).")
+
+    def handle(self, *args, **options):
+        try:
+            proveedor = Proveedor.objects.get(id=options['proveedor_id'])
+        except Proveedor.DoesNotExist:
+            raise CommandError(f"No existe el proveedor {options['proveedor_id']}.")
+
+        with open(options['archivo'], 'rb') as archivo:
+            resultado = importar_platos(
+                proveedor,
+                archivo,
+                formato=options['formato'],
+                imagenes=options['imagenes'],
+            )
+
+        for fila, mensajes in resultado.errores:
+            self.stderr.write(f"Fila {fila}: {'; '.join(mensajes)}")
+
+        # Desde la consola no hace falta esperar al worker
+        if resultado.tarea_imagenes is not None and ejecutar(resultado.tarea_imagenes):
+            resultado.tarea_imagenes.refresh_from_db()
+            self.stdout.write(f"Imágenes: tarea {resultado.tarea_imagenes.estado}.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Platos creados: {resultado.creados}. Filas con error: {resultado.total_errores}."
+        ))
@@ -0,0 +1,133 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Módulos que interesa ver aunque no estén en el top (los que más suelen pesar al arrancar)
+SEGUIDOS = ['dj_database_url', 'PIL', 'numpy', 'prometheus_client', 'core.views', 'adminpanel.views']
+
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+# Carga del proyecto tal como la hace un worker (sin calentar) más los URLconf,
+# que son los que importan las vistas
+SCRIPT_IMPORTS = """
+import saboresgo.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+# Mide el arranque y las dos primeras solicitudes contra la aplicación WSGI real
+SCRIPT_SOLICITUD = """
+import io, json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+inicio = time.perf_counter()
+from saboresgo.wsgi import application
+from django.conf import settings
+arranque = time.perf_counter() - inicio
+
+host = next((h for h in settings.ALLOWED_HOSTS if h not in ('*', '') and not h.startswith('.')), 'localhost')
+
+def pedir():
+    environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': host, 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    estado = []
+    inicio = time.perf_counter()
+    cuerpo = application(environ, lambda s, h, *a: estado.append(s))
+    b''.join(cuerpo)
+    if hasattr(cuerpo, 'close'):
+        cuerpo.close()
+    return time.perf_counter() - inicio, estado[0]
+
+primera, estado = pedir()
+segunda, _ = pedir()
+print(json.dumps({'arranque': arranque, 'primera': primera, 'segunda': segunda, 'estado': estado}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Perfil de arranque del worker: tiempo de importación por módulo (python -X importtime) "
+        "y tiempo hasta la primera respuesta, sin calentar y con core.arranque.calentar()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help="Módulos a mostrar, por tiempo acumulado.")
+        parser.add_argument('--ruta', default='/', help="Ruta de la primera solicitud.")
+        parser.add_argument('--repeticiones', type=int, default=3, help="Arranques por modo (se informa la mediana).")
+        parser.add_argument('--solo-imports', action='store_true', help="No medir la primera respuesta.")
+
+    def _ejecutar(self, codigo, *args, calentar=False, importtime=False):
+        env = dict(os.environ, CALENTAR='1' if calentar else '0')
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        comando = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', codigo, *args]
+        resultado = subprocess.run(comando, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if resultado.returncode != 0:
+            self.stderr.write(resultado.stderr[-2000:])
+            raise SystemExit(resultado.returncode)
+        return resultado
+
+    # ---------------------------------------------------------
+    # IMPORTS
+    # ---------------------------------------------------------
+    def _imports(self, top):
+        salida = self._ejecutar(SCRIPT_IMPORTS, importtime=True).stderr
+        modulos = {}
+        total = 0
+        for linea in salida.splitlines():
+            m = LINEA_IMPORTTIME.match(linea)
+            if not m:
+                continue
+            propio, acumulado, modulo = int(m[1]), int(m[2]), m[3]
+            total += propio
+            modulos[modulo] = acumulado
+
+        self.stdout.write(f"Importación total: {total / 1000:.0f} ms en {len(modulos)} módulos\n")
+        self.stdout.write(f"{'acumulado':>10}  módulo")
+        for modulo, acumulado in sorted(modulos.items(), key=lambda par: -par[1])[:top]:
+            self.stdout.write(f"{acumulado / 1000:>8.1f} ms  {modulo}")
+
+        self.stdout.write("\nMódulos seguidos:")
+        for modulo in SEGUIDOS:
+            if modulo in modulos:
+                self.stdout.write(f"{modulos[modulo] / 1000:>8.1f} ms  {modulo}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{'-':>8}     {modulo} (no se importa al arrancar)"))
+
+    # ---------------------------------------------------------
+    # PRIMERA RESPUESTA
+    # ---------------------------------------------------------
+    def _medir(self, ruta, calentar, repeticiones):
+        corridas = [
+            json.loads(self._ejecutar(SCRIPT_SOLICITUD, ruta, calentar=calentar).stdout.strip().splitlines()[-1])
+            for _ in range(repeticiones)
+        ]
+        return {
+            clave: statistics.median(c[clave] for c in corridas) for clave in ('arranque', 'primera', 'segunda')
+        }, corridas[-1]['estado']
+
+    def _primera_respuesta(self, ruta, repeticiones):
+        self.stdout.write(f"\nPrimera respuesta a {ruta} (mediana de {repeticiones} arranques):")
+        self.stdout.write(f"{'modo':<12}{'arranque':>10}{'1ª sol.':>10}{'2ª sol.':>10}  estado")
+        medidas = {}
+        for modo, calentar in (('en frío', False), ('calentado', True)):
+            tiempos, estado = self._medir(ruta, calentar, repeticiones)
+            medidas[modo] = tiempos
+            self.stdout.write(
+                f"{modo:<12}{tiempos['arranque'] * 1000:>8.0f}ms"
+                f"{tiempos['primera'] * 1000:>8.0f}ms{tiempos['segunda'] * 1000:>8.0f}ms  {estado}"
+            )
+
+        ahorro = medidas['en frío']['primera'] - medidas['calentado']['primera']
+        self.stdout.write(self.style.SUCCESS(f"La primera solicitud calentada responde {ahorro * 1000:.0f} ms antes"))
+
+    def handle(self, *args, **options):
+        self._imports(options['top'])
+        if not options['solo_imports']:
+            self._primera_respuesta(options['ruta'], options['repeticiones'])
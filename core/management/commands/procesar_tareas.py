@@ -0,0 +1,48 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from core.tareas import ejecutar_en_hilo, liberar_abandonadas, metricas, pendientes
+
+
+class Command(BaseCommand):
+    help = "Worker local de la cola de tareas: ejecuta las tareas pendientes con un pool de hilos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=4, help="Tareas en paralelo.")
+        parser.add_argument('--intervalo', type=float, default=1.0, help="Segundos de espera cuando la cola está vacía.")
+        parser.add_argument('--una-vez', action='store_true', help="Vaciar la cola y terminar.")
+        parser.add_argument('--metricas', action='store_true', help="Mostrar métricas de la cola y terminar.")
+
+    def handle(self, *args, **options):
+        if options['metricas']:
+            self.stdout.write(json.dumps(metricas(), indent=2))
+            return
+
+        hilos = max(1, options['hilos'])
+        ultima_limpieza = 0
+
+        self.stdout.write(f"Worker iniciado con {hilos} hilos.")
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='tareas') as pool:
+            try:
+                while True:
+                    if time.monotonic() - ultima_limpieza > 60:
+                        liberadas = liberar_abandonadas()
+                        if liberadas:
+                            self.stdout.write(f"Tareas abandonadas devueltas a la cola: {liberadas}")
+                        ultima_limpieza = time.monotonic()
+
+                    lote = pendientes(hilos * 2)
+                    if not lote:
+                        if options['una_vez']:
+                            break
+                        time.sleep(options['intervalo'])
+                        continue
+
+                    wait([pool.submit(ejecutar_en_hilo, tarea) for tarea in lote])
+            except KeyboardInterrupt:
+                self.stdout.write("Deteniendo worker...")
+
+        self.stdout.write(self.style.SUCCESS(json.dumps(metricas()['worker'])))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.carga import ejecutar_carga, preparar_datos
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula la hora de almuerzo contra un servidor local y reporta rendimiento por paso. "
+        "El servidor debe usar la misma base de datos; levántalo con LIMITES_ACTIVOS=0 "
+        "para que el límite de solicitudes por IP no rechace a los usuarios virtuales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base', default='http://127.0.0.1:8000', help="URL del servidor a probar.")
+        parser.add_argument('--clientes', type=int, default=20, help="Clientes concurrentes.")
+        parser.add_argument('--proveedores', type=int, default=3, help="Proveedores concurrentes.")
+        parser.add_argument('--duracion', type=float, default=30, help="Segundos de prueba.")
+        parser.add_argument('--rampa', type=float, default=0, help="Segundos para ir sumando usuarios.")
+        parser.add_argument('--semilla', type=int, help="Semilla para repetir la misma secuencia.")
+        parser.add_argument(
+            '--preparar', action='store_true',
+            help="Crea antes los usuarios, platos y menús de prueba (prefijo carga_)."
+        )
+
+    def handle(self, *args, **options):
+        if options['preparar']:
+            preparar_datos(options['clientes'], options['proveedores'])
+            self.stdout.write("Datos de carga listos.")
+
+        try:
+            stats = ejecutar_carga(
+                options['base'], options['clientes'], options['proveedores'],
+                options['duracion'], rampa=options['rampa'], semilla=options['semilla'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        filas, duracion = stats.reporte()
+        total = sum(f['solicitudes'] for f in filas)
+        errores = sum(f['errores'] for f in filas)
+
+        self.stdout.write(
+            f"\n{'Paso':<22}{'Solic.':>8}{'Error %':>9}{'Solic/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for f in filas:
+            self.stdout.write(
+                f"{f['paso']:<22}{f['solicitudes']:>8}{f['error_pct']:>9}{f['rps']:>9}"
+                f"{f['p50']:>9}{f['p95']:>9}{f['p99']:>9}"
+            )
+
+        estilo = self.style.SUCCESS if not errores else self.style.WARNING
+        self.stdout.write(estilo(
+            f"\n{total} solicitudes en {duracion:.1f}s ({total / duracion:.1f}/s), "
+            f"{errores} errores ({100 * errores / total if total else 0:.1f}%)"
+        ))
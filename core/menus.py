@@ -0,0 +1,246 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .franjas import DIAS, liberar_franja, reservar_franja
+from .models import Cliente, ItemMenu, ItemMenuEmpresa, MenuEmpresa, MenuSemanal
+
+
+CAMPOS_ITEM = ['plato', 'hora_colacion', 'fecha_colacion', 'cantidad', 'precio_unitario', 'de_empresa']
+
+# Filas por INSERT al publicar el menú de una empresa
+LOTE_PUBLICACION = 1000
+
+
+class MenuPagado(Exception):
+    """El menú ya se pagó: sus días y su total no se modifican."""
+
+
+class DiaPasado(Exception):
+    """El día ya pasó: su colación no se puede elegir ni cambiar."""
+
+    def __init__(self, dia):
+        super().__init__(dia)
+        self.dia = dia
+
+
+# ---------------------------------------------------------
+# SEMANAS
+# ---------------------------------------------------------
+def lunes_de(fecha):
+    return fecha - timedelta(days=fecha.weekday())
+
+
+def semana_actual():
+    return lunes_de(timezone.localdate())
+
+
+def leer_semana(texto):
+    """'2026-10-21' -> lunes de esa semana; la semana actual si falta o no es una fecha."""
+    try:
+        return lunes_de(date.fromisoformat(texto or ''))
+    except ValueError:
+        return semana_actual()
+
+
+def fecha_del_dia(semana, dia):
+    return semana + timedelta(days=DIAS.index(dia))
+
+
+def menu_de(cliente, semana):
+    menu, _ = MenuSemanal.objects.get_or_create(cliente=cliente, semana=semana)
+    return menu
+
+
+def menu_existente(cliente, semana):
+    """El menú guardado de esa semana o uno vacío sin guardar: mirar una semana no crea filas."""
+    return (
+        MenuSemanal.objects.filter(cliente=cliente, semana=semana).first()
+        or MenuSemanal(cliente=cliente, semana=semana)
+    )
+
+
+def subtotal(item):
+    return item.cantidad * item.precio_unitario if item.plato_id else Decimal(0)
+
+
+def ajustar_totales(menu_id, total, cantidad):
+    """Suma (o resta) a los totales guardados del menú con un UPDATE atómico."""
+    if total or cantidad:
+        MenuSemanal.objects.filter(pk=menu_id).update(
+            total=F('total') + total,
+            cantidad=F('cantidad') + cantidad,
+        )
+
+
+# ---------------------------------------------------------
+# EDICIÓN DE LOS DÍAS
+# ---------------------------------------------------------
+def asignar_dias(menu, cambios):
+    """
+    Aplica `cambios` {dia: (plato, hora, cantidad)} al menú en una transacción
+    (plato None deja el día vacío; hora None toma la primera franja con cupo).
+    Un día así elegido es del cliente: una nueva publicación de la empresa no lo toca.
+
+    Libera la franja anterior de cada día que cambia y reserva la nueva; los
+    items se guardan con un bulk_create y un bulk_update y los totales con un
+    solo UPDATE por la diferencia. Si una franja no tiene cupo se lanza
+    FranjaLlena (DiaPasado si el día ya pasó) y no queda nada aplicado.
+    """
+    with transaction.atomic():
+        # Bloquear el menú serializa las ediciones (y el pago) del mismo menú
+        if MenuSemanal.objects.select_for_update().filter(pk=menu.pk, pagado=True).exists():
+            raise MenuPagado()
+
+        items = {i.dia: i for i in menu.items.select_related('plato')}
+        nuevos, modificados = [], []
+        total, cantidad_total = Decimal(0), 0
+
+        for dia, (plato, hora, cantidad) in cambios.items():
+            item = items.get(dia)
+            if item is None:
+                if plato is None:
+                    continue
+                item = ItemMenu(menu=menu, dia=dia)
+                nuevos.append(item)
+            elif (
+                item.plato_id == (plato.pk if plato else None)
+                and (item.cantidad == cantidad or plato is None)
+                and hora in (None, item.hora_colacion)
+            ):
+                continue
+            else:
+                modificados.append(item)
+
+            fecha = fecha_del_dia(menu.semana, dia)
+            if fecha < timezone.localdate():
+                raise DiaPasado(dia)
+
+            total -= subtotal(item)
+            cantidad_total -= item.cantidad if item.plato_id else 0
+            if item.plato_id:
+                liberar_franja(item.plato.proveedor_id, item.fecha_colacion, item.hora_colacion, item.cantidad)
+
+            item.plato = plato
+            item.cantidad = cantidad
+            item.de_empresa = False
+            if plato:
+                item.hora_colacion = reservar_franja(plato.proveedor, fecha, cantidad, hora)
+                item.fecha_colacion = fecha
+                item.precio_unitario = plato.precio
+                total += subtotal(item)
+                cantidad_total += cantidad
+            else:
+                item.hora_colacion = item.fecha_colacion = None
+                item.precio_unitario = 0
+
+        ItemMenu.objects.bulk_create(nuevos)
+        ItemMenu.objects.bulk_update(modificados, CAMPOS_ITEM)
+        ajustar_totales(menu.pk, total, cantidad_total)
+
+    menu.refresh_from_db(fields=['total', 'cantidad'])
+    return len(nuevos) + len(modificados)
+
+
+def plato_eliminado(plato):
+    """Antes de borrar un plato: sus días en menús sin pagar dejan de sumar (el FK queda en NULL)."""
+    items = ItemMenu.objects.filter(plato=plato, menu__pagado=False)
+    por_menu = items.values('menu_id').annotate(
+        total=Sum(F('cantidad') * F('precio_unitario')),
+        unidades=Sum('cantidad'),
+    ).order_by()
+    for fila in por_menu:
+        ajustar_totales(fila['menu_id'], -fila['total'], -fila['unidades'])
+    items.update(precio_unitario=0)
+
+
+def recalcular_totales(menus):
+    """Recalcula total y cantidad de los menús del queryset `menus` con un solo UPDATE."""
+    items = ItemMenu.objects.filter(menu=OuterRef('pk'), plato__isnull=False).values('menu')
+    menus.update(
+        total=Coalesce(
+            Subquery(items.annotate(s=Sum(F('cantidad') * F('precio_unitario'))).values('s')[:1]),
+            0,
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+        cantidad=Coalesce(Subquery(items.annotate(s=Sum('cantidad')).values('s')[:1]), 0),
+    )
+
+
+# ---------------------------------------------------------
+# MENÚ DE LA EMPRESA
+# ---------------------------------------------------------
+def guardar_menu_empresa(empresa, semana, cambios):
+    """Reemplaza los días del menú de la empresa para `semana` con `cambios` {dia: (plato, hora, cantidad)}."""
+    with transaction.atomic():
+        menu, _ = MenuEmpresa.objects.get_or_create(empresa=empresa, semana=semana)
+        menu.items.all().delete()
+        ItemMenuEmpresa.objects.bulk_create([
+            ItemMenuEmpresa(menu=menu, dia=dia, plato=plato, hora_colacion=hora, cantidad=cantidad)
+            for dia, (plato, hora, cantidad) in cambios.items()
+            if plato
+        ])
+    return menu
+
+
+def publicar(menu_empresa):
+    """
+    Copia el menú de la empresa a los menús de esa semana de todos sus clientes.
+
+    Los días que un cliente eligió él mismo se conservan y los menús pagados no
+    se tocan; lo copiado en una publicación anterior se reemplaza. El número
+    de consultas no depende de cuántos clientes tenga la empresa: los menús
+    que faltan y los días se insertan por lotes, lo anterior se borra con un
+    DELETE y los totales se recalculan con un UPDATE.
+
+    Los días copiados llevan la hora acordada con la empresa pero no ocupan
+    franjas: esa entrega se coordina con la cocina como un solo bloque.
+    Retorna la cantidad de menús actualizados.
+    """
+    semana = menu_empresa.semana
+    hoy = timezone.localdate()
+    # Solo se publican los días que aún no pasan; los ya entregados quedan como estaban
+    futuros = [dia for dia in DIAS if fecha_del_dia(semana, dia) >= hoy]
+    dias = [item for item in menu_empresa.items.select_related('plato') if item.dia in futuros]
+    clientes = Cliente.objects.filter(empresa_id=menu_empresa.empresa_id)
+
+    with transaction.atomic():
+        MenuSemanal.objects.bulk_create(
+            [MenuSemanal(cliente_id=pk, semana=semana) for pk in clientes.values_list('id', flat=True)],
+            batch_size=LOTE_PUBLICACION,
+            ignore_conflicts=True,
+        )
+        menus = MenuSemanal.objects.filter(cliente__in=clientes, semana=semana, pagado=False)
+        # Bloquea los menús: una edición en curso del cliente termina antes (o espera)
+        ids = list(menus.select_for_update().values_list('id', flat=True))
+
+        # Se quitan los días futuros copiados antes; los del cliente (también los que dejó vacíos) se conservan
+        ItemMenu.objects.filter(menu__in=menus, de_empresa=True, dia__in=futuros).delete()
+        propios = set(ItemMenu.objects.filter(menu__in=menus).values_list('menu_id', 'dia'))
+
+        ItemMenu.objects.bulk_create(
+            (
+                ItemMenu(
+                    menu_id=menu_id,
+                    dia=item.dia,
+                    plato=item.plato,
+                    hora_colacion=item.hora_colacion,
+                    cantidad=item.cantidad,
+                    precio_unitario=item.plato.precio,
+                    de_empresa=True,
+                )
+                for menu_id in ids
+                for item in dias
+                if (menu_id, item.dia) not in propios
+            ),
+            batch_size=LOTE_PUBLICACION,
+        )
+        recalcular_totales(menus)
+
+        menu_empresa.publicado_en = timezone.now()
+        menu_empresa.save(update_fields=['publicado_en'])
+    return len(ids)
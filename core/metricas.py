@@ -0,0 +1,129 @@
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+
+# Con varios workers (gunicorn), PROMETHEUS_MULTIPROC_DIR apunta a un
+# directorio compartido y vacío al arrancar: cada proceso escribe sus valores
+# en archivos mmap y /metrics los suma al leerlos. Sin la variable, las
+# métricas viven en la memoria del único proceso.
+MULTIPROCESO = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+BUCKETS_LATENCIA = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+# ---------------------------------------------------------
+# MÉTRICAS
+# ---------------------------------------------------------
+SOLICITUDES = Counter(
+    'saboresgo_http_solicitudes_total', 'Solicitudes HTTP atendidas.', ['vista', 'metodo', 'estado']
+)
+LATENCIA = Histogram(
+    'saboresgo_http_latencia_segundos', 'Latencia de las solicitudes por vista.', ['vista', 'metodo'],
+    buckets=BUCKETS_LATENCIA,
+)
+CONSULTAS = Histogram(
+    'saboresgo_db_consultas_por_solicitud', 'Consultas SQL por solicitud.', ['vista'],
+    buckets=BUCKETS_CONSULTAS,
+)
+TIEMPO_DB = Counter(
+    'saboresgo_db_segundos_total', 'Tiempo acumulado en consultas SQL.', ['vista']
+)
+CACHE = Counter(
+    'saboresgo_cache_lecturas_total', 'Lecturas de caché por uso y resultado.', ['uso', 'resultado']
+)
+RECHAZOS_LIMITE = Counter(
+    'saboresgo_limite_rechazos_total', 'Solicitudes rechazadas con 429 por límite de tasa.', ['limite']
+)
+
+PEDIDOS_CREADOS = Counter('saboresgo_pedidos_creados_total', 'Pedidos agregados al carrito.')
+PEDIDOS_CONFIRMADOS = Counter('saboresgo_pedidos_confirmados_total', 'Pedidos confirmados.')
+PAGOS_CONVENIO = Counter('saboresgo_pagos_convenio_total', 'Menús semanales pagados con saldo de convenio.')
+MONTO_CONVENIO = Counter('saboresgo_pagos_convenio_monto_total', 'Monto pagado con saldo de convenio.')
+CODIGOS_CANJEADOS = Counter('saboresgo_codigos_convenio_canjeados_total', 'Códigos de convenio canjeados.')
+
+
+# ---------------------------------------------------------
+# REGISTRO DESDE EL CÓDIGO
+# ---------------------------------------------------------
+def contar(metrica, n=1):
+    """Incrementa un contador de negocio solo si la transacción en curso se confirma."""
+    transaction.on_commit(lambda: metrica.inc(n))
+
+
+def lectura_cache(uso, acierto):
+    CACHE.labels(uso, 'acierto' if acierto else 'fallo').inc()
+
+
+# ---------------------------------------------------------
+# MIDDLEWARE
+# ---------------------------------------------------------
+class _ContadorConsultas:
+    """execute_wrapper que cuenta consultas y su tiempo durante una solicitud."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.segundos += time.perf_counter() - inicio
+
+
+class MetricasMiddleware:
+    """
+    Mide latencia, estado y consultas SQL por nombre de URL. Va primero en
+    MIDDLEWARE para medir la solicitud completa. Las rutas que no resuelven
+    se agrupan en 'sin_ruta' para no crear una serie por URL desconocida.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = _ContadorConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(contador))
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        vista = match.view_name if match else 'sin_ruta'
+        metodo = request.method if request.method in ('GET', 'POST', 'HEAD') else 'otro'
+
+        SOLICITUDES.labels(vista, metodo, response.status_code).inc()
+        LATENCIA.labels(vista, metodo).observe(duracion)
+        CONSULTAS.labels(vista).observe(contador.consultas)
+        TIEMPO_DB.labels(vista).inc(contador.segundos)
+        return response
+
+
+# ---------------------------------------------------------
+# ENDPOINT
+# ---------------------------------------------------------
+def metricas_view(request):
+    """Exposición en formato Prometheus. Si METRICAS_TOKEN está definido, se exige como Bearer."""
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    if MULTIPROCESO:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return HttpResponse(generate_latest(registro), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_empresaconvenio_ingrediente_plato_ingredientes_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('modificado_en', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
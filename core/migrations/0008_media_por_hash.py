@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:39
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_versioncatalogo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plato',
+            name='imagen',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='platos/'),
+        ),
+        migrations.AlterField(
+            model_name='proveedor',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='logos/'),
+        ),
+    ]
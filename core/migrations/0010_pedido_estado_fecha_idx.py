@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tarea'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'fecha_pedido'], name='core_pedido_estado_848b91_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_pedido_estado_fecha_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='orden_ruta',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Repartidor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('telefono', models.CharField(blank=True, max_length=20)),
+                ('disponible', models.BooleanField(default=True)),
+                ('capacidad', models.PositiveSmallIntegerField(default=8)),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Ruta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distancia_km', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('completada', models.BooleanField(default=False)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rutas', to='core.proveedor')),
+                ('repartidor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='rutas', to='core.repartidor')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='ruta',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pedidos', to='core.ruta'),
+        ),
+    ]
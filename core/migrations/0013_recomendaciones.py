@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_ubicaciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuntoControl',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('fecha', models.DateField(blank=True, null=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CoocurrenciaPlato',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('veces', models.PositiveIntegerField(default=0)),
+                ('plato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.plato')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.plato')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('plato', 'relacionado'), name='coocurrencia_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Recomendacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('puntaje', models.PositiveIntegerField()),
+                ('plato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendaciones', to='core.plato')),
+                ('recomendado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.plato')),
+            ],
+            options={
+                'ordering': ['posicion'],
+                'indexes': [models.Index(fields=['plato', 'posicion'], name='core_recome_plato_i_ce734e_idx')],
+            },
+        ),
+    ]
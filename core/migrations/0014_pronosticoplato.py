@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recomendaciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoPlato',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('unidades', models.PositiveIntegerField()),
+                ('comprometidas', models.PositiveIntegerField(default=0)),
+                ('calculado_en', models.DateTimeField(auto_now=True)),
+                ('plato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pronosticos', to='core.plato')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('plato', 'fecha'), name='pronostico_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_pronosticoplato'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('pedidos', models.PositiveIntegerField(default=0)),
+                ('unidades', models.PositiveIntegerField(default=0)),
+                ('ventas', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.empresaconvenio')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.proveedor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='core_ventad_fecha_a2ab9e_idx'), models.Index(fields=['proveedor', 'fecha'], name='core_ventad_proveed_01e5cd_idx'), models.Index(fields=['empresa', 'fecha'], name='core_ventad_empresa_d0c4a8_idx')],
+            },
+        ),
+    ]
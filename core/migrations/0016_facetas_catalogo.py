@@ -0,0 +1,88 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:58
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Copia de la normalización de core.facetas a la fecha de esta migración:
+# las migraciones no importan código de la app, que puede cambiar después
+def normalizar(texto):
+    return ' '.join(texto.lower().split())[:100]
+
+
+def clave(nombre):
+    # MySQL compara con una intercalación sin mayúsculas ni tildes: 'Ají' = 'aji'
+    texto = unicodedata.normalize('NFKD', nombre)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def separar(texto):
+    vistos = {}
+    for parte in (texto or '').split(','):
+        nombre = normalizar(parte)
+        if nombre and clave(nombre) not in vistos:
+            vistos[clave(nombre)] = nombre
+    return list(vistos.values())
+
+
+def deduplicar_ingredientes(apps, schema_editor):
+    """Deja un solo Ingrediente por nombre normalizado antes de hacerlo único."""
+    Ingrediente = apps.get_model('core', 'Ingrediente')
+
+    conservados = {}
+    sobrantes = []
+    for pk, nombre in Ingrediente.objects.order_by('id').values_list('id', 'nombre'):
+        normalizado = normalizar(nombre)
+        if not normalizado or clave(normalizado) in conservados:
+            sobrantes.append(pk)
+            continue
+        conservados[clave(normalizado)] = pk
+        if normalizado != nombre:
+            Ingrediente.objects.filter(pk=pk).update(nombre=normalizado)
+
+    # Aún nada apunta a Ingrediente (la relación con Plato se crea en esta migración)
+    for i in range(0, len(sobrantes), 1000):
+        Ingrediente.objects.filter(pk__in=sobrantes[i:i + 1000]).delete()
+
+
+def poblar_ingredientes(apps, schema_editor):
+    Plato = apps.get_model('core', 'Plato')
+    Ingrediente = apps.get_model('core', 'Ingrediente')
+    Relacion = Plato.lista_ingredientes.through
+
+    ids = {clave(nombre): pk for pk, nombre in Ingrediente.objects.values_list('id', 'nombre')}
+    relaciones = []
+    for plato_id, texto in Plato.objects.values_list('id', 'ingredientes').iterator():
+        for nombre in separar(texto):
+            if clave(nombre) not in ids:
+                ids[clave(nombre)] = Ingrediente.objects.create(nombre=nombre).id
+            relaciones.append(Relacion(plato_id=plato_id, ingrediente_id=ids[clave(nombre)]))
+    Relacion.objects.bulk_create(relaciones, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_ventadiaria'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicar_ingredientes, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='plato',
+            name='lista_ingredientes',
+            field=models.ManyToManyField(blank=True, related_name='platos', to='core.ingrediente'),
+        ),
+        migrations.AlterField(
+            model_name='ingrediente',
+            name='nombre',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='plato',
+            name='precio',
+            field=models.DecimalField(db_index=True, decimal_places=2, max_digits=8),
+        ),
+        migrations.RunPython(poblar_ingredientes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_facetas_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plato',
+            name='stock_diario',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='StockPlato',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('vendidos', models.PositiveIntegerField(default=0)),
+                ('plato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='core.plato')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('plato', 'fecha'), name='stock_plato_dia_unico')],
+            },
+        ),
+    ]
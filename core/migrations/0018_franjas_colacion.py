@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_stock_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemmenu',
+            name='fecha_colacion',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='hora_colacion',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='capacidad_franja',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='OcupacionFranja',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('hora', models.TimeField()),
+                ('reservados', models.PositiveIntegerField(default=0)),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='franjas', to='core.proveedor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('proveedor', 'fecha', 'hora'), name='ocupacion_franja_unica')],
+            },
+        ),
+    ]
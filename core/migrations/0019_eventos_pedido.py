@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_franjas_colacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TiemposProveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pedidos', models.PositiveIntegerField(default=0)),
+                ('preparando_p50', models.FloatField(null=True)),
+                ('preparando_p90', models.FloatField(null=True)),
+                ('listo_p50', models.FloatField(null=True)),
+                ('listo_p90', models.FloatField(null=True)),
+                ('entregado_p50', models.FloatField(null=True)),
+                ('entregado_p90', models.FloatField(null=True)),
+                ('calculado_en', models.DateTimeField(auto_now=True)),
+                ('proveedor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tiempos', to='core.proveedor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventoPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado_anterior', models.CharField(max_length=20)),
+                ('estado_nuevo', models.CharField(max_length=20)),
+                ('ocurrido_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pedido', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos', to='core.pedido')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_pedidos', to='core.proveedor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ocurrido_en'], name='core_evento_ocurrid_14f112_idx'), models.Index(fields=['proveedor', 'ocurrido_en'], name='core_evento_proveed_25911d_idx')],
+            },
+        ),
+    ]
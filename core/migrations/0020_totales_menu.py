@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:25
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def calcular_totales(apps, schema_editor):
+    ItemMenu = apps.get_model('core', 'ItemMenu')
+    MenuSemanal = apps.get_model('core', 'MenuSemanal')
+    Plato = apps.get_model('core', 'Plato')
+
+    ItemMenu.objects.filter(plato__isnull=False).update(
+        precio_unitario=Subquery(Plato.objects.filter(pk=OuterRef('plato_id')).values('precio')[:1])
+    )
+    items = ItemMenu.objects.filter(menu=OuterRef('pk'), plato__isnull=False).values('menu')
+    MenuSemanal.objects.update(
+        total=Coalesce(
+            Subquery(items.annotate(s=Sum(F('cantidad') * F('precio_unitario'))).values('s')[:1]),
+            0,
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ),
+        cantidad=Coalesce(Subquery(items.annotate(s=Sum('cantidad')).values('s')[:1]), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_eventos_pedido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemmenu',
+            name='precio_unitario',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AddField(
+            model_name='menusemanal',
+            name='cantidad',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_totales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:32
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def asignar_semanas(apps, schema_editor):
+    # Cada menú existente queda en la semana en que se creó. Si un cliente
+    # tiene más de uno en la misma semana, los más antiguos pasan a semanas anteriores
+    MenuSemanal = apps.get_model('core', 'MenuSemanal')
+    usadas = {}
+    menus = list(MenuSemanal.objects.order_by('cliente_id', '-creado_en'))
+    for menu in menus:
+        fecha = timezone.localtime(menu.creado_en).date()
+        semana = fecha - timedelta(days=fecha.weekday())
+        semanas = usadas.setdefault(menu.cliente_id, set())
+        if semana in semanas:
+            semana = min(semanas) - timedelta(days=7)
+        semanas.add(semana)
+        menu.semana = semana
+    MenuSemanal.objects.bulk_update(menus, ['semana'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_totales_menu'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemMenuEmpresa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.CharField(choices=[('lunes', 'Lunes'), ('martes', 'Martes'), ('miercoles', 'Miércoles'), ('jueves', 'Jueves'), ('viernes', 'Viernes'), ('sabado', 'Sábado'), ('domingo', 'Domingo')], max_length=20)),
+                ('hora_colacion', models.TimeField(blank=True, null=True)),
+                ('cantidad', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MenuEmpresa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.DateField()),
+                ('publicado_en', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='itemmenu',
+            name='de_empresa',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='menusemanal',
+            name='semana',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(asignar_semanas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='menusemanal',
+            name='semana',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='menusemanal',
+            constraint=models.UniqueConstraint(fields=('cliente', 'semana'), name='menu_semanal_unico'),
+        ),
+        migrations.AddField(
+            model_name='itemmenuempresa',
+            name='plato',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.plato'),
+        ),
+        migrations.AddField(
+            model_name='menuempresa',
+            name='empresa',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menus', to='core.empresaconvenio'),
+        ),
+        migrations.AddField(
+            model_name='itemmenuempresa',
+            name='menu',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.menuempresa'),
+        ),
+        migrations.AddConstraint(
+            model_name='menuempresa',
+            constraint=models.UniqueConstraint(fields=('empresa', 'semana'), name='menu_empresa_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemmenuempresa',
+            constraint=models.UniqueConstraint(fields=('menu', 'dia'), name='item_menu_empresa_unico'),
+        ),
+    ]
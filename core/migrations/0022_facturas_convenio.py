@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def marcar_pagados(apps, schema_editor):
+    # Menús ya pagados: se facturan a la empresa actual del cliente, en el mes en que se crearon
+    Cliente = apps.get_model('core', 'Cliente')
+    MenuSemanal = apps.get_model('core', 'MenuSemanal')
+    MenuSemanal.objects.filter(pagado=True).update(
+        pagado_en=F('creado_en'),
+        empresa=Subquery(Cliente.objects.filter(pk=OuterRef('cliente_id')).values('empresa_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_menus_por_semana'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacturaConvenio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField()),
+                ('menus', models.PositiveIntegerField(default=0)),
+                ('empleados', models.PositiveIntegerField(default=0)),
+                ('platos', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('generada_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='menusemanal',
+            name='empresa',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='menus_pagados', to='core.empresaconvenio'),
+        ),
+        migrations.AddField(
+            model_name='menusemanal',
+            name='pagado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='menusemanal',
+            index=models.Index(fields=['pagado_en'], name='core_menuse_pagado__2ff647_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menusemanal',
+            index=models.Index(fields=['empresa', 'pagado_en'], name='core_menuse_empresa_d746a2_idx'),
+        ),
+        migrations.AddField(
+            model_name='facturaconvenio',
+            name='empresa',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facturas', to='core.empresaconvenio'),
+        ),
+        migrations.AddConstraint(
+            model_name='facturaconvenio',
+            constraint=models.UniqueConstraint(fields=('empresa', 'periodo'), name='factura_convenio_unica'),
+        ),
+        migrations.RunPython(marcar_pagados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_facturas_convenio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['plato', 'estado', 'fecha_pedido'], name='core_pedido_plato_i_6fd8b4_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .storage import media_storage
 
 
 # ---------------------------------------------------------
@@ -10,10 +13,19 @@ class Proveedor(models.Model):
     empresa = models.CharField(max_length=100, blank=True, null=True)
     descripcion = models.TextField(blank=True, null=True)
     telefono = models.CharField(max_length=20, blank=True, null=True)
-    logo = models.ImageField(upload_to='logos/', blank=True, null=True)
+    logo = models.ImageField(upload_to='logos/', storage=media_storage, blank=True, null=True)
 
     aprobado = models.BooleanField(default=False)
 
+    # Ubicación del local (se geocodifica desde la dirección)
+    direccion = models.CharField(max_length=255, blank=True)
+    latitud = models.FloatField(null=True, blank=True)
+    longitud = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+
+    # Porciones que la cocina despacha por franja de colación (vacío = sin límite)
+    capacidad_franja = models.PositiveIntegerField(null=True, blank=True)
+
     def __str__(self):
         return self.empresa if self.empresa else self.user.username
 
@@ -23,7 +35,7 @@ class Proveedor(models.Model):
 # MODELOS BASE (SIN CAMBIOS)
 # ---------------------------------------------------------
 class Ingrediente(models.Model):
-    nombre = models.CharField(max_length=100)
+    nombre = models.CharField(max_length=100, unique=True)
 
     def __str__(self):
         return self.nombre
@@ -34,8 +46,12 @@ class Plato(models.Model):
     nombre = models.CharField(max_length=150)
     descripcion = models.TextField(blank=True)
     ingredientes = models.CharField(max_length=500)
-    precio = models.DecimalField(max_digits=8, decimal_places=2)
-    imagen = models.ImageField(upload_to='platos/', blank=True, null=True)
+    precio = models.DecimalField(max_digits=8, decimal_places=2, db_index=True)
+    # Ingredientes normalizados (desde `ingredientes`) para filtrar el catálogo
+    lista_ingredientes = models.ManyToManyField(Ingrediente, related_name='platos', blank=True)
+    # Porciones que se pueden vender por día (vacío = sin límite)
+    stock_diario = models.PositiveIntegerField(null=True, blank=True)
+    imagen = models.ImageField(upload_to='platos/', storage=media_storage, blank=True, null=True)
     creado_en = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -75,6 +91,9 @@ class CodigoConvenio(models.Model):
 class Cliente(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     direccion = models.CharField(max_length=255, blank=True)
+    latitud = models.FloatField(null=True, blank=True)
+    longitud = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
 
     empresa = models.ForeignKey(
         EmpresaConvenio,
@@ -110,6 +129,20 @@ class Pedido(models.Model):
     direccion = models.CharField(max_length=255, blank=True)
     confirmado = models.BooleanField(default=False)
     fecha_pedido = models.DateTimeField(auto_now_add=True)
+    # Franja de entrega/retiro reservada en la cocina del proveedor
+    hora_colacion = models.TimeField(null=True, blank=True)
+
+    # Despacho: ruta asignada y posición de la entrega dentro de ella
+    ruta = models.ForeignKey('Ruta', on_delete=models.SET_NULL, null=True, blank=True, related_name='pedidos')
+    orden_ruta = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Listado de pedidos del panel de administración (filtro por estado, orden por fecha)
+            models.Index(fields=['estado', 'fecha_pedido']),
+            # Panel del proveedor: se llega por sus platos y se filtra por estado y día
+            models.Index(fields=['plato', 'estado', 'fecha_pedido']),
+        ]
 
     def total(self):
         return self.plato.precio * self.cantidad
@@ -118,14 +151,60 @@ class Pedido(models.Model):
         return f'Pedido {self.id} - {self.cliente.user.username}'
     
 
+# ---------------------------------------------------------
+# REPARTIDORES Y RUTAS DE DESPACHO
+# ---------------------------------------------------------
+class Repartidor(models.Model):
+    user = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True)
+    nombre = models.CharField(max_length=100)
+    telefono = models.CharField(max_length=20, blank=True)
+    disponible = models.BooleanField(default=True)
+
+    # Máximo de pedidos que lleva en una misma ruta
+    capacidad = models.PositiveSmallIntegerField(default=8)
+
+    def __str__(self):
+        return self.nombre
+
+
+class Ruta(models.Model):
+    repartidor = models.ForeignKey(Repartidor, on_delete=models.PROTECT, related_name='rutas')
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='rutas')
+    distancia_km = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    completada = models.BooleanField(default=False)
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Ruta {self.id} - {self.repartidor}'
+
+
 # ---------------------------------------------------------
 # MENU SEMANAL
 # ---------------------------------------------------------
 class MenuSemanal(models.Model):
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='menus_semanales')
+    # Lunes de la semana del menú (un menú por cliente y semana)
+    semana = models.DateField()
+    # Se mantienen en cada cambio de los días (core.menus): mostrar o pagar el menú no recorre los items
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    cantidad = models.PositiveIntegerField(default=0)
     pagado = models.BooleanField(default=False)
     creado_en = models.DateTimeField(auto_now_add=True)
+    # Pago con saldo del convenio: se factura a esta empresa en el mes de `pagado_en`,
+    # aunque el cliente deje el convenio después
+    pagado_en = models.DateTimeField(null=True, blank=True)
+    empresa = models.ForeignKey(
+        EmpresaConvenio, on_delete=models.SET_NULL, null=True, blank=True, related_name='menus_pagados'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cliente', 'semana'], name='menu_semanal_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['pagado_en']),
+            models.Index(fields=['empresa', 'pagado_en']),
+        ]
 
     def __str__(self):
         return f'Menu Semanal #{self.id} - {self.cliente.user.username}'
@@ -150,8 +229,299 @@ class ItemMenu(models.Model):
     plato = models.ForeignKey(Plato, on_delete=models.SET_NULL, null=True, blank=True)
     dia = models.CharField(max_length=20, choices=DIAS_SEMANA, null=True, blank=True)
     hora_colacion = models.TimeField(null=True, blank=True)
+    # Día en que quedó reservada la franja (para liberarla al cambiar el plato o la hora)
+    fecha_colacion = models.DateField(null=True, blank=True)
     cantidad = models.PositiveIntegerField(default=1)
+    # Precio del plato al elegirlo (lo que suma al total del menú)
+    precio_unitario = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    # Copiado del menú de la empresa: una nueva publicación lo reemplaza, salvo
+    # que el cliente haya elegido el día él mismo
+    de_empresa = models.BooleanField(default=False)
 
     def __str__(self):
         return f'{self.dia} - {self.plato}'
 
+
+# ---------------------------------------------------------
+# MENÚ DE LA EMPRESA (se publica a todos sus clientes)
+# ---------------------------------------------------------
+class MenuEmpresa(models.Model):
+    empresa = models.ForeignKey(EmpresaConvenio, on_delete=models.CASCADE, related_name='menus')
+    semana = models.DateField()
+    publicado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'semana'], name='menu_empresa_unico'),
+        ]
+
+    def __str__(self):
+        return f'Menú {self.empresa} - semana del {self.semana:%d/%m/%Y}'
+
+
+class ItemMenuEmpresa(models.Model):
+    menu = models.ForeignKey(MenuEmpresa, on_delete=models.CASCADE, related_name='items')
+    dia = models.CharField(max_length=20, choices=DIAS_SEMANA)
+    plato = models.ForeignKey(Plato, on_delete=models.CASCADE)
+    hora_colacion = models.TimeField(null=True, blank=True)
+    cantidad = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['menu', 'dia'], name='item_menu_empresa_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.dia} - {self.plato}'
+
+
+# ---------------------------------------------------------
+# FACTURA MENSUAL DEL CONVENIO (resumen; el detalle se genera al descargarlo)
+# ---------------------------------------------------------
+class FacturaConvenio(models.Model):
+    empresa = models.ForeignKey(EmpresaConvenio, on_delete=models.CASCADE, related_name='facturas')
+    # Primer día del mes facturado
+    periodo = models.DateField()
+    menus = models.PositiveIntegerField(default=0)
+    empleados = models.PositiveIntegerField(default=0)
+    platos = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    generada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'periodo'], name='factura_convenio_unica'),
+        ]
+
+    def __str__(self):
+        return f'Factura {self.empresa} - {self.periodo:%m/%Y}'
+
+
+
+# ---------------------------------------------------------
+# VERSIÓN DEL CATÁLOGO (para ETag / Last-Modified de la API)
+# ---------------------------------------------------------
+class VersionCatalogo(models.Model):
+    """Fila única que se incrementa cada vez que cambia un Plato o Proveedor."""
+    version = models.PositiveBigIntegerField(default=1)
+    modificado_en = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def actual(cls):
+        obj, _ = cls.objects.get_or_create(pk=1)
+        return obj
+
+    @classmethod
+    def incrementar(cls):
+        actualizados = cls.objects.filter(pk=1).update(
+            version=models.F('version') + 1,
+            modificado_en=timezone.now()
+        )
+        if not actualizados:
+            cls.objects.get_or_create(pk=1)
+
+    def __str__(self):
+        return f'Catálogo v{self.version}'
+
+
+# ---------------------------------------------------------
+# COLA DE TAREAS EN SEGUNDO PLANO
+# ---------------------------------------------------------
+ESTADO_TAREA = (
+    ('pendiente', 'Pendiente'),
+    ('ejecutando', 'Ejecutando'),
+    ('completada', 'Completada'),
+    ('fallida', 'Fallida'),
+)
+
+class Tarea(models.Model):
+    """Trabajo diferido que ejecuta `manage.py procesar_tareas`."""
+    funcion = models.CharField(max_length=200)
+    argumentos = models.JSONField(default=dict)
+    estado = models.CharField(max_length=20, choices=ESTADO_TAREA, default='pendiente')
+
+    # Solo las tareas activas conservan la clave; así no se duplican
+    clave = models.CharField(max_length=200, unique=True, null=True, blank=True)
+
+    intentos = models.PositiveIntegerField(default=0)
+    max_intentos = models.PositiveIntegerField(default=3)
+    ejecutar_desde = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+
+    creado_en = models.DateTimeField(auto_now_add=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'ejecutar_desde']),
+        ]
+
+    def __str__(self):
+        return f'Tarea {self.id} - {self.funcion} ({self.estado})'
+
+
+# ---------------------------------------------------------
+# PUNTO DE CONTROL DE PROCESOS INCREMENTALES
+# ---------------------------------------------------------
+class PuntoControl(models.Model):
+    """Hasta dónde llegó un proceso batch (p. ej. último día procesado)."""
+    nombre = models.CharField(max_length=100, unique=True)
+    fecha = models.DateField(null=True, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.nombre}: {self.fecha}'
+
+
+# ---------------------------------------------------------
+# RECOMENDACIONES "SE PIDEN JUNTOS"
+# ---------------------------------------------------------
+class CoocurrenciaPlato(models.Model):
+    """Cuántas veces `relacionado` se pidió el mismo día y por el mismo cliente que `plato`."""
+    plato = models.ForeignKey(Plato, on_delete=models.CASCADE, related_name='+')
+    relacionado = models.ForeignKey(Plato, on_delete=models.CASCADE, related_name='+')
+    veces = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plato', 'relacionado'], name='coocurrencia_unica'),
+        ]
+
+
+class Recomendacion(models.Model):
+    """Top-K de platos relacionados, listo para mostrarse con una sola consulta."""
+    plato = models.ForeignKey(Plato, on_delete=models.CASCADE, related_name='recomendaciones')
+    recomendado = models.ForeignKey(Plato, on_delete=models.CASCADE, related_name='+')
+    posicion = models.PositiveSmallIntegerField()
+    puntaje = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['posicion']
+        indexes = [
+            models.Index(fields=['plato', 'posicion']),
+        ]
+
+    def __str__(self):
+        return f'{self.plato_id} → {self.recomendado_id} (#{self.posicion})'
+
+
+# ---------------------------------------------------------
+# PRONÓSTICO DE DEMANDA POR PLATO
+# ---------------------------------------------------------
+class PronosticoPlato(models.Model):
+    """Unidades esperadas de un plato para un día (historial + menús de convenio)."""
+    plato = models.ForeignKey(Plato, on_delete=models.CASCADE, related_name='pronosticos')
+    fecha = models.DateField()
+    unidades = models.PositiveIntegerField()
+    comprometidas = models.PositiveIntegerField(default=0)
+    calculado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plato', 'fecha'], name='pronostico_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.plato_id} {self.fecha}: {self.unidades}'
+
+
+# ---------------------------------------------------------
+# VENTAS PRE-AGREGADAS POR DÍA (gráficos del panel)
+# ---------------------------------------------------------
+class VentaDiaria(models.Model):
+    """Pedidos confirmados de un día, por proveedor y empresa en convenio del cliente."""
+    fecha = models.DateField()
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='+')
+    empresa = models.ForeignKey(EmpresaConvenio, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    pedidos = models.PositiveIntegerField(default=0)
+    unidades = models.PositiveIntegerField(default=0)
+    ventas = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha']),
+            models.Index(fields=['proveedor', 'fecha']),
+            models.Index(fields=['empresa', 'fecha']),
+        ]
+
+    def __str__(self):
+        return f'{self.fecha} {self.proveedor_id}/{self.empresa_id}: {self.ventas}'
+
+
+# ---------------------------------------------------------
+# STOCK DIARIO POR PLATO
+# ---------------------------------------------------------
+class StockPlato(models.Model):
+    """Porciones ya vendidas de un plato en un día; el tope es Plato.stock_diario."""
+    plato = models.ForeignKey(Plato, on_delete=models.CASCADE, related_name='stock')
+    fecha = models.DateField()
+    vendidos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plato', 'fecha'], name='stock_plato_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.plato_id} {self.fecha}: {self.vendidos}'
+
+
+# ---------------------------------------------------------
+# OCUPACIÓN DE FRANJAS DE COLACIÓN
+# ---------------------------------------------------------
+class OcupacionFranja(models.Model):
+    """Porciones reservadas en una franja de un proveedor; el tope es Proveedor.capacidad_franja."""
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='franjas')
+    fecha = models.DateField()
+    hora = models.TimeField()
+    reservados = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['proveedor', 'fecha', 'hora'], name='ocupacion_franja_unica'),
+        ]
+
+    def __str__(self):
+        return f'{self.proveedor_id} {self.fecha} {self.hora:%H:%M}: {self.reservados}'
+
+
+# ---------------------------------------------------------
+# HISTORIAL DE ESTADOS DEL PEDIDO (solo se agregan filas)
+# ---------------------------------------------------------
+class EventoPedido(models.Model):
+    """Un cambio de estado de un pedido; estado_anterior 'carrito' es la confirmación."""
+    # El historial se conserva aunque el pedido se elimine
+    pedido = models.ForeignKey(Pedido, on_delete=models.SET_NULL, null=True, related_name='eventos')
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='eventos_pedidos')
+    estado_anterior = models.CharField(max_length=20)
+    estado_nuevo = models.CharField(max_length=20)
+    ocurrido_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ocurrido_en']),
+            models.Index(fields=['proveedor', 'ocurrido_en']),
+        ]
+
+    def __str__(self):
+        return f'Pedido {self.pedido_id}: {self.estado_anterior} → {self.estado_nuevo}'
+
+
+# ---------------------------------------------------------
+# TIEMPOS DE COCINA POR PROVEEDOR (precalculados desde EventoPedido)
+# ---------------------------------------------------------
+class TiemposProveedor(models.Model):
+    """Percentiles en segundos desde la confirmación hasta cada estado."""
+    proveedor = models.OneToOneField(Proveedor, on_delete=models.CASCADE, related_name='tiempos')
+    pedidos = models.PositiveIntegerField(default=0)
+    preparando_p50 = models.FloatField(null=True)
+    preparando_p90 = models.FloatField(null=True)
+    listo_p50 = models.FloatField(null=True)
+    listo_p90 = models.FloatField(null=True)
+    entregado_p50 = models.FloatField(null=True)
+    entregado_p90 = models.FloatField(null=True)
+    calculado_en = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Tiempos {self.proveedor}'
+
@@ -0,0 +1,208 @@
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .menus import lunes_de
+from .models import DIAS_SEMANA, ItemMenu, Pedido, PronosticoPlato
+from .replicas import usar_replica
+from .ventas import inicio_dia
+
+# numpy se importa dentro de las funciones de cálculo: las vistas solo leen
+# pronósticos ya guardados y no pagan su importación al arrancar el worker
+
+# Semanas de historial que se usan para el pronóstico
+SEMANAS = 8
+
+# Días hacia adelante que se guardan (a partir de mañana)
+DIAS_PRONOSTICO = 7
+
+# Límites del ajuste de tendencia (promedio móvil de 7 días / promedio del período)
+TENDENCIA_MIN = 0.5
+TENDENCIA_MAX = 2.0
+
+# Índice del día de la semana (lunes = 0) según las opciones de ItemMenu.dia
+INDICE_DIA = {clave: i for i, (clave, _) in enumerate(DIAS_SEMANA)}
+
+
+# ---------------------------------------------------------
+# LECTURA DEL HISTORIAL
+# ---------------------------------------------------------
+def historial_diario(inicio, fin):
+    """
+    Unidades confirmadas por (plato, día) entre `inicio` y `fin` (ambos incluidos),
+    en una sola consulta agregada.
+    """
+    return (
+        Pedido.objects.filter(
+            confirmado=True,
+            fecha_pedido__gte=inicio_dia(inicio),
+            fecha_pedido__lt=inicio_dia(fin + timedelta(days=1)),
+        )
+        .annotate(dia=TruncDate('fecha_pedido'))
+        .values_list('plato_id', 'dia')
+        .annotate(unidades=Sum('cantidad'))
+        .order_by()
+    )
+
+
+def compromisos_convenio(fechas):
+    """
+    Unidades comprometidas por (plato, fecha) en los menús semanales pagados
+    de las semanas que cubren `fechas`. Solo se retornan las fechas pedidas.
+    """
+    buscadas = set(fechas)
+    filas = (
+        ItemMenu.objects.filter(
+            menu__pagado=True, menu__semana__in={lunes_de(f) for f in fechas}, plato__isnull=False
+        )
+        .exclude(dia__isnull=True)
+        .values_list('plato_id', 'menu__semana', 'dia')
+        .annotate(unidades=Sum('cantidad'))
+        .order_by()
+    )
+    compromisos = []
+    for plato_id, semana, dia, unidades in filas:
+        fecha = semana + timedelta(days=INDICE_DIA.get(dia, 7))
+        if fecha in buscadas:
+            compromisos.append((plato_id, fecha, unidades))
+    return compromisos
+
+
+# ---------------------------------------------------------
+# CÁLCULO (VECTORIZADO SOBRE TODOS LOS PLATOS)
+# ---------------------------------------------------------
+def pesos_recientes(semanas):
+    """Pesos lineales 1..n normalizados: la semana más reciente pesa más."""
+    import numpy as np
+
+    pesos = np.arange(1, semanas + 1, dtype=float)
+    return pesos / pesos.sum()
+
+
+def pronosticar(matriz, dia_inicio, semanas=SEMANAS):
+    """
+    Pronóstico por día de la semana para cada plato.
+
+    `matriz` es (platos × semanas*7) con las unidades diarias, donde la primera
+    columna corresponde al día de la semana `dia_inicio` (lunes = 0).
+    Retorna una matriz (platos × 7) indexada por día de la semana.
+
+    Cada valor es el promedio ponderado (más peso a las semanas recientes) del
+    mismo día de la semana, ajustado por la tendencia: el promedio móvil de la
+    última semana contra el promedio de todo el período.
+    """
+    import numpy as np
+
+    n = matriz.shape[0]
+    por_semana = matriz.reshape(n, semanas, 7)
+
+    # (platos × 7): estacionalidad semanal con pesos por antigüedad
+    base = np.tensordot(por_semana, pesos_recientes(semanas), axes=([1], [0]))
+
+    promedio = matriz.mean(axis=1)
+    ultima_semana = matriz[:, -7:].mean(axis=1)
+    tendencia = np.divide(ultima_semana, promedio, out=np.ones(n), where=promedio > 0)
+    tendencia = np.clip(tendencia, TENDENCIA_MIN, TENDENCIA_MAX)
+
+    estimado = base * tendencia[:, None]
+
+    # Columna k -> día de la semana (dia_inicio + k) % 7
+    return np.roll(estimado, dia_inicio, axis=1)
+
+
+def _indices(plato_ids):
+    """Plato ids únicos y, para cada id de entrada, su fila en la matriz."""
+    import numpy as np
+
+    return np.unique(np.asarray(plato_ids, dtype=np.int64), return_inverse=True)
+
+
+# ---------------------------------------------------------
+# PROCESO COMPLETO
+# ---------------------------------------------------------
+def calcular_pronosticos(semanas=SEMANAS, dias=DIAS_PRONOSTICO):
+    """
+    Recalcula los pronósticos de todos los platos para los próximos `dias`.
+
+    Retorna un dict con los platos considerados, las filas guardadas y el
+    tiempo de cálculo (sin contar lectura ni escritura).
+    """
+    import numpy as np
+
+    hoy = timezone.localdate()
+    fin = hoy - timedelta(days=1)
+    inicio = fin - timedelta(days=semanas * 7 - 1)
+
+    fechas = [hoy + timedelta(days=i) for i in range(1, dias + 1)]
+
+    # Las lecturas agregadas no necesitan la primaria
+    with usar_replica():
+        historial = list(historial_diario(inicio, fin))
+        compromisos = compromisos_convenio(fechas)
+
+    plato_ids, filas = _indices([p for p, _, _ in historial] + [p for p, _, _ in compromisos])
+    n = len(plato_ids)
+    filas_hist, filas_comp = filas[:len(historial)], filas[len(historial):]
+
+    reloj = time.perf_counter()
+    matriz = np.zeros((n, semanas * 7))
+    if historial:
+        columnas = np.fromiter(((d - inicio).days for _, d, _ in historial), dtype=np.int64, count=len(historial))
+        unidades = np.fromiter((u for _, _, u in historial), dtype=float, count=len(historial))
+        np.add.at(matriz, (filas_hist, columnas), unidades)
+
+    # Comprometidas por fecha pronosticada (columna j = fechas[j])
+    posicion = {f: j for j, f in enumerate(fechas)}
+    comprometidas = np.zeros((n, dias), dtype=np.int64)
+    if compromisos:
+        columnas = np.fromiter((posicion[f] for _, f, _ in compromisos), dtype=np.int64, count=len(compromisos))
+        unidades = np.fromiter((u for _, _, u in compromisos), dtype=np.int64, count=len(compromisos))
+        np.add.at(comprometidas, (filas_comp, columnas), unidades)
+
+    estimado = np.rint(pronosticar(matriz, inicio.weekday(), semanas)).astype(np.int64)
+    total = estimado[:, [f.weekday() for f in fechas]] + comprometidas
+    segundos = time.perf_counter() - reloj
+
+    nuevos = []
+    for j, fecha in enumerate(fechas):
+        for i in np.flatnonzero(total[:, j]):
+            nuevos.append(PronosticoPlato(
+                plato_id=int(plato_ids[i]),
+                fecha=fecha,
+                unidades=int(total[i, j]),
+                comprometidas=int(comprometidas[i, j]),
+            ))
+
+    with transaction.atomic():
+        # Los días pasados ya no sirven y los futuros se reemplazan completos
+        PronosticoPlato.objects.all().delete()
+        PronosticoPlato.objects.bulk_create(nuevos, batch_size=1000)
+
+    return {'platos': n, 'filas': len(nuevos), 'segundos': round(segundos, 4)}
+
+
+def pronostico_proveedor(proveedor, dias=DIAS_PRONOSTICO):
+    """
+    Pronósticos de los platos de un proveedor para los próximos días.
+
+    Retorna (fechas, filas) donde cada fila es {'plato': nombre, 'unidades': [...]}
+    alineada con `fechas`. Una sola consulta.
+    """
+    hoy = timezone.localdate()
+    fechas = [hoy + timedelta(days=i) for i in range(1, dias + 1)]
+    registros = (
+        PronosticoPlato.objects.filter(plato__proveedor=proveedor, fecha__in=fechas)
+        .values_list('plato_id', 'plato__nombre', 'fecha', 'unidades')
+        .order_by('plato__nombre', 'plato_id')
+    )
+
+    posicion = {f: i for i, f in enumerate(fechas)}
+    filas = {}
+    for plato_id, nombre, fecha, unidades in registros:
+        fila = filas.setdefault(plato_id, {'plato': nombre, 'unidades': [0] * dias})
+        fila['unidades'][posicion[fecha]] = unidades
+    return fechas, list(filas.values())
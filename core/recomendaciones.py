@@ -0,0 +1,149 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CoocurrenciaPlato, Pedido, PuntoControl, Recomendacion
+from .ventas import inicio_dia
+
+
+# Recomendaciones guardadas por plato
+TOP_K = 6
+
+# Platos por consulta al reconstruir el top-K
+LOTE_PLATOS = 500
+
+PROCESO = 'recomendaciones'
+
+
+def pares_coocurrentes(desde, hasta):
+    """
+    Cuenta, en una sola consulta agregada, los pares (plato, relacionado)
+    pedidos por el mismo cliente el mismo día entre `desde` (excluido) y
+    `hasta` (incluido). Solo cuentan pedidos confirmados.
+    """
+    # Rango directo sobre fecha_pedido (también en el auto-join); TruncDate solo agrupa por día
+    fin = inicio_dia(hasta + timedelta(days=1))
+    qs = Pedido.objects.filter(confirmado=True, fecha_pedido__lt=fin)
+    pares = {'cliente__pedidos__fecha_pedido__lt': fin}
+    if desde:
+        inicio = inicio_dia(desde + timedelta(days=1))
+        qs = qs.filter(fecha_pedido__gte=inicio)
+        pares['cliente__pedidos__fecha_pedido__gte'] = inicio
+
+    return (
+        qs.annotate(dia=TruncDate('fecha_pedido'))
+        # Auto-join: los otros pedidos confirmados del mismo cliente ese día
+        .filter(
+            cliente__pedidos__confirmado=True,
+            cliente__pedidos__fecha_pedido__date=F('dia'),
+            **pares,
+        )
+        .annotate(relacionado=F('cliente__pedidos__plato_id'))
+        .exclude(relacionado=F('plato_id'))
+        .values('plato_id', 'relacionado')
+        .annotate(veces=Count('id'))
+        .order_by()
+    )
+
+
+def _sumar_conteos(deltas):
+    """Suma los conteos nuevos a la tabla de co-ocurrencias (update + insert en lote)."""
+    platos = {a for a, _ in deltas}
+    existentes = {
+        (c.plato_id, c.relacionado_id): c
+        for c in CoocurrenciaPlato.objects.filter(plato_id__in=platos)
+    }
+
+    actualizar, crear = [], []
+    for (a, b), veces in deltas.items():
+        fila = existentes.get((a, b))
+        if fila:
+            fila.veces += veces
+            actualizar.append(fila)
+        else:
+            crear.append(CoocurrenciaPlato(plato_id=a, relacionado_id=b, veces=veces))
+
+    CoocurrenciaPlato.objects.bulk_update(actualizar, ['veces'], batch_size=1000)
+    CoocurrenciaPlato.objects.bulk_create(crear, batch_size=1000)
+
+
+def _reconstruir_top(platos, k):
+    """Regenera el top-K de los platos indicados a partir de las co-ocurrencias."""
+    platos = sorted(platos)
+    for i in range(0, len(platos), LOTE_PLATOS):
+        lote = platos[i:i + LOTE_PLATOS]
+        filas = (
+            CoocurrenciaPlato.objects.filter(plato_id__in=lote)
+            .order_by('plato_id', '-veces', 'relacionado_id')
+            .values_list('plato_id', 'relacionado_id', 'veces')
+        )
+
+        nuevas = []
+        actual, posicion = None, 0
+        for plato_id, relacionado_id, veces in filas:
+            if plato_id != actual:
+                actual, posicion = plato_id, 0
+            if posicion < k:
+                posicion += 1
+                nuevas.append(Recomendacion(
+                    plato_id=plato_id, recomendado_id=relacionado_id, posicion=posicion, puntaje=veces
+                ))
+
+        Recomendacion.objects.filter(plato_id__in=lote).delete()
+        Recomendacion.objects.bulk_create(nuevas, batch_size=1000)
+
+
+def actualizar_recomendaciones(completo=False, k=TOP_K):
+    """
+    Incorpora los días cerrados (hasta ayer) que aún no se procesaron.
+
+    Con `completo=True` se descartan los conteos y se recalcula todo el
+    historial. Retorna la cantidad de platos cuyo top-K cambió.
+    """
+    hasta = timezone.localdate() - timedelta(days=1)
+
+    with transaction.atomic():
+        punto, _ = PuntoControl.objects.select_for_update().get_or_create(nombre=PROCESO)
+
+        if completo:
+            CoocurrenciaPlato.objects.all().delete()
+            Recomendacion.objects.all().delete()
+            punto.fecha = None
+        elif punto.fecha and punto.fecha >= hasta:
+            return 0
+
+        deltas = {
+            (f['plato_id'], f['relacionado']): f['veces']
+            for f in pares_coocurrentes(punto.fecha, hasta)
+        }
+
+        if deltas:
+            _sumar_conteos(deltas)
+            _reconstruir_top({a for a, _ in deltas}, k)
+
+        punto.fecha = hasta
+        punto.save()
+
+    return len({a for a, _ in deltas})
+
+
+def recomendaciones_para_carrito(plato_ids, limite=4):
+    """Platos recomendados para un carrito, sin repetir los que ya tiene."""
+    vistos = set(plato_ids)
+    resultado = []
+    recs = (
+        Recomendacion.objects.filter(plato_id__in=plato_ids)
+        .exclude(recomendado_id__in=plato_ids)
+        .select_related('recomendado')
+        .order_by('-puntaje', 'posicion')
+    )
+    for rec in recs:
+        if rec.recomendado_id not in vistos:
+            vistos.add(rec.recomendado_id)
+            resultado.append(rec.recomendado)
+            if len(resultado) >= limite:
+                break
+    return resultado
@@ -0,0 +1,131 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Alias de la base de datos de solo lectura en settings.DATABASES
+REPLICA = 'replica'
+
+# Cookie que mantiene al usuario en la primaria después de escribir
+COOKIE_PRIMARIA = 'db_primaria'
+
+
+# ---------------------------------------------------------
+# ESTADO POR HILO (una solicitud o un job a la vez)
+# ---------------------------------------------------------
+class _Estado(threading.local):
+    def __init__(self):
+        # Las lecturas de este hilo pueden ir a la réplica
+        self.leer_replica = False
+        # Hubo una escritura: todo lo que sigue se lee de la primaria
+        self.escribio = False
+
+
+_estado = _Estado()
+
+
+def replica_configurada():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def usar_replica():
+    """
+    Envía a la réplica las lecturas del bloque (reportes, agregados pesados).
+
+    Si el hilo ya escribió, o está dentro de una transacción en la primaria,
+    las lecturas siguen yendo a la primaria para no leer datos atrasados.
+    """
+    anterior = _estado.leer_replica
+    _estado.leer_replica = True
+    try:
+        yield
+    finally:
+        _estado.leer_replica = anterior
+
+
+def primaria(vista):
+    """Marca una vista que escribe aunque se llame por GET: el middleware no la envía a la réplica."""
+    vista.usar_primaria = True
+    return vista
+
+
+def leyendo_replica():
+    """True si las lecturas de este hilo van hoy a la réplica (para conservarlo en un streaming)."""
+    return _estado.leer_replica and not _estado.escribio
+
+
+def reiniciar():
+    _estado.leer_replica = False
+    _estado.escribio = False
+
+
+# ---------------------------------------------------------
+# ROUTER
+# ---------------------------------------------------------
+class RouterReplica:
+    """
+    Escrituras siempre a 'default'. Lecturas a 'replica' solo cuando se
+    pidieron explícitamente (usar_replica o el middleware) y el hilo no ha
+    escrito todavía: así cada usuario lee lo que acaba de escribir.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            # La caché en base de datos (DatabaseCache) se lee siempre de la primaria
+            model._meta.app_label != 'django_cache'
+            and _estado.leer_replica
+            and not _estado.escribio
+            and replica_configurada()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias tienen los mismos datos
+        return True
+
+
+# ---------------------------------------------------------
+# MIDDLEWARE
+# ---------------------------------------------------------
+class ReplicaMiddleware:
+    """
+    Las solicitudes GET/HEAD a las vistas de settings.REPLICA_NAMESPACES
+    (por defecto el panel de administración) leen de la réplica.
+
+    Cuando una solicitud escribe, se deja una cookie por
+    settings.REPLICA_PEGADO_SEGUNDOS (el retraso de replicación tolerado):
+    mientras exista, ese navegador lee todo desde la primaria.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.namespaces = set(getattr(settings, 'REPLICA_NAMESPACES', ['adminpanel']))
+        self.pegado = getattr(settings, 'REPLICA_PEGADO_SEGUNDOS', 5)
+
+    def __call__(self, request):
+        reiniciar()
+        try:
+            response = self.get_response(request)
+            if _estado.escribio:
+                response.set_cookie(COOKIE_PRIMARIA, '1', max_age=self.pegado, httponly=True, samesite='Lax')
+            return response
+        finally:
+            reiniciar()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and COOKIE_PRIMARIA not in request.COOKIES
+            and not getattr(view_func, 'usar_primaria', False)
+            and request.resolver_match.namespace in self.namespaces
+        ):
+            _estado.leer_replica = True
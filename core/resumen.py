@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .metricas import lectura_cache
+from .models import Pedido, Proveedor
+
+
+logger = logging.getLogger(__name__)
+
+CLAVE = 'panel:resumen'
+CLAVE_LOCK = 'panel:resumen:calculando'
+
+# Un resumen más antiguo que esto se sigue mostrando, pero se recalcula en segundo plano
+SEGUNDOS_FRESCO = 60
+
+# Cuánto se guarda en caché (se puede servir atrasado hasta este límite)
+SEGUNDOS_CACHE = 60 * 60
+
+# Tiempo máximo que un cálculo retiene el lock (si el proceso muere, se libera solo)
+SEGUNDOS_LOCK = 120
+
+# Sin resumen en caché: cuánto espera una solicitud a que otra termine de calcularlo
+ESPERA_MAXIMA = 5
+
+
+# ---------------------------------------------------------
+# CÁLCULO (una consulta por tabla)
+# ---------------------------------------------------------
+def calcular_resumen():
+    """Métricas de las tarjetas del panel: una consulta sobre Pedido y una sobre Proveedor."""
+    ahora = timezone.localtime()
+    inicio_dia = ahora.replace(hour=0, minute=0, second=0, microsecond=0)
+    inicio_mes = inicio_dia.replace(day=1)
+    monto = F('plato__precio') * F('cantidad')
+
+    pedidos = Pedido.objects.aggregate(
+        total_pedidos=Count('id'),
+        pedidos_pendientes=Count('id', filter=Q(estado='pendiente')),
+        pedidos_preparando=Count('id', filter=Q(estado='preparando')),
+        pedidos_entregados=Count('id', filter=Q(estado='entregado')),
+        total_clientes=Count('cliente', distinct=True),
+        total_ingresos=Sum(monto, filter=Q(confirmado=True)),
+        ingresos_hoy=Sum(monto, filter=Q(confirmado=True, fecha_pedido__gte=inicio_dia)),
+        ingresos_mes=Sum(monto, filter=Q(confirmado=True, fecha_pedido__gte=inicio_mes)),
+    )
+
+    proveedores = Proveedor.objects.aggregate(
+        total_proveedores=Count('id'),
+        proveedores_aprobados=Count('id', filter=Q(aprobado=True)),
+        proveedores_pendientes=Count('id', filter=Q(aprobado=False)),
+    )
+
+    top_platos = list(
+        Pedido.objects.filter(confirmado=True)
+        .values('plato__nombre')
+        .annotate(total_cantidad=Sum('cantidad'))
+        .order_by('-total_cantidad')[:5]
+    )
+
+    resumen = {**pedidos, **proveedores, 'top_platos': top_platos}
+    for campo in ('total_ingresos', 'ingresos_hoy', 'ingresos_mes'):
+        resumen[campo] = float(resumen[campo] or 0)
+    resumen['calculado_en'] = timezone.now()
+    return resumen
+
+
+def _recalcular():
+    try:
+        resumen = calcular_resumen()
+        cache.set(CLAVE, resumen, SEGUNDOS_CACHE)
+        return resumen
+    finally:
+        cache.delete(CLAVE_LOCK)
+
+
+def _recalcular_en_hilo():
+    # El hilo usa su propia conexión a la base de datos
+    close_old_connections()
+    try:
+        _recalcular()
+    except Exception:
+        logger.exception('No se pudo recalcular el resumen del panel')
+    finally:
+        close_old_connections()
+
+
+# ---------------------------------------------------------
+# LECTURA (stale-while-revalidate)
+# ---------------------------------------------------------
+def obtener_resumen():
+    """
+    Resumen del panel desde la caché.
+
+    Si está atrasado se devuelve igual y se recalcula en un hilo aparte; el
+    lock en caché (cache.add) asegura que, aunque muchos administradores
+    abran el panel a la vez, haya a lo más un cálculo en curso. La garantía
+    vale entre workers porque CACHES es compartida (Redis o la tabla de
+    caché en la base de datos, ver settings); con una caché local por
+    proceso cada worker calcularía y guardaría su propio resumen.
+    """
+    resumen = cache.get(CLAVE)
+    lectura_cache('resumen_panel', resumen is not None)
+
+    if resumen is not None:
+        edad = (timezone.now() - resumen['calculado_en']).total_seconds()
+        if edad > SEGUNDOS_FRESCO and cache.add(CLAVE_LOCK, 1, SEGUNDOS_LOCK):
+            threading.Thread(target=_recalcular_en_hilo, daemon=True).start()
+        return resumen
+
+    # Sin nada que mostrar: calcula uno solo y el resto espera su resultado
+    if cache.add(CLAVE_LOCK, 1, SEGUNDOS_LOCK):
+        return _recalcular()
+
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while time.monotonic() < limite:
+        time.sleep(0.1)
+        resumen = cache.get(CLAVE)
+        if resumen is not None:
+            return resumen
+
+    return calcular_resumen()
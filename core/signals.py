@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Cliente, Pedido, Plato, Proveedor, VersionCatalogo
+from . import autocompletar, menus
+from .facetas import sincronizar_ingredientes
+from .metricas import PEDIDOS_CREADOS, contar
+from .tareas import encolar
+from .ubicaciones import asignar_ubicacion, geocodificar_ubicacion
+
+
+# Mantiene los ingredientes normalizados del plato. Va antes que
+# catalogo_modificado para que las facetas de la nueva versión ya los vean
+@receiver(post_save, sender=Plato)
+def ingredientes_modificados(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'ingredientes' in update_fields:
+        sincronizar_ingredientes([instance])
+
+
+# Cualquier cambio en platos o proveedores invalida el catálogo de la API
+@receiver(post_save, sender=Plato)
+@receiver(post_delete, sender=Plato)
+@receiver(post_save, sender=Proveedor)
+@receiver(post_delete, sender=Proveedor)
+def catalogo_modificado(sender, **kwargs):
+    VersionCatalogo.incrementar()
+
+
+# El índice de autocompletado de este proceso se actualiza al confirmar la
+# transacción; los demás workers lo reconstruyen al ver la nueva versión.
+# Van después de catalogo_modificado: la versión leída ya incluye este cambio
+@receiver(post_save, sender=Plato)
+def autocompletar_plato(sender, instance, **kwargs):
+    version = VersionCatalogo.actual().version
+    transaction.on_commit(lambda: autocompletar.plato_guardado(instance, version))
+
+
+@receiver(post_save, sender=Proveedor)
+def autocompletar_proveedor(sender, instance, **kwargs):
+    version = VersionCatalogo.actual().version
+    transaction.on_commit(lambda: autocompletar.proveedor_guardado(instance, version))
+
+
+@receiver(post_delete, sender=Plato)
+@receiver(post_delete, sender=Proveedor)
+def autocompletar_eliminado(sender, instance, **kwargs):
+    tipo = 'plato' if sender is Plato else 'proveedor'
+    pk = instance.pk
+    version = VersionCatalogo.actual().version
+    transaction.on_commit(lambda: autocompletar.eliminado(tipo, pk, version))
+
+
+# Un plato borrado deja su día del menú sin plato: se descuenta del total
+# guardado antes de que el FK pase a NULL
+@receiver(pre_delete, sender=Plato)
+def plato_en_menus(sender, instance, **kwargs):
+    menus.plato_eliminado(instance)
+
+
+# Si cambia la dirección, las coordenadas quedan obsoletas: se borran y se
+# geocodifica de nuevo en segundo plano
+@receiver(pre_save, sender=Cliente)
+@receiver(pre_save, sender=Proveedor)
+def direccion_modificada(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'direccion' not in update_fields:
+        return
+
+    anterior = None
+    if instance.pk:
+        anterior = sender.objects.filter(pk=instance.pk).values_list('direccion', flat=True).first()
+
+    cambio = anterior != instance.direccion
+    instance._geocodificar = bool(instance.direccion) and (cambio or instance.latitud is None)
+    if cambio:
+        asignar_ubicacion(instance, None)
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Proveedor)
+def geocodificar_direccion(sender, instance, **kwargs):
+    if getattr(instance, '_geocodificar', False):
+        instance._geocodificar = False
+        modelo = sender._meta.label
+        encolar(geocodificar_ubicacion, modelo, instance.pk, clave=f'geocodificar:{modelo}:{instance.pk}')
+
+
+@receiver(post_save, sender=Pedido)
+def pedido_creado(sender, instance, created, **kwargs):
+    if created:
+        contar(PEDIDOS_CREADOS)
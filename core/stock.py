@@ -0,0 +1,81 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import StockPlato
+
+
+class SinStock(Exception):
+    """No quedan porciones suficientes del plato para hoy."""
+
+    def __init__(self, plato, restantes):
+        self.plato = plato
+        self.restantes = restantes
+        super().__init__(f'Quedan {restantes} porciones de {plato.nombre}.')
+
+
+def _fila(plato_id, fecha):
+    """Id de la fila de stock del día, creándola si no existe (el índice único resuelve la carrera)."""
+    fila = StockPlato.objects.filter(plato_id=plato_id, fecha=fecha).values_list('id', flat=True).first()
+    if fila:
+        return fila
+    try:
+        with transaction.atomic():
+            return StockPlato.objects.create(plato_id=plato_id, fecha=fecha).id
+    except IntegrityError:
+        return StockPlato.objects.get(plato_id=plato_id, fecha=fecha).id
+
+
+def reservar(plato, cantidad, fecha=None):
+    """
+    Descuenta `cantidad` porciones del stock del día o lanza SinStock.
+
+    El descuento es un único UPDATE condicional (vendidos + cantidad <= tope):
+    la base de datos decide qué solicitud concurrente gana, sin leer-modificar-
+    escribir en Python ni bloquear la tabla. Los platos sin tope no se tocan.
+    """
+    if cantidad < 1:
+        raise ValueError(f'Cantidad inválida: {cantidad}')
+    tope = plato.stock_diario
+    if tope is None:
+        return
+    fecha = fecha or timezone.localdate()
+
+    fila = _fila(plato.pk, fecha)
+    actualizadas = StockPlato.objects.filter(pk=fila, vendidos__lte=tope - cantidad).update(
+        vendidos=F('vendidos') + cantidad
+    )
+    if not actualizadas:
+        vendidos = StockPlato.objects.filter(pk=fila).values_list('vendidos', flat=True).first() or 0
+        raise SinStock(plato, max(0, tope - vendidos))
+
+
+def liberar(plato_id, cantidad, fecha=None):
+    """Devuelve porciones al stock del día (pedido eliminado o con menos unidades)."""
+    if cantidad < 1:
+        raise ValueError(f'Cantidad inválida: {cantidad}')
+    fecha = fecha or timezone.localdate()
+    StockPlato.objects.filter(plato_id=plato_id, fecha=fecha, vendidos__gte=cantidad).update(
+        vendidos=F('vendidos') - cantidad
+    )
+
+
+def fecha_reserva(pedido):
+    """Día cuyo stock consumió el pedido."""
+    return timezone.localdate(pedido.fecha_pedido)
+
+
+def restantes(platos, fecha=None):
+    """
+    {plato_id: porciones que quedan hoy} para los platos con tope, en una consulta.
+    Los platos sin tope no aparecen.
+    """
+    fecha = fecha or timezone.localdate()
+    con_tope = {p.pk: p.stock_diario for p in platos if p.stock_diario is not None}
+    if not con_tope:
+        return {}
+
+    vendidos = dict(
+        StockPlato.objects.filter(plato_id__in=con_tope, fecha=fecha).values_list('plato_id', 'vendidos')
+    )
+    return {pid: max(0, tope - vendidos.get(pid, 0)) for pid, tope in con_tope.items()}
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.views.static import serve
+
+
+# Largo del hash usado en el nombre (128 bits de sha256)
+LARGO_HASH = 32
+
+# Coincide con rutas ya direccionadas por contenido: carpeta/ab/<hash>.ext
+PATRON_HASH = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{%d}\.[\w]+$' % LARGO_HASH)
+
+
+def hash_contenido(content, bloque=64 * 1024):
+    """sha256 del archivo leído por bloques; deja el puntero al inicio."""
+    h = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(bloque) if hasattr(content, 'chunks') else iter(lambda: content.read(bloque), b''):
+        h.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return h.hexdigest()[:LARGO_HASH]
+
+
+def nombre_por_hash(nombre, digest):
+    """logos/foto.JPG + hash → logos/ab/abcd....jpg"""
+    carpeta = posixpath.dirname(nombre)
+    ext = os.path.splitext(nombre)[1].lower()
+    return posixpath.join(carpeta, digest[:2], f'{digest}{ext}')
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """
+    Guarda los archivos subidos con el hash de su contenido como nombre.
+
+    Dos subidas idénticas terminan en el mismo archivo, y como el contenido de
+    una URL nunca cambia se puede servir con caché inmutable.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = nombre_por_hash(name, hash_contenido(content))
+
+        # Mismo contenido ya guardado: reutilizar el archivo existente
+        if self.exists(name):
+            return name
+
+        # Si dos subidas iguales compiten, la segunda recibe sufijo (inofensivo)
+        return super().save(name, content, max_length=max_length)
+
+
+def media_storage():
+    return HashedMediaStorage()
+
+
+def es_inmutable(path):
+    return bool(PATRON_HASH.search(path))
+
+
+def servir_media(request, path, document_root=None, show_indexes=False):
+    """static.serve con Cache-Control inmutable para archivos con hash."""
+    response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if es_inmutable(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Tarea
+
+
+logger = logging.getLogger(__name__)
+
+# Segundos base del backoff exponencial entre reintentos
+BACKOFF_BASE = 10
+
+# Una tarea "ejecutando" sin latido por más de esto se considera abandonada
+TIMEOUT_EJECUCION = timedelta(minutes=15)
+
+# Cada cuánto una tarea en ejecución renueva su actualizado_en: una tarea larga
+# con su worker vivo nunca se devuelve a la cola
+LATIDO = timedelta(minutes=1)
+
+
+# ---------------------------------------------------------
+# MÉTRICAS EN PROCESO (del worker actual)
+# ---------------------------------------------------------
+class _Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completadas = 0
+        self.fallidas = 0
+        self.reintentos = 0
+        self.segundos = 0.0
+
+    def registrar(self, campo, duracion):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+            self.segundos += duracion
+
+    def como_dict(self):
+        with self._lock:
+            ejecutadas = self.completadas + self.fallidas + self.reintentos
+            return {
+                'completadas': self.completadas,
+                'fallidas': self.fallidas,
+                'reintentos': self.reintentos,
+                'duracion_promedio': round(self.segundos / ejecutadas, 4) if ejecutadas else 0,
+            }
+
+
+metricas_worker = _Metricas()
+
+
+# ---------------------------------------------------------
+# ENCOLAR
+# ---------------------------------------------------------
+def _ruta(funcion):
+    if isinstance(funcion, str):
+        return funcion
+    return f'{funcion.__module__}.{funcion.__qualname__}'
+
+
+def encolar(funcion, *args, clave=None, max_intentos=3, retraso=0, **kwargs):
+    """
+    Deja `funcion(*args, **kwargs)` en la cola y retorna la Tarea.
+
+    Los argumentos deben ser serializables a JSON. Si se entrega `clave` y ya
+    hay una tarea activa con esa clave, se devuelve esa en vez de duplicarla.
+    """
+    datos = {
+        'funcion': _ruta(funcion),
+        'argumentos': {'args': list(args), 'kwargs': kwargs},
+        'clave': clave,
+        'max_intentos': max_intentos,
+        'ejecutar_desde': timezone.now() + timedelta(seconds=retraso),
+    }
+
+    try:
+        with transaction.atomic():
+            return Tarea.objects.create(**datos)
+    except IntegrityError:
+        if clave is None:
+            raise
+        return Tarea.objects.filter(clave=clave).first() or Tarea.objects.create(**datos)
+
+
+# ---------------------------------------------------------
+# EJECUTAR
+# ---------------------------------------------------------
+def _reclamar(tarea):
+    # UPDATE condicional: solo un worker puede pasar la tarea a "ejecutando"
+    return Tarea.objects.filter(pk=tarea.pk, estado='pendiente').update(
+        estado='ejecutando',
+        intentos=tarea.intentos + 1,
+        actualizado_en=timezone.now(),
+    ) == 1
+
+
+def renovar(tarea_id):
+    """Marca la tarea como viva mientras siga en ejecución."""
+    return Tarea.objects.filter(pk=tarea_id, estado='ejecutando').update(actualizado_en=timezone.now())
+
+
+class _Latido:
+    """Hilo que llama a renovar() cada LATIDO mientras dura el bloque `with`."""
+
+    def __init__(self, tarea_id):
+        self.tarea_id = tarea_id
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._latir, name=f'latido-{tarea_id}', daemon=True)
+
+    def _latir(self):
+        try:
+            while not self._fin.wait(LATIDO.total_seconds()):
+                renovar(self.tarea_id)
+        except Exception:
+            logger.exception('No se pudo renovar la tarea %s', self.tarea_id)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._fin.set()
+        self._hilo.join()
+
+
+def ejecutar(tarea):
+    """Reclama y ejecuta una tarea. Retorna False si otro worker la tomó antes."""
+    if not _reclamar(tarea):
+        return False
+    tarea.intentos += 1
+
+    inicio = time.monotonic()
+    try:
+        funcion = import_string(tarea.funcion)
+        with _Latido(tarea.pk):
+            funcion(*tarea.argumentos.get('args', []), **tarea.argumentos.get('kwargs', {}))
+    except Exception:
+        duracion = time.monotonic() - inicio
+        tarea.error = traceback.format_exc()
+
+        if tarea.intentos < tarea.max_intentos:
+            tarea.estado = 'pendiente'
+            tarea.ejecutar_desde = timezone.now() + timedelta(seconds=BACKOFF_BASE * 2 ** (tarea.intentos - 1))
+            metricas_worker.registrar('reintentos', duracion)
+            logger.warning('Tarea %s falló (intento %s), se reintentará', tarea.pk, tarea.intentos)
+        else:
+            tarea.estado = 'fallida'
+            tarea.clave = None
+            metricas_worker.registrar('fallidas', duracion)
+            logger.error('Tarea %s falló definitivamente', tarea.pk)
+
+        tarea.save(update_fields=['estado', 'ejecutar_desde', 'error', 'clave', 'actualizado_en'])
+        return True
+
+    tarea.estado = 'completada'
+    tarea.clave = None
+    tarea.error = ''
+    tarea.save(update_fields=['estado', 'error', 'clave', 'actualizado_en'])
+    metricas_worker.registrar('completadas', time.monotonic() - inicio)
+    return True
+
+
+def pendientes(limite):
+    """Tareas listas para ejecutarse, más antiguas primero."""
+    return list(
+        Tarea.objects.filter(estado='pendiente', ejecutar_desde__lte=timezone.now())
+        .order_by('ejecutar_desde', 'id')[:limite]
+    )
+
+
+def liberar_abandonadas():
+    """Devuelve a la cola las tareas sin latido por TIMEOUT_EJECUCION (su worker murió)."""
+    limite = timezone.now() - TIMEOUT_EJECUCION
+    return Tarea.objects.filter(estado='ejecutando', actualizado_en__lt=limite).update(
+        estado='pendiente',
+        ejecutar_desde=timezone.now(),
+    )
+
+
+def ejecutar_en_hilo(tarea):
+    # Cada hilo del pool usa su propia conexión a la base de datos
+    close_old_connections()
+    try:
+        return ejecutar(tarea)
+    finally:
+        close_old_connections()
+
+
+def metricas():
+    """Conteo de tareas por estado (una consulta) más los contadores del worker."""
+    por_estado = dict(
+        Tarea.objects.values_list('estado').annotate(total=Count('id')).order_by()
+    )
+    atrasadas = Tarea.objects.filter(estado='pendiente', ejecutar_desde__lte=timezone.now()).order_by(
+        'ejecutar_desde'
+    ).values_list('ejecutar_desde', flat=True).first()
+
+    return {
+        'por_estado': {estado: por_estado.get(estado, 0) for estado, _ in Tarea._meta.get_field('estado').choices},
+        'espera_maxima_segundos': round((timezone.now() - atrasadas).total_seconds(), 1) if atrasadas else 0,
+        'worker': metricas_worker.como_dict(),
+    }
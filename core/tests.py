@@ -1,3 +1,1290 @@
-from django.test import TestCase
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import date, datetime, time as hora, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from . import autocompletar, importacion, resumen
+from .arranque import PASOS, calentar
+from .autocompletar import IndicePrefijos
+from .despacho import Parada, completar_ruta, despachar, dos_opt, longitud_ruta
+from .eventos import CARRITO, calcular_tiempos, registrar
+from .facetas import leer_filtros, obtener_facetas, separar_ingredientes
+from .facturacion import facturar, filas_detalle, filas_empleados
+from .franjas import DIAS, FranjaLlena, disponibilidad, liberar_franja, reservar_franja
+from .geo import GeocoderLocal, celdas_vecinas, geohash, precision_para_radio, tamano_celda
+from .limites import LimitadorCache, LimitadorMemoria, get_limitador
+from .menus import MenuPagado, asignar_dias, guardar_menu_empresa, lunes_de, menu_de, publicar, semana_actual
+from .models import (
+    Cliente, EmpresaConvenio, EventoPedido, FacturaConvenio, Ingrediente, ItemMenu, MenuSemanal, OcupacionFranja,
+    Pedido, Plato, PronosticoPlato, Proveedor, Recomendacion, Repartidor, Ruta, StockPlato, Tarea, TiemposProveedor,
+    VentaDiaria, VersionCatalogo,
+)
+from .pronosticos import SEMANAS, TENDENCIA_MAX, calcular_pronosticos, pronosticar
+from .recomendaciones import actualizar_recomendaciones, recomendaciones_para_carrito
+from .replicas import COOKIE_PRIMARIA, ReplicaMiddleware, RouterReplica, leyendo_replica, reiniciar, usar_replica
+from .resumen import SEGUNDOS_FRESCO, calcular_resumen, obtener_resumen
+from .stock import SinStock, liberar, reservar, restantes
+from .storage import HashedMediaStorage, es_inmutable
+from .tareas import BACKOFF_BASE, TIMEOUT_EJECUCION, ejecutar, encolar, liberar_abandonadas, renovar
+from .ubicaciones import RADIO_KM, proveedores_cercanos
+from .ventas import actualizar_ventas_diarias, serie_ventas
+from .views import PROVEEDORES_POR_TANDA
+
+
+def tarea_que_falla():
+    raise ValueError('falla de prueba')
+
+
+def _crear_plato(stock_diario):
+    user = User.objects.create(username=f'proveedor{User.objects.count()}')
+    proveedor = Proveedor.objects.create(user=user, empresa='Cocina', aprobado=True)
+    return Plato.objects.create(
+        proveedor=proveedor, nombre='Cazuela', ingredientes='zapallo', precio=4500, stock_diario=stock_diario
+    )
+
+
+class StockPlatoTests(TestCase):
+    def test_sin_tope_no_descuenta(self):
+        plato = _crear_plato(None)
+        reservar(plato, 50)
+        self.assertFalse(StockPlato.objects.exists())
+        self.assertEqual(restantes([plato]), {})
+
+    def test_reservar_hasta_agotar(self):
+        plato = _crear_plato(3)
+        reservar(plato, 2)
+        with self.assertRaises(SinStock) as ctx:
+            reservar(plato, 2)
+        self.assertEqual(ctx.exception.restantes, 1)
+        reservar(plato, 1)
+        self.assertEqual(restantes([plato]), {plato.pk: 0})
+
+    def test_liberar_devuelve_porciones(self):
+        plato = _crear_plato(2)
+        reservar(plato, 2)
+        liberar(plato.pk, 1)
+        self.assertEqual(restantes([plato]), {plato.pk: 1})
+        # Nunca queda en negativo
+        liberar(plato.pk, 5)
+        self.assertEqual(StockPlato.objects.get(plato=plato).vendidos, 1)
+
+    def test_cantidad_no_positiva(self):
+        plato = _crear_plato(2)
+        for cantidad in (0, -2):
+            with self.assertRaises(ValueError):
+                reservar(plato, cantidad)
+        self.assertEqual(restantes([plato]), {plato.pk: 2})
+
+    def test_pedido_rapido_rechaza_cantidad_invalida(self):
+        plato = _crear_plato(2)
+        user = User.objects.create(username='cliente')
+        Cliente.objects.create(user=user)
+        self.client.force_login(user)
+        for cantidad in ('-2', '0', 'dos'):
+            respuesta = self.client.post(reverse('core:pedido_rapido', args=[plato.pk]), {'cantidad': cantidad})
+            self.assertRedirects(
+                respuesta, reverse('core:plato_detalle', args=[plato.pk]), fetch_redirect_response=False
+            )
+        self.assertFalse(Pedido.objects.exists())
+        self.assertEqual(restantes([plato]), {plato.pk: 2})
+
+    def _cliente(self, nombre):
+        user = User.objects.create(username=nombre)
+        Cliente.objects.create(user=user)
+        self.client.force_login(user)
+        return user
+
+    def _confirmar(self):
+        return self.client.post(reverse('core:pedido_list'), {'confirmar_carrito': '1'}, follow=True)
+
+    def test_el_carrito_reserva_al_confirmar(self):
+        plato = _crear_plato(2)
+        for nombre in ('ana', 'beto'):
+            self._cliente(nombre)
+            self.client.post(reverse('core:pedido_rapido', args=[plato.pk]), {'cantidad': 2})
+        # Dos carritos con las mismas porciones: ninguno las retiene
+        self.assertEqual(Pedido.objects.count(), 2)
+        self.assertEqual(restantes([plato]), {plato.pk: 2})
+
+        self.client.force_login(User.objects.get(username='ana'))
+        self._confirmar()
+        self.assertEqual(restantes([plato]), {plato.pk: 0})
+
+        self.client.force_login(User.objects.get(username='beto'))
+        self.assertContains(self._confirmar(), 'se agotó por hoy')
+        self.assertEqual(
+            list(Pedido.objects.order_by('id').values_list('cliente__user__username', 'confirmado')),
+            [('ana', True), ('beto', False)],
+        )
+
+    def test_doble_envio_confirma_una_vez(self):
+        plato = _crear_plato(4)
+        self._cliente('ana')
+        self.client.post(reverse('core:pedido_rapido', args=[plato.pk]), {'cantidad': 2})
+        confirmados = REGISTRY.get_sample_value('saboresgo_pedidos_confirmados_total') or 0
+        with self.captureOnCommitCallbacks(execute=True):
+            self._confirmar()
+            self._confirmar()
+        self.assertEqual(REGISTRY.get_sample_value('saboresgo_pedidos_confirmados_total'), confirmados + 1)
+        self.assertEqual(EventoPedido.objects.filter(estado_anterior=CARRITO).count(), 1)
+        self.assertEqual(restantes([plato]), {plato.pk: 2})
+
+    def test_eliminar_devuelve_solo_lo_que_sigue_reservado(self):
+        plato = _crear_plato(4)
+        user = self._cliente('ana')
+        url = reverse('core:pedido_rapido', args=[plato.pk])
+        self.client.post(url, {'cantidad': 2})
+        self._confirmar()
+        self.client.post(url, {'cantidad': 1})
+        self._confirmar()
+        self.client.post(url, {'cantidad': 1})
+        a, b, carrito = Pedido.objects.order_by('id')
+        self.assertEqual(restantes([plato]), {plato.pk: 1})
+
+        def eliminar(pedido):
+            self.client.post(reverse('core:pedido_delete', args=[pedido.pk]))
+
+        Pedido.objects.filter(pk=b.pk).update(estado='entregado')
+        eliminar(b)
+        eliminar(carrito)
+        self.assertEqual(restantes([plato]), {plato.pk: 1})
+        eliminar(a)
+        self.assertEqual(restantes([plato]), {plato.pk: 3})
+
+        # Un pedido de ayer no devuelve porciones a ningún día
+        ayer = timezone.localdate() - timedelta(days=1)
+        StockPlato.objects.create(plato=plato, fecha=ayer, vendidos=1)
+        viejo = Pedido.objects.create(cliente=user.cliente, plato=plato, confirmado=True)
+        Pedido.objects.filter(pk=viejo.pk).update(fecha_pedido=timezone.now() - timedelta(days=1))
+        eliminar(viejo)
+        self.assertEqual(StockPlato.objects.get(plato=plato, fecha=ayer).vendidos, 1)
+        self.assertEqual(restantes([plato]), {plato.pk: 3})
+
+
+class FranjaColacionTests(TestCase):
+    def setUp(self):
+        self.proveedor = _crear_plato(None).proveedor
+        self.proveedor.capacidad_franja = 4
+        self.proveedor.save()
+        self.manana = timezone.localdate() + timedelta(days=1)
+
+    def test_sin_hora_reparte_en_las_siguientes_franjas(self):
+        horas = [reservar_franja(self.proveedor, self.manana, 2) for _ in range(3)]
+        self.assertEqual(horas, [hora(12, 0), hora(12, 0), hora(12, 15)])
+
+        libres = dict(disponibilidad([self.proveedor], self.manana)[self.proveedor.pk])
+        self.assertEqual(libres[hora(12, 0)], 0)
+        self.assertEqual(libres[hora(12, 15)], 2)
+
+    def test_franja_elegida_llena(self):
+        reservar_franja(self.proveedor, self.manana, 3, hora(13, 0))
+        with self.assertRaises(FranjaLlena):
+            reservar_franja(self.proveedor, self.manana, 2, hora(13, 0))
+
+        liberar_franja(self.proveedor.pk, self.manana, hora(13, 0), 3)
+        reservar_franja(self.proveedor, self.manana, 2, hora(13, 0))
+        self.assertEqual(OcupacionFranja.objects.get(hora=hora(13, 0)).reservados, 2)
+
+    def test_cantidad_no_positiva_no_libera_cupo(self):
+        reservar_franja(self.proveedor, self.manana, 4, hora(13, 0))
+        with self.assertRaises(ValueError):
+            reservar_franja(self.proveedor, self.manana, -2, hora(13, 0))
+        with self.assertRaises(ValueError):
+            liberar_franja(self.proveedor.pk, self.manana, hora(13, 0), 0)
+        self.assertEqual(OcupacionFranja.objects.get(hora=hora(13, 0)).reservados, 4)
+
+
+class MenuSemanalTotalesTests(TestCase):
+    def setUp(self):
+        self.cazuela = _crear_plato(None)
+        self.cazuela.proveedor.capacidad_franja = 10
+        self.cazuela.proveedor.save()
+        self.pastel = Plato.objects.create(
+            proveedor=self.cazuela.proveedor, nombre='Pastel', ingredientes='choclo', precio=5500
+        )
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        # La semana siguiente: ningún día ya pasó
+        self.menu = MenuSemanal.objects.create(cliente=cliente, semana=semana_actual() + timedelta(days=7))
+        # Días que no son hoy: sus franjas siempre están vigentes
+        hoy = timezone.localdate().weekday()
+        self.dias = [DIAS[(hoy + i) % 7] for i in (1, 2, 3)]
+
+    def _esperado(self):
+        items = self.menu.items.filter(plato__isnull=False)
+        return sum(i.cantidad * i.precio_unitario for i in items), sum(i.cantidad for i in items)
+
+    def test_totales_se_mantienen_en_cada_cambio(self):
+        a, b, c = self.dias
+        asignar_dias(self.menu, {a: (self.cazuela, None, 2), b: (self.pastel, None, 1), c: (self.cazuela, None, 1)})
+        self.assertEqual((self.menu.total, self.menu.cantidad), (4500 * 3 + 5500, 4))
+
+        asignar_dias(self.menu, {a: (self.pastel, None, 1), c: (None, None, 1)})
+        self.assertEqual((self.menu.total, self.menu.cantidad), (11000, 2))
+        self.assertEqual((self.menu.total, self.menu.cantidad), self._esperado())
+        self.assertEqual(sum(OcupacionFranja.objects.values_list('reservados', flat=True)), 2)
+
+        self.pastel.delete()
+        self.menu.refresh_from_db()
+        self.assertEqual((self.menu.total, self.menu.cantidad), (0, 0))
+
+    def test_menu_pagado_no_se_modifica(self):
+        MenuSemanal.objects.filter(pk=self.menu.pk).update(pagado=True)
+        with self.assertRaises(MenuPagado):
+            asignar_dias(self.menu, {self.dias[0]: (self.cazuela, None, 1)})
+
+
+class MenuEmpresaTests(TestCase):
+    def setUp(self):
+        self.cazuela = _crear_plato(None)
+        self.pastel = Plato.objects.create(
+            proveedor=self.cazuela.proveedor, nombre='Pastel', ingredientes='choclo', precio=5500
+        )
+        self.empresa = EmpresaConvenio.objects.create(nombre='Constructora', saldo_mensual=100000)
+        self.semana = semana_actual() + timedelta(days=7)
+        self.empleados = [
+            Cliente.objects.create(user=User.objects.create(username=f'empleado{i}'), empresa=self.empresa)
+            for i in range(3)
+        ]
+
+    def _dias(self, menu):
+        return dict(menu.items.values_list('dia', 'plato_id'))
+
+    def test_publicar_respeta_elecciones_propias_y_menus_pagados(self):
+        propio = menu_de(self.empleados[0], self.semana)
+        asignar_dias(propio, {'martes': (self.pastel, None, 2)})
+        pagado = menu_de(self.empleados[1], self.semana)
+        MenuSemanal.objects.filter(pk=pagado.pk).update(pagado=True)
+
+        menu = guardar_menu_empresa(self.empresa, self.semana, {
+            'lunes': (self.cazuela, hora(13, 0), 1), 'martes': (self.cazuela, hora(13, 0), 1),
+        })
+        self.assertEqual(publicar(menu), 2)
+
+        propio.refresh_from_db()
+        self.assertEqual(self._dias(propio), {'lunes': self.cazuela.pk, 'martes': self.pastel.pk})
+        self.assertEqual((propio.total, propio.cantidad), (4500 + 5500 * 2, 3))
+        self.assertEqual(self._dias(pagado), {})
+        nuevo = MenuSemanal.objects.get(cliente=self.empleados[2], semana=self.semana)
+        self.assertEqual((nuevo.total, nuevo.cantidad), (9000, 2))
+
+        # Republicar reemplaza solo los días copiados
+        menu = guardar_menu_empresa(self.empresa, self.semana, {'lunes': (self.pastel, None, 1)})
+        publicar(menu)
+        nuevo.refresh_from_db()
+        self.assertEqual(self._dias(nuevo), {'lunes': self.pastel.pk})
+        self.assertEqual((nuevo.total, nuevo.cantidad), (5500, 1))
+
+    def test_republicar_conserva_los_dias_pasados(self):
+        dias = {dia: (self.cazuela, None, 1) for dia in ('lunes', 'martes', 'miercoles')}
+        with mock.patch('django.utils.timezone.localdate', return_value=self.semana):
+            publicar(guardar_menu_empresa(self.empresa, self.semana, dias))
+
+        # El miércoles se republica cambiando el lunes (ya pasó) y el miércoles
+        dias.update(lunes=(self.pastel, None, 1), miercoles=(self.pastel, None, 1))
+        with mock.patch('django.utils.timezone.localdate', return_value=self.semana + timedelta(days=2)):
+            publicar(guardar_menu_empresa(self.empresa, self.semana, dias))
+
+        menu = MenuSemanal.objects.get(cliente=self.empleados[0], semana=self.semana)
+        self.assertEqual(self._dias(menu), {
+            'lunes': self.cazuela.pk, 'martes': self.cazuela.pk, 'miercoles': self.pastel.pk,
+        })
+        self.assertEqual((menu.total, menu.cantidad), (4500 * 2 + 5500, 3))
+
+    def test_pagar_dos_semanas_sin_saldo_para_ambas(self):
+        cliente = self.empleados[0]
+        Cliente.objects.filter(pk=cliente.pk).update(saldo=5000)
+        menus = [
+            MenuSemanal.objects.create(
+                cliente=cliente, semana=self.semana + timedelta(days=7 * i), total=4500, cantidad=1
+            )
+            for i in range(2)
+        ]
+        self.client.force_login(cliente.user)
+        for menu in menus:
+            self.client.post(reverse('core:pagar_menu', args=[menu.pk]))
+
+        cliente.refresh_from_db()
+        self.assertEqual(cliente.saldo, 500)
+        pagados = MenuSemanal.objects.filter(pk__in=[m.pk for m in menus]).order_by('semana')
+        self.assertEqual([m.pagado for m in pagados], [True, False])
+
+    def test_un_menu_por_semana(self):
+        cliente = self.empleados[0]
+        self.assertEqual(menu_de(cliente, self.semana), menu_de(cliente, self.semana))
+        self.assertNotEqual(menu_de(cliente, self.semana), menu_de(cliente, semana_actual()))
+
+    def test_mirar_una_semana_no_crea_el_menu(self):
+        cliente = self.empleados[0]
+        self.client.force_login(cliente.user)
+        lejana = self.semana + timedelta(days=7 * 52)
+        vistas = [
+            reverse('core:menu_semanal'),
+            reverse('core:menu_semanal_select', args=['lunes']),
+            reverse('core:menu_semanal_editar'),
+        ]
+        for url in vistas:
+            respuesta = self.client.get(url, {'semana': lejana.isoformat()})
+            self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(MenuSemanal.objects.filter(cliente=cliente).exists())
+
+        self.client.post(f"{vistas[1]}?semana={lejana.isoformat()}", {'plato_id': self.cazuela.pk})
+        menu = MenuSemanal.objects.get(cliente=cliente, semana=lejana)
+        self.assertEqual((menu.total, menu.cantidad), (4500, 1))
+
+
+class FacturacionConvenioTests(TestCase):
+    def setUp(self):
+        self.plato = _crear_plato(None)
+        self.empresa = EmpresaConvenio.objects.create(nombre='Constructora', saldo_mensual=100000)
+        self.periodo = date(2026, 9, 1)
+
+    def _menu_pagado(self, cliente, semana, pagado_en, cantidad):
+        menu = MenuSemanal.objects.create(
+            cliente=cliente, semana=semana, pagado=True, empresa=self.empresa,
+            pagado_en=timezone.make_aware(pagado_en), total=4500 * cantidad, cantidad=cantidad,
+        )
+        ItemMenu.objects.create(menu=menu, plato=self.plato, dia='lunes', cantidad=cantidad, precio_unitario=4500)
+        return menu
+
+    def test_factura_del_mes_y_reportes(self):
+        ana, beto = (
+            Cliente.objects.create(user=User.objects.create(username=nombre), empresa=self.empresa)
+            for nombre in ('ana', 'beto')
+        )
+        self._menu_pagado(ana, date(2026, 9, 7), datetime(2026, 9, 4, 12), 2)
+        self._menu_pagado(ana, date(2026, 9, 14), datetime(2026, 9, 11, 12), 1)
+        self._menu_pagado(beto, date(2026, 9, 28), datetime(2026, 9, 30, 23), 1)
+        # Pagado en octubre y sin pagar: no entran
+        self._menu_pagado(beto, date(2026, 10, 5), datetime(2026, 10, 1, 9), 3)
+        MenuSemanal.objects.create(cliente=ana, semana=date(2026, 9, 21), total=9000, cantidad=2)
+        # Un empleado que deja el convenio se sigue facturando a la empresa con que pagó
+        Cliente.objects.filter(pk=beto.pk).update(empresa=None)
+
+        facturar(self.periodo)
+        factura = FacturaConvenio.objects.get(empresa=self.empresa, periodo=self.periodo)
+        self.assertEqual((factura.empleados, factura.menus, factura.platos, factura.total), (2, 3, 4, 18000))
+
+        detalle = list(filas_detalle(factura))[1:]
+        self.assertEqual(len(detalle), 3)
+        self.assertEqual(sum(fila[-1] for fila in detalle), factura.total)
+        empleados = list(filas_empleados(factura))[1:]
+        self.assertEqual([(f[0], f[2], f[4]) for f in empleados], [('ana', 2, 13500), ('beto', 1, 4500)])
+
+        # Regenerar el mes no duplica la factura
+        facturar(self.periodo)
+        self.assertEqual(FacturaConvenio.objects.filter(periodo=self.periodo).count(), 1)
+
+    def test_csv_en_streaming_lee_de_la_replica_y_abre_con_bom(self):
+        ana = Cliente.objects.create(user=User.objects.create(username='ana'), empresa=self.empresa)
+        self._menu_pagado(ana, date(2026, 9, 7), datetime(2026, 9, 4, 12), 2)
+        facturar(self.periodo)
+        factura = FacturaConvenio.objects.get(empresa=self.empresa)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.cl', 'x'))
+
+        en_replica = []
+
+        def filas(factura):
+            # Se consume después de que la vista retornó y el middleware reinició el ruteo
+            en_replica.append(leyendo_replica())
+            yield ['menú', 'Ñuñoa']
+
+        with mock.patch.dict('adminpanel.views.REPORTES_FACTURA', {'detalle': filas}):
+            respuesta = self.client.get(reverse('adminpanel:factura_csv', args=[factura.pk]))
+            contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+        self.assertEqual(en_replica, [True])
+        self.assertEqual(contenido, '\ufeffmenú,Ñuñoa\r\n')
+
+
+class CompromisosConvenioTests(TestCase):
+    def test_menus_pagados_por_semana_del_pronostico(self):
+        plato = _crear_plato(None)
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        manana = timezone.localdate() + timedelta(days=1)
+        dia = DIAS[manana.weekday()]
+        for semana, cantidad in ((lunes_de(manana), 3), (lunes_de(manana) + timedelta(days=21), 5)):
+            menu = MenuSemanal.objects.create(cliente=cliente, semana=semana, pagado=True)
+            ItemMenu.objects.create(menu=menu, plato=plato, dia=dia, cantidad=cantidad, precio_unitario=4500)
+
+        calcular_pronosticos()
+        # Solo cuenta el menú de la semana de mañana; el de tres semanas después no
+        self.assertEqual(
+            list(PronosticoPlato.objects.filter(plato=plato).values_list('fecha', 'comprometidas')),
+            [(manana, 3)],
+        )
+
+
+class LimitesTests(TestCase):
+    def setUp(self):
+        get_limitador.cache_clear()
+        self.addCleanup(get_limitador.cache_clear)
+
+    def test_balde_se_vacia_y_se_recarga(self):
+        limitador = LimitadorMemoria()
+        with mock.patch('core.limites.time.monotonic', return_value=100.0) as reloj:
+            self.assertEqual([limitador.consumir('k', 0.5, 2)[0] for _ in range(3)], [True, True, False])
+            self.assertEqual(limitador.consumir('k', 0.5, 2), (False, 2))
+            reloj.return_value = 102.0
+            self.assertEqual(limitador.consumir('k', 0.5, 2), (True, 0))
+
+    def test_cookie_de_sesion_inventada_no_da_balde_nuevo(self):
+        plato = _crear_plato(None)
+        url = reverse('core:pedido_rapido', args=[plato.pk])
+        codigos = []
+        for i in range(21):
+            self.client.cookies['sessionid'] = f'inventada{i}'
+            codigos.append(self.client.post(url, {'cantidad': 1}).status_code)
+        self.assertEqual(codigos[-1], 429)
+        self.assertNotIn(429, codigos[:20])
+
+    def test_usuario_autenticado_por_id(self):
+        plato = _crear_plato(None)
+        user = User.objects.create(username='cliente')
+        Cliente.objects.create(user=user)
+        self.client.force_login(user)
+        url = reverse('core:pedido_rapido', args=[plato.pk])
+        codigos = [self.client.post(url, {'cantidad': 1}).status_code for _ in range(21)]
+        self.assertEqual(codigos.count(429), 1)
+        # Otra sesión del mismo usuario comparte el balde
+        self.client.force_login(user)
+        self.assertEqual(self.client.post(url, {'cantidad': 1}).status_code, 429)
+
+
+    @override_settings(
+        LIMITADOR='core.limites.LimitadorCache', PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+    )
+    def test_balde_en_cache_compartido_entre_workers(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        workers = [LimitadorCache(), LimitadorCache()]
+        # Solo el reloj de core.limites: la caché calcula sus vencimientos con el real
+        with mock.patch('core.limites.time') as reloj:
+            reloj.time.return_value = 100.0
+            self.assertEqual([workers[i % 2].consumir('k', 0.5, 3)[0] for i in range(4)], [True, True, True, False])
+
+        url = reverse('core:login')
+        en_metricas = REGISTRY.get_sample_value('saboresgo_limite_rechazos_total', {'limite': 'login'}) or 0
+        codigos = [self.client.post(url, {'username': 'x', 'password': 'x'}) for _ in range(11)]
+        self.assertEqual([r.status_code for r in codigos].count(429), 1)
+        self.assertIn(int(codigos[-1]['Retry-After']), range(1, 7))
+        self.assertEqual(LimitadorCache().rechazos('login'), 1)
+        # El rechazo también se ve en /metrics
+        self.assertEqual(
+            REGISTRY.get_sample_value('saboresgo_limite_rechazos_total', {'limite': 'login'}), en_metricas + 1
+        )
+
+
+class ImportacionPlatosTests(TestCase):
+    def setUp(self):
+        self.proveedor = _crear_plato(None).proveedor
+
+    def _importar(self, nombre, contenido):
+        return importacion.importar_platos(self.proveedor, SimpleUploadedFile(nombre, contenido))
+
+    def test_csv_latin1_con_lineas_en_blanco(self):
+        contenido = (
+            'nombre,descripcion,ingredientes,precio\r\n'
+            'Charquicán,Guiso,papa,3900\r\n'
+            '\r\n'
+            'Sin precio,,papa,\r\n'
+        ).encode('latin-1')
+        resultado = self._importar('platos.csv', contenido)
+        self.assertEqual(resultado.creados, 1)
+        self.assertTrue(Plato.objects.filter(nombre='Charquicán').exists())
+        self.assertEqual([fila for fila, _ in resultado.errores], [4])
+
+    def test_jsonl_numera_las_lineas_del_archivo(self):
+        contenido = (
+            '{"nombre": "Cazuela", "ingredientes": "zapallo", "precio": 4500}\n'
+            '\n'
+            'no es json\n'
+        ).encode()
+        resultado = self._importar('platos.jsonl', contenido)
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual([fila for fila, _ in resultado.errores], [3])
+
+    def test_arreglo_json_por_bloques(self):
+        filas = [{'nombre': f'Plato {i}', 'ingredientes': 'arroz', 'precio': 1000 + i} for i in range(30)]
+        with mock.patch.object(importacion, 'BLOQUE_JSON', 16):
+            resultado = self._importar('platos.json', json.dumps(filas, indent=1).encode())
+        self.assertEqual((resultado.creados, resultado.total_errores), (30, 0))
+
+    def test_arreglo_json_mal_formado_es_un_error_del_archivo(self):
+        contenido = b'[{"nombre": "Cazuela", "ingredientes": "zapallo", "precio": 4500}, {"nombre": '
+        resultado = self._importar('platos.json', contenido)
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual(resultado.errores[0][0], 2)
+
+
+    def test_imagenes_por_fila_desde_el_almacenamiento_compartido(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        zip_imagenes = io.BytesIO()
+        with zipfile.ZipFile(zip_imagenes, 'w') as zf:
+            zf.writestr('fotos/roja.jpg', b'roja')
+            zf.writestr('fotos/verde.jpg', b'verde')
+        contenido = (
+            'nombre,ingredientes,precio,imagen\n'
+            'Ensalada,tomate,2000,roja.jpg\n'
+            'Ensalada,lechuga,2000,verde.jpg\n'
+            'Sopa,zapallo,2500,\n'
+        ).encode()
+
+        with override_settings(MEDIA_ROOT=directorio.name):
+            resultado = importacion.importar_platos(
+                self.proveedor, SimpleUploadedFile('platos.csv', contenido),
+                imagenes=SimpleUploadedFile('fotos.zip', zip_imagenes.getvalue()),
+            )
+            self.assertEqual((resultado.creados, resultado.imagenes_pendientes), (3, 2))
+            carpeta = os.path.join(directorio.name, importacion.CARPETA_ZIP, str(self.proveedor.pk))
+            self.assertEqual(len(os.listdir(carpeta)), 1)
+            self.assertTrue(ejecutar(resultado.tarea_imagenes))
+
+            # Dos platos con el mismo nombre reciben cada uno su imagen
+            ensaladas = Plato.objects.filter(nombre='Ensalada').order_by('id')
+            self.assertEqual([p.imagen.read() for p in ensaladas], [b'roja', b'verde'])
+            self.assertEqual(os.listdir(carpeta), [])
+
+
+class PanelProveedorTests(TestCase):
+    def test_pestanas_con_entregados_e_historial(self):
+        plato = _crear_plato(None)
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        for estado in ('pendiente', 'listo', 'entregado', 'entregado'):
+            Pedido.objects.create(cliente=cliente, plato=plato, estado=estado)
+        antiguo = Pedido.objects.filter(estado='entregado').first()
+        Pedido.objects.filter(pk=antiguo.pk).update(fecha_pedido=timezone.now() - timedelta(days=3))
+        # Pedido de otro proveedor: no aparece
+        Pedido.objects.create(cliente=cliente, plato=_crear_plato(None), estado='entregado')
+
+        self.client.force_login(plato.proveedor.user)
+        url = reverse('core:pedidos_proveedor_panel')
+        respuesta = self.client.get(url, {'estado': 'entregado'})
+        self.assertEqual(
+            respuesta.context['estados'], [('pendiente', 1), ('preparando', 0), ('listo', 1), ('entregado', 1)]
+        )
+        self.assertEqual(len(respuesta.context['pedidos']), 1)
+
+        respuesta = self.client.get(url, {'estado': 'entregado', 'fecha': 'todos'})
+        self.assertEqual([p.pk for p in respuesta.context['pedidos']][-1], antiguo.pk)
+        self.assertEqual(dict(respuesta.context['estados'])['entregado'], 2)
+
+
+class ColaTareasTests(TestCase):
+    def test_solo_un_worker_reclama_la_tarea(self):
+        tarea = encolar(_crear_plato, None)
+        copia = Tarea.objects.get(pk=tarea.pk)
+        self.assertTrue(ejecutar(tarea))
+        # Otro worker con la misma fila leída antes: el UPDATE condicional no la encuentra pendiente
+        self.assertFalse(ejecutar(copia))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('completada', 1))
+        self.assertEqual(Plato.objects.count(), 1)
+
+    def test_reintentos_con_backoff_y_fallo_definitivo(self):
+        tarea = encolar(tarea_que_falla, clave='falla', max_intentos=3)
+        for intento in (1, 2):
+            antes = timezone.now()
+            with self.assertLogs('core.tareas', 'WARNING'):
+                ejecutar(tarea)
+            tarea.refresh_from_db()
+            self.assertEqual((tarea.estado, tarea.intentos), ('pendiente', intento))
+            espera = (tarea.ejecutar_desde - antes).total_seconds()
+            self.assertAlmostEqual(espera, BACKOFF_BASE * 2 ** (intento - 1), delta=1)
+
+        with self.assertLogs('core.tareas', 'ERROR'):
+            ejecutar(tarea)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'fallida')
+        self.assertIsNone(tarea.clave)
+        self.assertIn('falla de prueba', tarea.error)
+
+    def test_se_reencola_solo_la_tarea_sin_latido(self):
+        hace = timezone.now() - TIMEOUT_EJECUCION - timedelta(minutes=1)
+        abandonada, larga = (encolar(tarea_que_falla) for _ in range(2))
+        Tarea.objects.update(estado='ejecutando', actualizado_en=hace)
+        # La tarea larga sigue con su worker vivo: su latido renueva actualizado_en
+        renovar(larga.pk)
+
+        self.assertEqual(liberar_abandonadas(), 1)
+        self.assertEqual(Tarea.objects.get(pk=abandonada.pk).estado, 'pendiente')
+        self.assertEqual(Tarea.objects.get(pk=larga.pk).estado, 'ejecutando')
+
+
+class TiemposCocinaTests(TestCase):
+    def test_percentiles_desde_la_confirmacion(self):
+        plato = _crear_plato(None)
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        pedidos = [Pedido.objects.create(cliente=cliente, plato=plato) for _ in range(3)]
+
+        registrar(pedidos, 'pendiente', CARRITO)
+        registrar(pedidos, 'preparando')
+        # Ya estaban en pendiente: no se repite el evento
+        self.assertEqual(registrar(pedidos, 'pendiente'), 0)
+
+        for minutos, pedido in enumerate(pedidos, start=1):
+            inicio = EventoPedido.objects.get(pedido=pedido, estado_anterior=CARRITO).ocurrido_en
+            EventoPedido.objects.filter(pedido=pedido, estado_nuevo='preparando').update(
+                ocurrido_en=inicio + timedelta(minutes=minutos)
+            )
+
+        self.assertEqual(calcular_tiempos(), 1)
+        tiempos = TiemposProveedor.objects.get(proveedor=plato.proveedor)
+        self.assertEqual(tiempos.pedidos, 3)
+        self.assertEqual(tiempos.preparando_p50, 120)
+        self.assertIsNone(tiempos.listo_p50)
+
+
+class IndicePrefijosTests(TestCase):
+    def setUp(self):
+        self.indice = IndicePrefijos()
+        self.indice.cargar([
+            ('plato', 1, 'Pollo asado', 5),
+            ('plato', 2, 'Arroz con pollo', 20),
+            ('plato', 3, 'Pastel de choclo', 1),
+            ('ingrediente', 1, 'pollo', 8),
+        ])
+
+    def _textos(self, q):
+        return [r['texto'] for r in self.indice.buscar(q)]
+
+    def test_prefijo_de_cualquier_palabra_por_popularidad(self):
+        self.assertEqual(self._textos('pol'), ['Arroz con pollo', 'pollo', 'Pollo asado'])
+        self.assertEqual(self._textos('P'), ['Arroz con pollo', 'pollo', 'Pollo asado', 'Pastel de choclo'])
+        self.assertEqual(self._textos('pollo as'), ['Pollo asado'])
+
+    def test_sin_tildes_ni_mayusculas(self):
+        self.indice.agregar('plato', 4, 'Ñoquis al pésto')
+        self.assertEqual(self._textos('noquis al pes'), ['Ñoquis al pésto'])
+
+    def test_actualizacion_incremental(self):
+        self.indice.agregar('plato', 3, 'Pollo arvejado', 50)
+        self.assertEqual(self._textos('po')[0], 'Pollo arvejado')
+        self.assertEqual(self._textos('pastel'), [])
+
+        self.indice.quitar('plato', 2)
+        self.assertNotIn('Arroz con pollo', self._textos('pol'))
+
+
+class AutocompletarIncrementalTests(TestCase):
+    def setUp(self):
+        self.plato = _crear_plato(None)
+        autocompletar.construir()
+        # El índice es del proceso: las demás pruebas lo reconstruyen desde su base
+        self.addCleanup(autocompletar._estado.update, version=None)
+
+    def _buscar_revisando(self, texto):
+        autocompletar._estado['revisado'] = 0.0
+        return [r['texto'] for r in autocompletar.buscar(texto)]
+
+    def test_guardar_no_reconstruye_el_indice(self):
+        with mock.patch('core.autocompletar.construir_en_segundo_plano') as reconstruir:
+            with self.captureOnCommitCallbacks(execute=True):
+                Plato.objects.create(
+                    proveedor=self.plato.proveedor, nombre='Charquicán', ingredientes='papa', precio=1
+                )
+            with self.captureOnCommitCallbacks(execute=True):
+                self.plato.nombre = 'Cazuela de vacuno'
+                self.plato.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.plato.proveedor.save()
+
+            self.assertEqual(self._buscar_revisando('charq'), ['Charquicán'])
+            self.assertEqual(self._buscar_revisando('cazuela de v'), ['Cazuela de vacuno'])
+            reconstruir.assert_not_called()
+
+            # Un cambio que este proceso no aplicó (otro worker, importación masiva)
+            VersionCatalogo.incrementar()
+            self._buscar_revisando('charq')
+            reconstruir.assert_called_once_with()
+
+
+class CalentamientoTests(TestCase):
+    def test_calentar_deja_plantillas_compiladas_e_indice_construido(self):
+        _crear_plato(5)
+        tiempos = calentar()
+        self.assertEqual(set(tiempos), {nombre for nombre, _ in PASOS})
+
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('core/base.html', {clave.split('-')[0] for clave in loader.get_template_cache})
+        self.assertEqual(autocompletar.buscar('caz')[0]['texto'], 'Cazuela')
+
+    def test_precarga_no_deja_conexiones_para_los_workers(self):
+        with mock.patch('core.arranque.connections') as conexiones:
+            tiempos = calentar(conexiones=False)
+        self.assertNotIn('conexiones', tiempos)
+        conexiones.close_all.assert_called_once_with()
+
+
+class CatalogoSeccionesTests(TestCase):
+    def setUp(self):
+        for _ in range(PROVEEDORES_POR_TANDA + 2):
+            _crear_plato(None)
+
+    def test_primera_tanda_en_la_pagina_y_el_resto_por_secciones(self):
+        respuesta = self.client.get(reverse('core:catalogo'))
+        self.assertEqual(len(respuesta.context['proveedores']), PROVEEDORES_POR_TANDA)
+        siguiente = respuesta.context['siguiente']
+        self.assertIsNotNone(siguiente)
+
+        respuesta = self.client.get(siguiente)
+        self.assertTemplateNotUsed(respuesta, 'core/base.html')
+        self.assertEqual(len(respuesta.context['proveedores']), 2)
+        self.assertIsNone(respuesta.context['siguiente'])
+        self.assertContains(respuesta, 'Cazuela', count=2)
+
+
+class ApiCatalogoTests(TestCase):
+    def setUp(self):
+        self.plato = _crear_plato(None)
+        self.url = reverse('core:api_platos_v1')
+
+    def test_etag_responde_304_hasta_que_cambia_el_catalogo(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        self.assertEqual([p['nombre'] for p in respuesta.json()['results']], ['Cazuela'])
+
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+
+        # Otros parámetros son otro recurso
+        respuesta = self.client.get(self.url, {'limit': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+
+        self.plato.precio = 5000
+        self.plato.save()
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.json()['results'][0]['precio'], '5000.00')
+
+    def test_cursor_recorre_todas_las_paginas(self):
+        for _ in range(2):
+            _crear_plato(None)
+        ids, cursor = [], None
+        while True:
+            datos = self.client.get(self.url, {'limit': 2, **({'cursor': cursor} if cursor else {})}).json()
+            ids += [p['id'] for p in datos['results']]
+            cursor = datos['next']
+            if cursor is None:
+                break
+        self.assertEqual(ids, list(Plato.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(self.client.get(self.url, {'cursor': '!!'}).status_code, 400)
+
+
+class MediaPorHashTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.raiz = directorio.name
+        ajustes = override_settings(MEDIA_ROOT=self.raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _archivos(self, carpeta):
+        return sorted(
+            os.path.relpath(os.path.join(d, a), self.raiz).replace(os.sep, '/')
+            for d, _, archivos in os.walk(os.path.join(self.raiz, carpeta)) for a in archivos
+        )
+
+    def test_subidas_iguales_comparten_archivo(self):
+        storage = HashedMediaStorage()
+        primero = storage.save('platos/foto.JPG', ContentFile(b'imagen', name='foto.JPG'))
+        segundo = storage.save('platos/otra.jpg', ContentFile(b'imagen', name='otra.jpg'))
+        distinto = storage.save('platos/foto.jpg', ContentFile(b'otra imagen', name='foto.jpg'))
+
+        self.assertEqual(primero, segundo)
+        self.assertNotEqual(primero, distinto)
+        self.assertTrue(es_inmutable(primero))
+        self.assertEqual(self._archivos('platos'), sorted([primero, distinto]))
+
+    def test_deduplicar_media_colapsa_copias_y_actualiza_referencias(self):
+        os.makedirs(os.path.join(self.raiz, 'platos'))
+        for nombre, contenido in (('a.jpg', b'igual'), ('b.jpg', b'igual'), ('c.jpg', b'unica')):
+            with open(os.path.join(self.raiz, 'platos', nombre), 'wb') as f:
+                f.write(contenido)
+        platos = [_crear_plato(None) for _ in range(3)]
+        for plato, nombre in zip(platos, ('platos/a.jpg', 'platos/b.jpg', 'platos/c.jpg')):
+            Plato.objects.filter(pk=plato.pk).update(imagen=nombre)
+        version = VersionCatalogo.actual().version
+
+        call_command('deduplicar_media', stdout=io.StringIO())
+
+        imagenes = [Plato.objects.get(pk=p.pk).imagen.name for p in platos]
+        self.assertEqual(imagenes[0], imagenes[1])
+        self.assertTrue(all(es_inmutable(i) for i in imagenes))
+        self.assertEqual(self._archivos('platos'), sorted(set(imagenes)))
+        self.assertGreater(VersionCatalogo.actual().version, version)
+
+
+class DespachoTests(TestCase):
+    def test_dos_opt_deshace_los_cruces(self):
+        origen = (0.0, 0.0)
+        paradas = [Parada(f'calle {lon}', (0.0, lon)) for lon in (0.01, 0.03, 0.02, 0.04)]
+        ruta = dos_opt(origen, paradas)
+        self.assertEqual([p.punto[1] for p in ruta], [0.01, 0.02, 0.03, 0.04])
+        self.assertLess(
+            longitud_ruta([origen] + [p.punto for p in ruta]),
+            longitud_ruta([origen] + [p.punto for p in paradas]),
+        )
+
+    def test_despachar_agrupa_por_direccion_y_respeta_la_capacidad(self):
+        plato = _crear_plato(None)
+        Proveedor.objects.filter(pk=plato.proveedor_id).update(latitud=-33.45, longitud=-70.65)
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        direcciones = ['Alameda 100', 'alameda  100', 'Providencia 200']
+        pedidos = [
+            Pedido.objects.create(cliente=cliente, plato=plato, estado='listo', direccion=d) for d in direcciones
+        ]
+        Repartidor.objects.create(nombre='Grande', capacidad=2)
+        Repartidor.objects.create(nombre='Chico', capacidad=1)
+
+        resultado = despachar()
+        self.assertEqual((resultado['rutas'], resultado['asignados'], resultado['sin_asignar']), (2, 3, 0))
+        # La misma dirección escrita distinto es una sola parada: va completa en una ruta
+        alameda = Pedido.objects.get(pk=pedidos[0].pk).ruta
+        self.assertEqual(
+            sorted(alameda.pedidos.values_list('id', 'orden_ruta')), [(pedidos[0].pk, 1), (pedidos[1].pk, 2)]
+        )
+
+        # Los repartidores siguen en ruta: un nuevo pedido espera
+        Pedido.objects.create(cliente=cliente, plato=plato, estado='listo', direccion='Maipú 400')
+        self.assertEqual(despachar()['sin_asignar'], 1)
+
+        completar_ruta(alameda)
+        self.assertEqual(despachar()['asignados'], 1)
+        self.assertEqual(
+            list(Pedido.objects.filter(estado='entregado').order_by('id').values_list('id', flat=True)),
+            [pedidos[0].pk, pedidos[1].pk],
+        )
+
+
+    def test_despachar_descarta_lo_que_cambio_mientras_geocodificaba(self):
+        plato = _crear_plato(None)
+        Proveedor.objects.filter(pk=plato.proveedor_id).update(latitud=-33.45, longitud=-70.65)
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        retirado, enviado = [
+            Pedido.objects.create(cliente=cliente, plato=plato, estado='listo', direccion=d)
+            for d in ('Alameda 100', 'Providencia 200')
+        ]
+        Repartidor.objects.create(nombre='Grande', capacidad=5)
+
+        class Geocoder(GeocoderLocal):
+            def _buscar(self, direccion):
+                # El cliente retira en el local durante la llamada externa
+                Pedido.objects.filter(pk=retirado.pk).update(estado='entregado')
+                return super()._buscar(direccion)
+
+        with mock.patch('core.despacho.get_geocoder', Geocoder):
+            resultado = despachar()
+        self.assertEqual((resultado['asignados'], resultado['sin_direccion']), (1, 0))
+        self.assertIsNone(Pedido.objects.get(pk=retirado.pk).ruta)
+        self.assertIsNotNone(Pedido.objects.get(pk=enviado.pk).ruta)
+
+
+class GeohashTests(TestCase):
+    def _proveedor(self, lat, lon, aprobado=True):
+        proveedor = _crear_plato(None).proveedor
+        Proveedor.objects.filter(pk=proveedor.pk).update(
+            aprobado=aprobado, latitud=lat, longitud=lon, geohash=geohash(lat, lon)
+        )
+        return proveedor
+
+    def test_codificacion_conocida(self):
+        self.assertEqual(geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(len(celdas_vecinas(-33.45, -70.65, 5)), 9)
+
+    def test_encuentra_vecinos_al_otro_lado_del_borde_de_la_celda(self):
+        lat = -33.45
+        precision = precision_para_radio(lat, RADIO_KM)
+        _, ancho = tamano_celda(precision)
+        borde = math.floor((-70.65 + 180) / ancho) * ancho - 180
+        lon = borde + 0.001
+
+        vecino = self._proveedor(lat, borde - 0.001)
+        self.assertNotEqual(geohash(lat, lon, precision), geohash(lat, borde - 0.001, precision))
+        lejano = self._proveedor(lat, lon + 0.1)        # ~9 km
+        self._proveedor(lat, lon + 0.002, aprobado=False)
+
+        cercanos = proveedores_cercanos(lat, lon, RADIO_KM)
+        self.assertEqual([p.pk for p in cercanos], [vecino.pk])
+        self.assertLess(cercanos[0].distancia_km, 1)
+        self.assertEqual(
+            [p.pk for p in proveedores_cercanos(lat, lon, 10)], [vecino.pk, lejano.pk]
+        )
+
+
+class RecomendacionesTests(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c = (_crear_plato(None) for _ in range(3))
+        self.clientes = [Cliente.objects.create(user=User.objects.create(username=f'cliente{i}')) for i in range(2)]
+
+    def _pedido(self, cliente, plato, dia, confirmado=True):
+        pedido = Pedido.objects.create(cliente=cliente, plato=plato, confirmado=confirmado)
+        fecha = timezone.make_aware(datetime.combine(dia, hora(12)))
+        Pedido.objects.filter(pk=pedido.pk).update(fecha_pedido=fecha)
+
+    def _top(self, plato):
+        return list(Recomendacion.objects.filter(plato=plato).values_list('recomendado_id', 'puntaje'))
+
+    def test_pares_del_mismo_dia_e_incremental_por_dia(self):
+        hoy = timezone.localdate()
+        ayer = hoy - timedelta(days=1)
+        uno, dos = self.clientes
+        for cliente in (uno, dos):
+            self._pedido(cliente, self.a, ayer)
+            self._pedido(cliente, self.b, ayer)
+        self._pedido(uno, self.c, ayer)
+        # No cuentan: sin confirmar, ni otro día
+        self._pedido(dos, self.c, ayer, confirmado=False)
+        self._pedido(dos, self.c, ayer - timedelta(days=1))
+
+        self.assertEqual(actualizar_recomendaciones(), 3)
+        self.assertEqual(self._top(self.a), [(self.b.pk, 2), (self.c.pk, 1)])
+        self.assertEqual(recomendaciones_para_carrito([self.a.pk, self.b.pk]), [self.c])
+        # El día ya quedó procesado
+        self.assertEqual(actualizar_recomendaciones(), 0)
+
+        for cliente in (uno, dos):
+            self._pedido(cliente, self.a, hoy)
+            self._pedido(cliente, self.c, hoy)
+        with mock.patch('django.utils.timezone.localdate', return_value=hoy + timedelta(days=1)):
+            self.assertEqual(actualizar_recomendaciones(), 2)
+        self.assertEqual(self._top(self.a), [(self.c.pk, 3), (self.b.pk, 2)])
+
+
+class PronosticosTests(TestCase):
+    def test_tendencia_acotada(self):
+        matriz = np.ones((1, SEMANAS * 7))
+        matriz[0, -7:] = 3
+        estimado = pronosticar(matriz, 0)
+        # Tendencia 3 / 1.25 = 2.4, acotada a TENDENCIA_MAX
+        base = (sum(range(1, SEMANAS)) + 3 * SEMANAS) / sum(range(1, SEMANAS + 1))
+        np.testing.assert_allclose(estimado, np.full((1, 7), base * TENDENCIA_MAX))
+
+    def test_demanda_por_dia_de_la_semana(self):
+        plato = _crear_plato(None)
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        hoy = date(2026, 10, 19)
+        # Cuatro porciones cada martes de las últimas SEMANAS semanas
+        for semana in range(1, SEMANAS + 1):
+            martes = hoy + timedelta(days=1 - 7 * semana)
+            pedido = Pedido.objects.create(cliente=cliente, plato=plato, cantidad=4, confirmado=True)
+            Pedido.objects.filter(pk=pedido.pk).update(
+                fecha_pedido=timezone.make_aware(datetime.combine(martes, hora(13)))
+            )
+
+        with mock.patch('django.utils.timezone.localdate', return_value=hoy):
+            resultado = calcular_pronosticos()
+        self.assertEqual((resultado['platos'], resultado['filas']), (1, 1))
+        self.assertEqual(
+            list(PronosticoPlato.objects.values_list('plato_id', 'fecha', 'unidades')),
+            [(plato.pk, hoy + timedelta(days=1), 4)],
+        )
+
+
+class ReplicaLecturaTests(SimpleTestCase):
+    def setUp(self):
+        reiniciar()
+        self.addCleanup(reiniciar)
+        parche = mock.patch('core.replicas.replica_configurada', return_value=True)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.router = RouterReplica()
+
+    def test_router_lee_de_la_replica_solo_si_no_escribio(self):
+        self.assertEqual(self.router.db_for_read(Plato), 'default')
+        with usar_replica():
+            self.assertEqual(self.router.db_for_read(Plato), 'replica')
+            # La caché compartida (tabla de la primaria) no se lee atrasada
+            self.assertEqual(self.router.db_for_read(caches['default'].cache_model_class), 'default')
+            with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                self.assertEqual(self.router.db_for_read(Plato), 'default')
+            self.router.db_for_write(Plato)
+            self.assertEqual(self.router.db_for_read(Plato), 'default')
+
+    def test_middleware_deja_en_la_primaria_a_quien_escribe(self):
+        leidas = []
+
+        def vista(request):
+            leidas.append(self.router.db_for_read(Plato))
+            if request.GET.get('escribir'):
+                self.router.db_for_write(Plato)
+            return HttpResponse()
+
+        # Como el handler de Django: process_view corre dentro de __call__
+        def responder(request):
+            middleware.process_view(request, vista, (), {})
+            return vista(request)
+
+        middleware = ReplicaMiddleware(responder)
+
+        def pedir(request):
+            request.resolver_match = resolve(request.path)
+            return middleware(request)
+
+        fabrica = RequestFactory()
+        pedir(fabrica.get('/adminpanel/'))
+        pedir(fabrica.post('/adminpanel/'))
+        pedir(fabrica.get('/proveedores/'))
+        respuesta = pedir(fabrica.get('/adminpanel/', {'escribir': 1}))
+        self.assertIn(COOKIE_PRIMARIA, respuesta.cookies)
+        con_cookie = fabrica.get('/adminpanel/')
+        con_cookie.COOKIES[COOKIE_PRIMARIA] = '1'
+        pedir(con_cookie)
+
+        self.assertEqual(leidas, ['replica', 'default', 'default', 'replica', 'default'])
+
+
+class SerieVentasTests(TestCase):
+    def setUp(self):
+        self.plato = _crear_plato(None)
+        self.cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        self.hoy = date(2026, 10, 21)
+
+    def _pedido(self, dia, cantidad=1):
+        pedido = Pedido.objects.create(cliente=self.cliente, plato=self.plato, cantidad=cantidad, confirmado=True)
+        Pedido.objects.filter(pk=pedido.pk).update(
+            fecha_pedido=timezone.make_aware(datetime.combine(dia, hora(13)))
+        )
+
+    def _pedido_a_las(self, momento):
+        pedido = Pedido.objects.create(cliente=self.cliente, plato=self.plato, confirmado=True)
+        Pedido.objects.filter(pk=pedido.pk).update(fecha_pedido=timezone.make_aware(momento))
+
+    def test_rango_respeta_los_bordes_del_dia_local(self):
+        ayer = self.hoy - timedelta(days=1)
+        self._pedido_a_las(datetime.combine(ayer, hora.min))
+        self._pedido_a_las(datetime.combine(ayer, hora.max))
+        self._pedido_a_las(datetime.combine(self.hoy, hora.min))
+        with mock.patch('django.utils.timezone.localdate', return_value=self.hoy):
+            actualizar_ventas_diarias()
+        self.assertEqual(list(VentaDiaria.objects.values_list('fecha', 'pedidos')), [(ayer, 2)])
+
+    def test_dias_agregados_mas_el_dia_en_curso(self):
+        self._pedido(self.hoy - timedelta(days=3), cantidad=2)
+        self._pedido(self.hoy - timedelta(days=2))
+        with mock.patch('django.utils.timezone.localdate', return_value=self.hoy):
+            self.assertEqual(actualizar_ventas_diarias(), 2)
+        self.assertEqual(VentaDiaria.objects.count(), 2)
+        # Pedido de hoy: aún no está agregado y sale de Pedido en vivo
+        self._pedido(self.hoy)
+
+        serie = serie_ventas(self.hoy - timedelta(days=3), self.hoy)
+        self.assertEqual([d['ventas'] for d in serie], [9000, 4500, 0, 4500])
+        self.assertEqual([d['pedidos'] for d in serie], [1, 1, 0, 1])
+
+        admin = User.objects.create_superuser('admin', 'admin@test.cl', 'x')
+        self.client.force_login(admin)
+        datos = self.client.get(reverse('adminpanel:ventas_serie'), {
+            'desde': '2026-10-18', 'hasta': '2026-10-21', 'granularidad': 'semana',
+        }).json()
+        self.assertEqual(
+            [(d['periodo'], d['ventas'], d['unidades']) for d in datos['serie']],
+            [('2026-10-12', 9000, 2), ('2026-10-19', 9000, 2)],
+        )
+        respuesta = self.client.get(reverse('adminpanel:ventas_serie'), {'granularidad': 'hora'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ResumenPanelTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        pedido = Pedido.objects.create(
+            cliente=Cliente.objects.create(user=User.objects.create(username='cliente')),
+            plato=_crear_plato(None), cantidad=2, confirmado=True,
+        )
+        self.pedido = pedido
+
+    def test_atrasado_se_sirve_y_se_recalcula_una_sola_vez(self):
+        with mock.patch('core.resumen.threading.Thread') as hilo:
+            primero = obtener_resumen()
+            self.assertEqual((primero['total_pedidos'], primero['total_ingresos']), (1, 9000))
+            self.assertIsNone(caches['default'].get(resumen.CLAVE_LOCK))
+
+            Pedido.objects.filter(pk=self.pedido.pk).update(cantidad=3)
+            self.assertEqual(obtener_resumen()['total_ingresos'], 9000)
+            hilo.assert_not_called()
+
+            # Pasado SEGUNDOS_FRESCO: se sirve el atrasado y un solo hilo recalcula
+            atrasado = dict(primero, calculado_en=timezone.now() - timedelta(seconds=SEGUNDOS_FRESCO + 1))
+            caches['default'].set(resumen.CLAVE, atrasado)
+            self.assertEqual([obtener_resumen()['total_ingresos'] for _ in range(3)], [9000] * 3)
+            self.assertEqual(hilo.call_count, 1)
+
+        # Lo que hace el hilo; al terminar libera el lock
+        resumen._recalcular()
+        self.assertEqual(obtener_resumen()['total_ingresos'], 13500)
+        self.assertIsNone(caches['default'].get(resumen.CLAVE_LOCK))
+
+    def test_sin_cache_espera_el_calculo_en_curso(self):
+        caches['default'].add(resumen.CLAVE_LOCK, 1)
+        calculado = dict(calcular_resumen(), total_pedidos=99)
+
+        def otro_worker_termina(segundos):
+            caches['default'].set(resumen.CLAVE, calculado)
+
+        with mock.patch('core.resumen.time.sleep', side_effect=otro_worker_termina) as espera:
+            self.assertEqual(obtener_resumen()['total_pedidos'], 99)
+        espera.assert_called_once()
+
+
+class FacetasCatalogoTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        self.proveedor = _crear_plato(None).proveedor
+        for nombre, precio, ingredientes in (
+            ('Arroz chaufa', 2500, 'Arroz, pollo'),
+            ('Risotto', 9000, ' ARROZ ,arroz, Queso'),
+        ):
+            Plato.objects.create(proveedor=self.proveedor, nombre=nombre, precio=precio, ingredientes=ingredientes)
+
+    def _conteos(self, facetas, grupo, campo):
+        return {f[campo]: f['total'] for f in facetas[grupo]}
+
+    def test_conteos_cacheados_por_version_del_catalogo(self):
+        facetas = obtener_facetas()
+        self.assertEqual(
+            self._conteos(facetas, 'precios', 'clave'), {'economico': 1, 'medio': 1, 'alto': 0, 'premium': 1}
+        )
+        self.assertEqual(
+            self._conteos(facetas, 'ingredientes', 'nombre'), {'arroz': 2, 'pollo': 1, 'queso': 1, 'zapallo': 1}
+        )
+        # Desde la caché, sin volver a contar
+        with mock.patch('core.facetas.calcular_facetas') as calcular:
+            self.assertEqual(obtener_facetas(), facetas)
+        calcular.assert_not_called()
+
+        Plato.objects.create(proveedor=self.proveedor, nombre='Paella', precio=6000, ingredientes='arroz')
+        facetas = obtener_facetas()
+        self.assertEqual(self._conteos(facetas, 'precios', 'clave')['alto'], 1)
+        self.assertEqual(self._conteos(facetas, 'ingredientes', 'nombre')['arroz'], 3)
+
+    def test_filtros_combinados_en_el_catalogo(self):
+        arroz = Ingrediente.objects.get(nombre='arroz')
+        respuesta = self.client.get(reverse('core:catalogo'), {'ingrediente': arroz.pk, 'precio': 'premium'})
+        platos = [p.nombre for prov in respuesta.context['proveedores'] for p in prov.platos_catalogo]
+        self.assertEqual(platos, ['Risotto'])
+        self.assertEqual(respuesta.context['filtros'], {'ingrediente': arroz.pk, 'precio': 'premium'})
+        # Un filtro inválido se ignora
+        self.assertEqual(leer_filtros({'precio': 'gratis', 'proveedor': 'x'}), {})
+
+
+    def test_ingredientes_iguales_sin_tildes_son_uno(self):
+        self.assertEqual(separar_ingredientes('Ají, aji , AJÍ,  ajo'), ['ají', 'ajo'])
+        plato = Plato.objects.create(proveedor=self.proveedor, nombre='Pebre', precio=1, ingredientes='Ají, aji')
+        self.assertEqual(list(plato.lista_ingredientes.values_list('nombre', flat=True)), ['ají'])
+
+    def test_conflicto_descartado_no_rompe_el_guardado(self):
+        # Como en MySQL: 'ají' choca con un 'aji' guardado, ignore_conflicts lo
+        # descarta y la nueva lectura no lo encuentra con ese nombre
+        with mock.patch.object(Ingrediente.objects, 'bulk_create') as crear:
+            plato = Plato.objects.create(proveedor=self.proveedor, nombre='Pebre', precio=1, ingredientes='ají, arroz')
+        crear.assert_called_once()
+        self.assertEqual(list(plato.lista_ingredientes.values_list('nombre', flat=True)), ['arroz'])
+
+
+class MetricasTests(TestCase):
+    def _valor(self, nombre, **etiquetas):
+        return REGISTRY.get_sample_value(nombre, etiquetas or None) or 0
+
+    def test_contadores_de_negocio_solo_al_confirmar(self):
+        plato = _crear_plato(None)
+        cliente = Cliente.objects.create(user=User.objects.create(username='cliente'))
+        antes = self._valor('saboresgo_pedidos_creados_total')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError), transaction.atomic():
+                Pedido.objects.create(cliente=cliente, plato=plato)
+                raise ValueError('se revierte')
+        self.assertEqual(self._valor('saboresgo_pedidos_creados_total'), antes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Pedido.objects.create(cliente=cliente, plato=plato)
+            # Antes del commit todavía no cuenta
+            self.assertEqual(self._valor('saboresgo_pedidos_creados_total'), antes)
+        self.assertEqual(self._valor('saboresgo_pedidos_creados_total'), antes + 1)
+
+    @override_settings(METRICAS_TOKEN='secreto')
+    def test_solicitudes_por_vista_y_endpoint_con_token(self):
+        etiquetas = {'vista': 'core:proveedores', 'metodo': 'GET', 'estado': '200'}
+        antes = self._valor('saboresgo_http_solicitudes_total', **etiquetas)
+        self.client.get(reverse('core:proveedores'))
+        self.assertEqual(self._valor('saboresgo_http_solicitudes_total', **etiquetas), antes + 1)
+        self.assertGreaterEqual(
+            self._valor('saboresgo_db_consultas_por_solicitud_count', vista='core:proveedores'), 1
+        )
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        respuesta = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertContains(respuesta, 'saboresgo_http_solicitudes_total{')
+
+
+class StockConcurrenteTests(TransactionTestCase):
+    CLIENTES = 200
+    STOCK = 25
+
+    def test_no_sobrevende_con_clientes_simultaneos(self):
+        plato = _crear_plato(self.STOCK)
+        # La fila del día ya existe: los hilos solo compiten en el UPDATE condicional
+        StockPlato.objects.create(plato=plato, fecha=timezone.localdate())
+        barrera = threading.Barrier(self.CLIENTES)
+        resultados = []
+        lock = threading.Lock()
+
+        def cliente():
+            try:
+                barrera.wait()
+                try:
+                    reservar(plato, 1)
+                    resultado = 'reservado'
+                except SinStock:
+                    resultado = 'sin_stock'
+                except OperationalError:
+                    # SQLite puede responder "locked" en vez de esperar el lock
+                    resultado = 'bloqueado'
+                with lock:
+                    resultados.append(resultado)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=cliente) for _ in range(self.CLIENTES)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        self.assertEqual(len(resultados), self.CLIENTES)
+        vendidos = StockPlato.objects.get(plato=plato).vendidos
+        # Cada reserva exitosa quedó contada una vez, y nunca más que el tope
+        self.assertEqual(resultados.count('reservado'), vendidos)
+        self.assertLessEqual(vendidos, self.STOCK)
+        # SinStock solo aparece cuando el tope ya se alcanzó
+        if 'sin_stock' in resultados:
+            self.assertEqual(vendidos, self.STOCK)
+        # MySQL espera el lock de fila: ningún cliente queda sin respuesta definitiva
+        if connection.vendor != 'sqlite':
+            self.assertNotIn('bloqueado', resultados)
+            self.assertEqual(vendidos, self.STOCK)
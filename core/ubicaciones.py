@@ -0,0 +1,103 @@
+from django.apps import apps
+from django.db.models import Q
+
+from .geo import celdas_vecinas, distancia_km, geohash, get_geocoder, precision_para_radio
+from .models import Proveedor
+
+
+# Radio por defecto de "restaurantes cerca de mí"
+RADIO_KM = 5
+
+
+def asignar_ubicacion(obj, punto):
+    """Copia (lat, lon) y su geohash al objeto (Proveedor o Cliente), sin guardar."""
+    if punto is None:
+        obj.latitud = obj.longitud = None
+        obj.geohash = ''
+    else:
+        obj.latitud, obj.longitud = punto
+        obj.geohash = geohash(*punto)
+
+
+def ubicacion(obj):
+    if obj.latitud is None or obj.longitud is None:
+        return None
+    return (obj.latitud, obj.longitud)
+
+
+# ---------------------------------------------------------
+# BÚSQUEDA POR CERCANÍA
+# ---------------------------------------------------------
+def filtro_celdas(lat, lon, radio_km, campo='geohash'):
+    """
+    Q que limita la búsqueda a la celda del punto y sus 8 vecinas.
+
+    Cada celda es un rango [prefijo, prefijo + '{') sobre la columna indexada,
+    así la base de datos hace a lo más nueve búsquedas acotadas en el índice.
+    """
+    precision = precision_para_radio(lat, radio_km)
+    q = Q()
+    for celda in celdas_vecinas(lat, lon, precision):
+        # '{' es el carácter siguiente a 'z' en ASCII
+        q |= Q(**{f'{campo}__gte': celda, f'{campo}__lt': celda + '{'})
+    return q
+
+
+def proveedores_cercanos(lat, lon, radio_km=RADIO_KM, queryset=None, limite=None):
+    """
+    Proveedores a menos de `radio_km`, ordenados por distancia.
+
+    Cada proveedor devuelto trae el atributo `distancia_km`.
+    """
+    if queryset is None:
+        queryset = Proveedor.objects.filter(aprobado=True)
+
+    candidatos = queryset.filter(filtro_celdas(lat, lon, radio_km))
+
+    cercanos = []
+    for proveedor in candidatos:
+        proveedor.distancia_km = round(distancia_km((lat, lon), (proveedor.latitud, proveedor.longitud)), 2)
+        if proveedor.distancia_km <= radio_km:
+            cercanos.append(proveedor)
+
+    cercanos.sort(key=lambda p: p.distancia_km)
+    return cercanos[:limite] if limite else cercanos
+
+
+# ---------------------------------------------------------
+# GEOCODIFICACIÓN
+# ---------------------------------------------------------
+def geocodificar_ubicacion(modelo, pk):
+    """Tarea: geocodifica la dirección de un Proveedor o Cliente."""
+    Modelo = apps.get_model(modelo)
+    obj = Modelo.objects.filter(pk=pk).first()
+    if obj is None:
+        return
+
+    asignar_ubicacion(obj, get_geocoder().geocodificar(obj.direccion))
+    # update() para no volver a disparar las señales de guardado
+    Modelo.objects.filter(pk=pk).update(latitud=obj.latitud, longitud=obj.longitud, geohash=obj.geohash)
+
+
+def geocodificar_pendientes(Modelo, geocoder=None, lote=500, todos=False):
+    """Geocodifica en lotes las filas con dirección y sin coordenadas. Retorna cuántas se actualizaron."""
+    geocoder = geocoder or get_geocoder()
+    qs = Modelo.objects.exclude(direccion='').only('id', 'direccion').order_by('id')
+    if not todos:
+        qs = qs.filter(latitud__isnull=True)
+
+    actualizados = 0
+    ultimo_id = 0
+    while True:
+        filas = list(qs.filter(id__gt=ultimo_id)[:lote])
+        if not filas:
+            break
+        ultimo_id = filas[-1].id
+
+        for obj in filas:
+            asignar_ubicacion(obj, geocoder.geocodificar(obj.direccion))
+
+        Modelo.objects.bulk_update(filas, ['latitud', 'longitud', 'geohash'], batch_size=lote)
+        actualizados += len(filas)
+
+    return actualizados
@@ -1,14 +1,16 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'core'
 
 urlpatterns = [
     path('', views.catalogo, name='catalogo'),
+    path('catalogo/secciones/', views.catalogo_secciones, name='catalogo_secciones'),
 
     # Menú semanal
     path('menu-semanal/', views.menu_semanal, name='menu_semanal'),
     path('menu-semanal/select/<str:dia>/', views.menu_semanal_select, name='menu_semanal_select'),
+    path('menu-semanal/editar/', views.menu_semanal_editar, name='menu_semanal_editar'),
     path('menu-semanal/pagar/<int:menu_id>/', views.pagar_menu, name='pagar_menu'),
     path('menu/pagar/<int:menu_id>/', views.pagar_menu, name='pagar_menu'),
 
@@ -23,6 +25,7 @@ urlpatterns = [
     path('proveedores/', views.proveedores, name='proveedores'),
     path('proveedor/platos/', views.plato_list, name='plato_list'),
     path('proveedor/platos/crear/', views.plato_create, name='plato_create'),
+    path('proveedor/platos/importar/', views.plato_import, name='plato_import'),
     path('proveedor/platos/<int:pk>/editar/', views.plato_edit, name='plato_edit'),
     path('proveedor/platos/<int:pk>/eliminar/', views.plato_delete, name='plato_delete'),
     path('proveedor/pedidos-panel/', views.pedidos_proveedor_panel, name='pedidos_proveedor_panel'),
@@ -52,6 +55,13 @@ urlpatterns = [
     path('mi-perfil/set-convenio/', views.set_convenio, name='set_convenio'),
 
     
+    # API JSON del catálogo (v1)
+    path('api/v1/proveedores/', api.proveedores_v1, name='api_proveedores_v1'),
+    path('api/v1/proveedores/cercanos/', api.proveedores_cercanos_v1, name='api_proveedores_cercanos_v1'),
+    path('api/v1/platos/', api.platos_v1, name='api_platos_v1'),
+    path('api/v1/platos/<int:pk>/', api.plato_detalle_v1, name='api_plato_detalle_v1'),
+    path('api/v1/autocompletar/', api.autocompletar_v1, name='api_autocompletar_v1'),
+
     #Repartidores
     path('repartidores/', views.repartidores, name='repartidores'),
 ]
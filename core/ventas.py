@@ -0,0 +1,175 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Pedido, PuntoControl, VentaDiaria
+
+
+PROCESO = 'ventas_diarias'
+
+# Días ya agregados que se vuelven a calcular en cada corrida, por pedidos
+# que se confirman o cambian después de medianoche
+DIAS_REVISION = 2
+
+GRANULARIDADES = {
+    'dia': None,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+
+
+# ---------------------------------------------------------
+# AGREGACIÓN DESDE PEDIDOS
+# ---------------------------------------------------------
+def inicio_dia(fecha):
+    """Medianoche local de `fecha`, para filtrar columnas datetime por rango sin truncarlas."""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def _pedidos_por_dia(desde=None, hasta=None):
+    # TruncDate solo agrupa; filtrar por él obligaría a recorrer toda la tabla
+    qs = Pedido.objects.filter(confirmado=True)
+    if desde:
+        qs = qs.filter(fecha_pedido__gte=inicio_dia(desde))
+    if hasta:
+        qs = qs.filter(fecha_pedido__lt=inicio_dia(hasta + timedelta(days=1)))
+    return qs.annotate(fecha=TruncDate('fecha_pedido'))
+
+
+def actualizar_ventas_diarias(completo=False):
+    """
+    Recalcula los buckets diarios de los días cerrados (hasta ayer) que faltan,
+    más los últimos DIAS_REVISION ya guardados. Retorna los días recalculados.
+    """
+    hasta = timezone.localdate() - timedelta(days=1)
+
+    with transaction.atomic():
+        punto, _ = PuntoControl.objects.select_for_update().get_or_create(nombre=PROCESO)
+        desde = None if completo or not punto.fecha else punto.fecha - timedelta(days=DIAS_REVISION - 1)
+
+        filas = (
+            _pedidos_por_dia(desde, hasta)
+            .values('fecha', 'plato__proveedor_id', 'cliente__empresa_id')
+            .annotate(
+                n_pedidos=Count('id'),
+                n_unidades=Sum('cantidad'),
+                total=Sum(F('plato__precio') * F('cantidad')),
+            )
+            .order_by()
+        )
+        nuevas = [
+            VentaDiaria(
+                fecha=f['fecha'],
+                proveedor_id=f['plato__proveedor_id'],
+                empresa_id=f['cliente__empresa_id'],
+                pedidos=f['n_pedidos'],
+                unidades=f['n_unidades'],
+                ventas=f['total'],
+            )
+            for f in filas
+        ]
+
+        viejas = VentaDiaria.objects.all()
+        if desde:
+            viejas = viejas.filter(fecha__gte=desde)
+        viejas.delete()
+        VentaDiaria.objects.bulk_create(nuevas, batch_size=1000)
+
+        punto.fecha = hasta
+        punto.save()
+
+    return len({v.fecha for v in nuevas})
+
+
+# ---------------------------------------------------------
+# SERIES DE TIEMPO
+# ---------------------------------------------------------
+def inicio_periodo(fecha, granularidad):
+    if granularidad == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if granularidad == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def siguiente_periodo(fecha, granularidad):
+    if granularidad == 'semana':
+        return fecha + timedelta(days=7)
+    if granularidad == 'mes':
+        return date(fecha.year + fecha.month // 12, fecha.month % 12 + 1, 1)
+    return fecha + timedelta(days=1)
+
+
+def _acumular(totales, filas, granularidad):
+    for f in filas:
+        periodo = f['periodo']
+        if hasattr(periodo, 'date'):
+            periodo = periodo.date()
+        periodo = inicio_periodo(periodo, granularidad)
+        t = totales.setdefault(periodo, [Decimal(0), 0, 0])
+        t[0] += f['v'] or 0
+        t[1] += f['p'] or 0
+        t[2] += f['u'] or 0
+
+
+def serie_ventas(desde, hasta, granularidad='dia', proveedor_id=None, empresa_id=None):
+    """
+    Ventas, pedidos y unidades por día, semana o mes entre `desde` y `hasta`.
+
+    Los días ya agregados salen de VentaDiaria (agrupados en la base de datos
+    por período); los posteriores al último cálculo, de Pedido en vivo.
+    Retorna una lista de dicts con todos los períodos del rango, incluso vacíos.
+    """
+    trunc = GRANULARIDADES[granularidad]
+    punto = PuntoControl.objects.filter(nombre=PROCESO).values_list('fecha', flat=True).first()
+
+    totales = {}
+
+    # Parte pre-agregada
+    if punto and desde <= punto:
+        buckets = VentaDiaria.objects.filter(fecha__gte=desde, fecha__lte=min(hasta, punto))
+        if proveedor_id:
+            buckets = buckets.filter(proveedor_id=proveedor_id)
+        if empresa_id:
+            buckets = buckets.filter(empresa_id=empresa_id)
+        _acumular(totales, (
+            buckets.annotate(periodo=trunc('fecha') if trunc else F('fecha'))
+            .values('periodo')
+            .annotate(v=Sum('ventas'), p=Sum('pedidos'), u=Sum('unidades'))
+            .order_by()
+        ), granularidad)
+
+    # Días aún sin agregar: directo desde Pedido
+    vivo_desde = max(desde, punto + timedelta(days=1)) if punto else desde
+    if vivo_desde <= hasta:
+        pedidos = _pedidos_por_dia(vivo_desde, hasta)
+        if proveedor_id:
+            pedidos = pedidos.filter(plato__proveedor_id=proveedor_id)
+        if empresa_id:
+            pedidos = pedidos.filter(cliente__empresa_id=empresa_id)
+        _acumular(totales, (
+            pedidos.values(periodo=F('fecha'))
+            .annotate(
+                v=Sum(F('plato__precio') * F('cantidad')),
+                p=Count('id'),
+                u=Sum('cantidad'),
+            )
+            .order_by()
+        ), granularidad)
+
+    serie = []
+    periodo = inicio_periodo(desde, granularidad)
+    while periodo <= hasta:
+        ventas, n_pedidos, unidades = totales.get(periodo, (0, 0, 0))
+        serie.append({
+            'periodo': periodo.isoformat(),
+            'ventas': float(ventas),
+            'pedidos': n_pedidos,
+            'unidades': unidades,
+        })
+        periodo = siguiente_periodo(periodo, granularidad)
+    return serie
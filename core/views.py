@@ -1,13 +1,30 @@
+from datetime import timedelta
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from .forms import UserRegisterForm, ProveedorProfileForm, LoginForm, PlatoForm, PedidoForm
+from .forms import UserRegisterForm, ProveedorProfileForm, LoginForm, PlatoForm, PedidoForm, PlatoImportForm, MenuSemanaForm, PedidoRapidoForm
+from . import menus
+from .eventos import CARRITO, cambiar_estado, registrar
+from .facetas import filtrar_platos, leer_filtros, obtener_facetas
+from .franjas import FranjaLlena, disponibilidad, leer_hora, liberar_franja, reservar_franja
+from .importacion import importar_platos
+from .limites import limitar
+from .metricas import CODIGOS_CANJEADOS, MONTO_CONVENIO, PAGOS_CONVENIO, contar
+from .pronosticos import pronostico_proveedor
+from .recomendaciones import recomendaciones_para_carrito
+from .stock import SinStock, fecha_reserva, liberar, reservar, restantes
+from .ubicaciones import proveedores_cercanos
 from .models import Proveedor, Plato, Pedido, ItemMenu, MenuSemanal, Cliente
 from django.contrib.auth.models import User
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from .models import Plato, MenuSemanal, ItemMenu, Cliente
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q
+from django.http import HttpResponseBadRequest
+from django.urls import reverse
 from django.utils import timezone
 
 
@@ -31,6 +48,7 @@ def register(request):
                     user=user,
                     empresa=pform.cleaned_data.get('empresa'),
                     descripcion=pform.cleaned_data.get('descripcion'),
+                    direccion=pform.cleaned_data.get('direccion') or '',
                     logo=pform.cleaned_data.get('logo')
                 )
             else:
@@ -45,6 +63,8 @@ def register(request):
     return render(request, 'core/register.html', {'uform': uform, 'pform': pform})
 
 
+# Intentos de login por IP: 10 seguidos y luego uno cada 6 segundos
+@limitar('login', tasa=1 / 6, capacidad=10, por='ip')
 def login_view(request):
     if request.method == 'POST':
         form = LoginForm(request, data=request.POST)
@@ -62,12 +82,126 @@ def logout_view(request):
     return redirect('core:catalogo')
 
 
-def catalogo(request):
-    proveedores = Proveedor.objects.all().prefetch_related('platos')
+def _punto_cliente(request):
+    """Coordenadas para "cerca de mí": las del navegador (?lat=&lon=) o las del cliente."""
+    try:
+        return float(request.GET['lat']), float(request.GET['lon'])
+    except (KeyError, ValueError):
+        pass
 
-    # Detectar si viene desde menú semanal
-    modo_menu = request.GET.get("modo_menu") == "true"
-    dia = request.GET.get("dia")  # lunes, martes, etc.
+    cliente = getattr(request.user, 'cliente', None) if request.user.is_authenticated else None
+    if cliente and cliente.latitud is not None:
+        return cliente.latitud, cliente.longitud
+    return None
+
+
+def _con_filtro(params, clave, valor):
+    """Query string con `clave=valor` (o sin `clave` si ya tenía ese valor)."""
+    params = params.copy()
+    if params.get(clave) == str(valor):
+        params.pop(clave)
+    else:
+        params[clave] = valor
+    return f"?{params.urlencode()}" if params else "?"
+
+
+def _facetas_catalogo(params, filtros):
+    """Facetas cacheadas con el link y el estado de cada opción para la plantilla."""
+    facetas = obtener_facetas()
+    return {
+        "proveedores": [
+            {**f, "url": _con_filtro(params, "proveedor", f["id"]), "activo": filtros.get("proveedor") == f["id"]}
+            for f in facetas["proveedores"]
+        ],
+        "precios": [
+            {**f, "url": _con_filtro(params, "precio", f["clave"]), "activo": filtros.get("precio") == f["clave"]}
+            for f in facetas["precios"]
+        ],
+        "ingredientes": [
+            {**f, "url": _con_filtro(params, "ingrediente", f["id"]), "activo": filtros.get("ingrediente") == f["id"]}
+            for f in facetas["ingredientes"]
+        ],
+    }
+
+
+# Proveedores por respuesta del catálogo: el HTML de la primera carga no
+# crece con el marketplace, el resto llega en tandas de este tamaño
+PROVEEDORES_POR_TANDA = 6
+
+
+def _ids_catalogo(filtros, punto):
+    """
+    Ids de los proveedores del catálogo en orden de aparición (secuencia que
+    se recorta por tandas) y, si es "cerca de mí", sus distancias.
+    """
+    if filtros:
+        ids = filtrar_platos(filtros).order_by("proveedor_id").values_list("proveedor_id", flat=True).distinct()
+    else:
+        ids = Proveedor.objects.order_by("id").values_list("id", flat=True)
+
+    if not punto:
+        return ids, {}
+    # Restaurantes cercanos, ordenados por distancia
+    cercanos = proveedores_cercanos(
+        *punto, queryset=Proveedor.objects.filter(id__in=ids).only("id", "latitud", "longitud")
+    )
+    return [p.id for p in cercanos], {p.id: p.distancia_km for p in cercanos}
+
+
+def _tanda_catalogo(ids, filtros, distancias):
+    """Los proveedores `ids` (en ese orden) con sus platos y stock: tres consultas por tanda."""
+    platos = filtrar_platos(filtros) if filtros else Plato.objects.all()
+    por_id = Proveedor.objects.prefetch_related(
+        Prefetch("platos", queryset=platos.order_by("id"), to_attr="platos_catalogo")
+    ).in_bulk(ids)
+    proveedores = [por_id[i] for i in ids if i in por_id]
+
+    # Porciones que quedan hoy de los platos con tope
+    platos_tanda = [plato for p in proveedores for plato in p.platos_catalogo]
+    quedan = restantes(platos_tanda)
+    for plato in platos_tanda:
+        plato.quedan = quedan.get(plato.pk)
+    for p in proveedores:
+        p.distancia_km = distancias.get(p.id)
+    return proveedores
+
+
+def _secciones_catalogo(request, desde):
+    """
+    Contexto de una tanda de secciones del catálogo: PROVEEDORES_POR_TANDA
+    proveedores a partir de `desde` y la URL de la siguiente tanda (o None).
+    """
+    filtros = leer_filtros(request.GET)
+    cerca = request.GET.get('cerca') == '1'
+    punto = _punto_cliente(request) if cerca else None
+
+    ids, distancias = _ids_catalogo(filtros, punto)
+    # Uno de más para saber si queda otra tanda sin contarlos todos
+    ids = list(ids[desde:desde + PROVEEDORES_POR_TANDA + 1])
+
+    siguiente = None
+    if len(ids) > PROVEEDORES_POR_TANDA:
+        ids = ids[:PROVEEDORES_POR_TANDA]
+        params = request.GET.copy()
+        params['desde'] = desde + PROVEEDORES_POR_TANDA
+        siguiente = f"{reverse('core:catalogo_secciones')}?{params.urlencode()}"
+
+    return {
+        'proveedores': _tanda_catalogo(ids, filtros, distancias),
+        'siguiente': siguiente,
+        'filtros': filtros,
+        'cerca': cerca,
+        'sin_ubicacion': cerca and not punto,
+        # Detectar si viene desde menú semanal
+        'modo_menu': request.GET.get("modo_menu") == "true",
+        'dia': request.GET.get("dia"),  # lunes, martes, etc.
+    }
+
+
+def catalogo(request):
+    # Solo la primera tanda de proveedores va en la página; el resto se pide
+    # a catalogo_secciones a medida que se hace scroll
+    contexto = _secciones_catalogo(request, 0)
 
     is_proveedor = False
     latest_pedido = None
@@ -83,13 +217,20 @@ def catalogo(request):
                 .first()
             )
 
-    return render(request, 'core/catalogo.html', {
-        'proveedores': proveedores,
+    contexto.update({
         'is_proveedor': is_proveedor,
         'latest_pedido': latest_pedido,
-        'modo_menu': modo_menu,
-        'dia': dia
+        'facetas': _facetas_catalogo(request.GET, contexto['filtros']),
     })
+    return render(request, 'core/catalogo.html', contexto)
+
+
+def catalogo_secciones(request):
+    """Fragmento HTML con la siguiente tanda de proveedores del catálogo (mismos filtros)."""
+    desde = request.GET.get('desde', '')
+    if not desde.isdigit():
+        return HttpResponseBadRequest('Parámetro desde inválido.')
+    return render(request, 'core/catalogo_secciones.html', _secciones_catalogo(request, int(desde)))
 
 
 # --- Proveedor: CRUD Platos ---
@@ -118,6 +259,28 @@ def plato_create(request):
     return render(request, 'core/proveedor/plato_form.html', {'form': form})
 
 
+@login_required
+@user_passes_test(_is_proveedor)
+def plato_import(request):
+    proveedor = request.user.proveedor
+    resultado = None
+    if request.method == 'POST':
+        form = PlatoImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            resultado = importar_platos(
+                proveedor,
+                form.cleaned_data['archivo'],
+                imagenes=form.cleaned_data.get('imagenes')
+            )
+            if resultado.creados:
+                messages.success(request, f'Se importaron {resultado.creados} platos.')
+            if resultado.total_errores:
+                messages.error(request, f'{resultado.total_errores} filas no se pudieron importar.')
+    else:
+        form = PlatoImportForm()
+    return render(request, 'core/proveedor/plato_import.html', {'form': form, 'resultado': resultado})
+
+
 @login_required
 @user_passes_test(_is_proveedor)
 def plato_edit(request, pk):
@@ -159,9 +322,22 @@ def pedido_list(request):
         confirmado=False
     ).select_related('plato', 'plato__proveedor')
 
-    # Confirmar todos los pedidos del carrito
+    # Confirmar todos los pedidos del carrito: recién aquí se reservan porciones y franja
     if request.method == 'POST' and 'confirmar_carrito' in request.POST:
-        pedidos.update(confirmado=True, estado='pendiente')
+        try:
+            with transaction.atomic():
+                # Bloquea el carrito: un doble envío espera y ya no encuentra pedidos sin confirmar
+                carrito = list(pedidos.select_for_update(of=('self',)))
+                _reservar_carrito(carrito)
+                registrar(carrito, 'pendiente', CARRITO)
+                # La fecha del pedido es la de confirmación: es el día cuyo stock consumió
+                ahora = timezone.now()
+                for pedido in carrito:
+                    pedido.confirmado, pedido.estado, pedido.fecha_pedido = True, 'pendiente', ahora
+                Pedido.objects.bulk_update(carrito, ['confirmado', 'estado', 'fecha_pedido', 'hora_colacion'])
+        except (SinStock, FranjaLlena) as e:
+            messages.error(request, _mensaje_reserva(e))
+            return redirect('core:pedido_list')
         messages.success(request, 'Tu pedido fue confirmado. El restaurante comenzará la preparación.')
         return redirect('core:pedido_list')
 
@@ -170,10 +346,74 @@ def pedido_list(request):
 
     return render(request, 'core/cliente/pedido_list.html', {
         'pedidos': pedidos,
-        'total_carrito': total_carrito
+        'total_carrito': total_carrito,
+        'recomendados': recomendaciones_para_carrito([p.plato_id for p in pedidos]),
     })
 
 
+def _mensaje_reserva(error):
+    if isinstance(error, FranjaLlena):
+        if error.hora:
+            return f'La franja de las {error.hora:%H:%M} ya no tiene cupo. Elige otra hora.'
+        return f'{error.proveedor} no tiene cupo en las franjas de colación que quedan hoy.'
+    if error.restantes:
+        porciones = 'porción' if error.restantes == 1 else 'porciones'
+        return f'Solo quedan {error.restantes} {porciones} de {error.plato.nombre} por hoy.'
+    return f'{error.plato.nombre} se agotó por hoy.'
+
+
+def _sin_porciones(plato, cantidad):
+    """SinStock si ya no alcanzan las porciones de hoy (aviso al agregar; no reserva)."""
+    quedan = restantes([plato]).get(plato.pk)
+    if quedan is not None and quedan < cantidad:
+        return SinStock(plato, quedan)
+    return None
+
+
+def _reservar_carrito(carrito):
+    """
+    Reserva porciones y franja de cada pedido del carrito al confirmarlo.
+    Un carrito abandonado no retiene stock. Llamar dentro de la transacción:
+    si un pedido no alcanza, se deshacen las reservas de los anteriores.
+    """
+    hoy = timezone.localdate()
+    for pedido in carrito:
+        reservar(pedido.plato, pedido.cantidad, hoy)
+        pedido.hora_colacion = reservar_franja(pedido.plato.proveedor, hoy, pedido.cantidad, pedido.hora_colacion)
+
+
+def _reserva_vigente(pedido):
+    """El pedido retiene porciones y franja que todavía se pueden devolver."""
+    return (
+        pedido.confirmado
+        and pedido.estado != 'entregado'
+        and fecha_reserva(pedido) >= timezone.localdate()
+    )
+
+
+def _ajustar_stock(pedido, plato_anterior, cantidad_anterior):
+    """Reserva o devuelve porciones cuando se edita el plato o la cantidad de un pedido."""
+    fecha = fecha_reserva(pedido)
+    if pedido.plato_id != plato_anterior:
+        reservar(pedido.plato, pedido.cantidad, fecha)
+        liberar(plato_anterior, cantidad_anterior, fecha)
+    elif pedido.cantidad > cantidad_anterior:
+        reservar(pedido.plato, pedido.cantidad - cantidad_anterior, fecha)
+    elif pedido.cantidad < cantidad_anterior:
+        liberar(pedido.plato_id, cantidad_anterior - pedido.cantidad, fecha)
+
+
+def _ajustar_franja(pedido, proveedor_anterior, hora_anterior, cantidad_anterior):
+    """Mueve la reserva de franja si cambió el proveedor, la hora o la cantidad del pedido."""
+    proveedor = pedido.plato.proveedor
+    if (proveedor.pk, pedido.hora_colacion, pedido.cantidad) == (proveedor_anterior, hora_anterior, cantidad_anterior):
+        return
+    fecha = fecha_reserva(pedido)
+    liberar_franja(proveedor_anterior, fecha, hora_anterior, cantidad_anterior)
+    pedido.hora_colacion = reservar_franja(proveedor, fecha, pedido.cantidad, pedido.hora_colacion)
+
+
+@limitar('pedido', tasa=0.5, capacidad=20, por='usuario')
 @login_required
 def pedido_create(request):
     if not hasattr(request.user, 'cliente'):
@@ -189,6 +429,10 @@ def pedido_create(request):
             # *** Punto clave ***
             pedido.direccion = request.user.cliente.direccion
 
+            agotado = _sin_porciones(pedido.plato, pedido.cantidad)
+            if agotado:
+                messages.error(request, _mensaje_reserva(agotado))
+                return redirect('core:plato_detalle', pk=pedido.plato_id)
             pedido.save()
             messages.success(request, 'Pedido creado.')
             return redirect('core:pedido_list')
@@ -211,9 +455,20 @@ def pedido_edit(request, pk):
 
     pedido = get_object_or_404(Pedido, pk=pk, cliente=request.user.cliente)
     if request.method == 'POST':
+        antes = (pedido.plato_id, pedido.cantidad)
+        franja_antes = (pedido.plato.proveedor_id, pedido.hora_colacion, pedido.cantidad)
         form = PedidoForm(request.POST, instance=pedido)
         if form.is_valid():
-            form.save()
+            try:
+                with transaction.atomic():
+                    # Un pedido en el carrito aún no reservó nada
+                    if _reserva_vigente(pedido):
+                        _ajustar_stock(pedido, *antes)
+                        _ajustar_franja(pedido, *franja_antes)
+                    form.save()
+            except (SinStock, FranjaLlena) as e:
+                messages.error(request, _mensaje_reserva(e))
+                return redirect('core:pedido_edit', pk=pk)
             messages.success(request, 'Pedido actualizado.')
             return redirect('core:pedido_list')
     else:
@@ -229,7 +484,14 @@ def pedido_delete(request, pk):
 
     pedido = get_object_or_404(Pedido, pk=pk, cliente=request.user.cliente)
     if request.method == 'POST':
-        pedido.delete()
+        with transaction.atomic():
+            pedido.delete()
+            # Solo vuelve al stock lo que sigue reservado: no lo entregado ni lo de días pasados
+            if _reserva_vigente(pedido):
+                liberar(pedido.plato_id, pedido.cantidad, fecha_reserva(pedido))
+                liberar_franja(
+                    pedido.plato.proveedor_id, fecha_reserva(pedido), pedido.hora_colacion, pedido.cantidad
+                )
         messages.success(request, 'Pedido eliminado.')
         return redirect('core:pedido_list')
     return render(request, 'core/cliente/pedido_confirm_delete.html', {'pedido': pedido})
@@ -242,9 +504,16 @@ def proveedores(request):
 
 def plato_detalle(request, pk):
     plato = get_object_or_404(Plato, pk=pk)
-    return render(request, 'core/plato_detalle.html', {'plato': plato})
+    recomendaciones = plato.recomendaciones.select_related('recomendado')
+    return render(request, 'core/plato_detalle.html', {
+        'plato': plato,
+        'recomendaciones': recomendaciones,
+        'quedan': restantes([plato]).get(plato.pk),
+        'franjas': disponibilidad([plato.proveedor], timezone.localdate())[plato.proveedor_id],
+    })
 
 
+@limitar('pedido', tasa=0.5, capacidad=20, por='usuario')
 @login_required
 def pedido_rapido(request, pk):
     if not hasattr(request.user, 'cliente'):
@@ -254,7 +523,17 @@ def pedido_rapido(request, pk):
     plato = get_object_or_404(Plato, pk=pk)
 
     if request.method == 'POST':
-        cantidad = int(request.POST.get('cantidad', 1))
+        form = PedidoRapidoForm(request.POST)
+        if not form.is_valid():
+            messages.error(request, 'Elige una cantidad entre 1 y 50.')
+            return redirect('core:plato_detalle', pk=pk)
+        cantidad = form.cleaned_data['cantidad']
+        hora = form.cleaned_data['hora_colacion']
+
+        agotado = _sin_porciones(plato, cantidad)
+        if agotado:
+            messages.error(request, _mensaje_reserva(agotado))
+            return redirect('core:plato_detalle', pk=pk)
 
         Pedido.objects.create(
             cliente=request.user.cliente,
@@ -262,7 +541,8 @@ def pedido_rapido(request, pk):
             cantidad=cantidad,
             estado='pendiente',
             direccion="",
-            confirmado=False
+            confirmado=False,
+            hora_colacion=hora,
         )
 
         messages.success(request, 'Plato añadido al carrito.')
@@ -317,31 +597,27 @@ def menu_semanal(request):
         'domingo': 'Domingo',
     }
 
-    # Obtener o crear el menú del cliente
-    menu, _ = MenuSemanal.objects.get_or_create(cliente=cliente)
+    # Menú del cliente para la semana pedida (?semana=AAAA-MM-DD); se crea recién al asignar un día
+    semana = menus.leer_semana(request.GET.get('semana'))
+    menu = menus.menu_existente(cliente, semana)
 
     # Traer los items del menú
-    items = {i.dia: i for i in menu.items.select_related('plato').all()}
+    items = {i.dia: i for i in menu.items.select_related('plato').all()} if menu.pk else {}
 
-    # Preparar datos para el template
+    # Preparar datos para el template (los totales ya vienen guardados en el menú)
     dias_lista = []
-    total = 0
-    cantidad_total = 0
+    hoy = timezone.localdate()
 
     for key, nombre in DIAS.items():
         item = items.get(key)
-
-        # Si hay plato, se calcula subtotal
-        if item and item.plato:
-            subtotal = item.cantidad * item.plato.precio
-            total += subtotal
-            cantidad_total += item.cantidad
-        else:
-            subtotal = 0
+        subtotal = menus.subtotal(item) if item else 0
+        fecha = menus.fecha_del_dia(semana, key)
 
         dias_lista.append({
             "key": key,
             "nombre": nombre,
+            "fecha": fecha,
+            "pasado": fecha < hoy,
             "item": item,
             "subtotal": subtotal,
         })
@@ -351,13 +627,27 @@ def menu_semanal(request):
 
     return render(request, "core/cliente/menusemanal.html", {
         "dias": dias_lista,
-        "total": total,
-        "cantidad_total": cantidad_total,
+        "total": menu.total,
+        "cantidad_total": menu.cantidad,
         "saldo_disponible": saldo_disponible,
         "menu": menu,
+        "semana_anterior": semana - timedelta(days=7),
+        "semana_siguiente": semana + timedelta(days=7),
     })
 
 
+def _url_menu(semana, nombre='core:menu_semanal', *args):
+    return f"{reverse(nombre, args=args)}?semana={semana.isoformat()}"
+
+
+def _mensaje_menu(error):
+    if isinstance(error, menus.MenuPagado):
+        return "Este menú ya está pagado y no se puede modificar."
+    if isinstance(error, menus.DiaPasado):
+        return f"El {error.dia} de esa semana ya pasó: no se puede cambiar su colación."
+    return _mensaje_reserva(error)
+
+
 
 
 
@@ -376,30 +666,85 @@ def menu_semanal_select(request, dia):
         messages.error(request, "Día inválido.")
         return redirect('core:menu_semanal')
 
-    # Cargar menú del cliente
-    menu, _ = MenuSemanal.objects.get_or_create(cliente=cliente)
+    # Cargar menú del cliente de esa semana (solo se crea al asignar el plato)
+    semana = menus.leer_semana(request.GET.get('semana'))
+    if request.method == "POST":
+        menu = menus.menu_de(cliente, semana)
+    else:
+        menu = menus.menu_existente(cliente, semana)
 
-    # Obtener o crear item para el día
-    item, _ = ItemMenu.objects.get_or_create(menu=menu, dia=dia)
+    # Item actual del día (se crea al asignar el plato)
+    item = menu.items.filter(dia=dia).select_related('plato').first() if menu.pk else None
 
     # Listar platos del proveedor del cliente
-    platos = Plato.objects.all()
+    platos = Plato.objects.select_related('proveedor')
 
+    # La colación se reserva para ese día de la semana del menú
+    fecha = menus.fecha_del_dia(semana, dia)
 
     if request.method == "POST":
-        plato_id = request.POST.get("plato_id")
-        item.plato_id = plato_id
-        item.save()
+        plato = get_object_or_404(platos, pk=request.POST.get("plato_id"))
+        hora = leer_hora(request.POST.get("hora_colacion"))
+        try:
+            menus.asignar_dias(menu, {dia: (plato, hora, item.cantidad if item else 1)})
+        except FranjaLlena as e:
+            messages.error(request, _mensaje_menu(e))
+            return redirect(_url_menu(semana, "core:menu_semanal_select", dia))
+        except (menus.MenuPagado, menus.DiaPasado) as e:
+            messages.error(request, _mensaje_menu(e))
+            return redirect(_url_menu(semana))
         messages.success(request, "Plato asignado correctamente.")
-        return redirect("core:menu_semanal")
+        return redirect(_url_menu(semana))
+
+    platos = list(platos)
+    franjas = disponibilidad({p.proveedor for p in platos}, fecha)
+    for plato in platos:
+        plato.franjas = franjas[plato.proveedor_id]
 
     return render(request, "core/cliente/menusemanal_select.html", {
         "dia": dia,
         "item": item,
         "platos": platos,
+        "fecha": fecha,
+        "semana": semana,
     })
 
 
+@login_required
+def menu_semanal_editar(request):
+    """Toda la semana en un solo envío: una transacción y los totales ajustados por diferencia."""
+    if not hasattr(request.user, 'cliente'):
+        messages.error(request, "Necesitas una cuenta cliente para usar esta función.")
+        return redirect('core:catalogo')
+
+    semana = menus.leer_semana(request.GET.get('semana'))
+    if request.method == "POST":
+        menu = menus.menu_de(request.user.cliente, semana)
+    else:
+        menu = menus.menu_existente(request.user.cliente, semana)
+    if menu.pagado:
+        messages.error(request, _mensaje_menu(menus.MenuPagado()))
+        return redirect(_url_menu(semana))
+
+    items = {i.dia: i for i in menu.items.all()} if menu.pk else {}
+    platos = Plato.objects.select_related('proveedor').order_by('proveedor_id', 'nombre')
+    form = MenuSemanaForm(request.POST or None, platos=platos, items=items)
+
+    if request.method == "POST" and form.is_valid():
+        try:
+            cambiados = menus.asignar_dias(menu, form.cambios())
+        except menus.MenuPagado as e:
+            messages.error(request, _mensaje_menu(e))
+            return redirect(_url_menu(semana))
+        except (FranjaLlena, menus.DiaPasado) as e:
+            messages.error(request, _mensaje_menu(e))
+        else:
+            messages.success(request, f"Menú actualizado ({cambiados} días modificados).")
+            return redirect(_url_menu(semana))
+
+    return render(request, "core/cliente/menusemanal_editar.html", {"form": form, "menu": menu})
+
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
@@ -437,6 +782,7 @@ def mi_perfil(request):
                 # Marcar el código como usado
                 codigo.usado = True
                 codigo.save()
+                contar(CODIGOS_CANJEADOS)
 
                 messages.success(request, "Convenio vinculado correctamente.")
 
@@ -463,6 +809,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from core.models import Pedido, Proveedor
 
 # PANEL DEL PROVEEDOR (VER SUS PEDIDOS)
+ESTADOS_PANEL = ['pendiente', 'preparando', 'listo', 'entregado']
+PEDIDOS_POR_PAGINA = 25
+
+
 @login_required
 def pedidos_proveedor_panel(request):
     # Verifica que el usuario sea proveedor
@@ -471,13 +821,52 @@ def pedidos_proveedor_panel(request):
 
     proveedor = request.user.proveedor
 
-    pedidos = Pedido.objects.filter(
-        plato__proveedor=proveedor
-    ).select_related("cliente", "plato").order_by("-fecha_pedido")
+    # Pestaña de estado y alcance (por defecto: pendientes de hoy)
+    estado = request.GET.get("estado", "pendiente")
+    if estado not in ESTADOS_PANEL:
+        estado = "pendiente"
+    solo_hoy = request.GET.get("fecha") != "todos"
+
+    # Por los ids de sus platos (y no con un JOIN) la consulta entra por el índice
+    # (plato, estado, fecha_pedido); los contadores salen del índice sin leer las filas
+    platos = list(Plato.objects.filter(proveedor=proveedor).values_list("id", flat=True))
+    base = Pedido.objects.filter(plato_id__in=platos)
+    if solo_hoy:
+        inicio_dia = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        base = base.filter(fecha_pedido__gte=inicio_dia)
+
+    # Contadores de todas las pestañas en una sola consulta
+    conteos = base.aggregate(**{
+        e: Count("id", filter=Q(estado=e)) for e in ESTADOS_PANEL
+    })
+
+    pedidos = base.filter(estado=estado).select_related(
+        "cliente__user", "plato__proveedor"
+    ).order_by("-id")
+
+    # Paginación keyset: "antes" es el id del último pedido mostrado
+    antes = request.GET.get("antes")
+    if antes and antes.isdigit():
+        pedidos = pedidos.filter(id__lt=antes)
+
+    pedidos = list(pedidos[:PEDIDOS_POR_PAGINA + 1])
+    siguiente = None
+    if len(pedidos) > PEDIDOS_POR_PAGINA:
+        pedidos = pedidos[:PEDIDOS_POR_PAGINA]
+        siguiente = pedidos[-1].id
+
+    # Demanda esperada de la próxima semana para planificar la preparación
+    fechas_pronostico, pronostico = pronostico_proveedor(proveedor)
 
     return render(request, "core/proveedor/pedidos_panel.html", {
         "pedidos": pedidos,
-        "proveedor": proveedor
+        "proveedor": proveedor,
+        "estado": estado,
+        "estados": [(e, conteos[e]) for e in ESTADOS_PANEL],
+        "solo_hoy": solo_hoy,
+        "siguiente": siguiente,
+        "fechas_pronostico": fechas_pronostico,
+        "pronostico": pronostico,
     })
 
 
@@ -502,16 +891,18 @@ def proveedor_cambiar_estado_pedido(request, pedido_id, nuevo_estado):
     if pedido.plato.proveedor != proveedor:
         return redirect('core:catalogo')
 
+    # Volver a la pestaña en la que estaba el pedido
+    panel = f"{reverse('core:pedidos_proveedor_panel')}?estado={pedido.estado}"
+
     # Validar estados
     estados_validos = ['pendiente', 'preparando', 'listo', 'entregado']
 
     if nuevo_estado not in estados_validos:
-        return redirect('core:pedidos_proveedor_panel')
+        return redirect(panel)
 
-    pedido.estado = nuevo_estado
-    pedido.save()
+    cambiar_estado(pedido, nuevo_estado)
 
-    return redirect('core:pedidos_proveedor_panel')
+    return redirect(panel)
 
 @login_required
 def set_convenio(request):
@@ -529,6 +920,7 @@ def set_convenio(request):
         cliente.empresa = cod.empresa
         cliente.saldo = cod.empresa.saldo_mensual
         cliente.save()
+        contar(CODIGOS_CANJEADOS)
 
         messages.success(request, f"Te has vinculado a la empresa {cod.empresa.nombre}.")
         return redirect('core:miperfil')
@@ -539,33 +931,37 @@ def pagar_menu(request, menu_id):
     # Validar que el menú sea del cliente actual
     menu = get_object_or_404(MenuSemanal, id=menu_id, cliente=request.user.cliente)
 
-    # Calcular total del menú
-    total = sum(
-        item.cantidad * item.plato.precio
-        for item in menu.items.select_related("plato").all()
-        if item.plato
-    )
-
     cliente = request.user.cliente
 
     # Validar convenio
     if not cliente.empresa:
         messages.error(request, "No tienes un convenio activo para usar saldo.")
-        return redirect('core:menu_semanal')
-
-    # Validar saldo suficiente
-    if cliente.saldo < total:
-        messages.error(request, "No tienes saldo suficiente para pagar este menú.")
-        return redirect('core:menu_semanal')
-
-    # Realizar el pago
-    cliente.saldo -= total
-    cliente.save()
-
-    # Marcar menú como pagado
-    menu.pagado = True
-    menu.save()
+        return redirect(_url_menu(menu.semana))
+
+    with transaction.atomic():
+        # El bloqueo espera a una edición en curso del menú: se cobra el total que dejó
+        menu = MenuSemanal.objects.select_for_update().get(pk=menu.pk)
+        if menu.pagado:
+            messages.error(request, "Este menú ya está pagado.")
+            return redirect(_url_menu(menu.semana))
+
+        # Total guardado del menú
+        total = menu.total
+
+        # Descuento condicional: dos pagos simultáneos (de semanas distintas) no pueden
+        # gastar el mismo saldo
+        if not Cliente.objects.filter(pk=cliente.pk, saldo__gte=total).update(saldo=F('saldo') - total):
+            messages.error(request, "No tienes saldo suficiente para pagar este menú.")
+            return redirect(_url_menu(menu.semana))
+
+        # Marcar menú como pagado (se factura a la empresa en el mes del pago)
+        menu.pagado = True
+        menu.pagado_en = timezone.now()
+        menu.empresa_id = cliente.empresa_id
+        menu.save(update_fields=['pagado', 'pagado_en', 'empresa'])
+    contar(PAGOS_CONVENIO)
+    contar(MONTO_CONVENIO, float(total))
 
     messages.success(request, f"Pago exitoso. Se descontaron ${total} de tu saldo.")
-    return redirect('core:menu_semanal')
+    return redirect(_url_menu(menu.semana))
 
@@ -1,6 +1,5 @@
 from pathlib import Path
 import os
-import dj_database_url
 
 
 # Base
@@ -26,7 +25,9 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    'core.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,6 +69,55 @@ DATABASES = {
         'HOST': 'saboresgo.mysql.pythonanywhere-services.com'
     }
 }
+if DATABASE_URL:
+    # Import diferido: solo se paga al arrancar si la conexión viene por URL
+    import dj_database_url
+    DATABASES['default'] = dj_database_url.parse(DATABASE_URL)
+
+# Réplica de solo lectura para el panel de administración y los reportes.
+# Para probar en local con dos SQLite:
+#   DATABASE_URL=sqlite:///primaria.sqlite3 DATABASE_REPLICA_URL=sqlite:///replica.sqlite3
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+if DATABASE_REPLICA_URL:
+    import dj_database_url
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL)
+    # En los tests la réplica apunta a la misma base que 'default'
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+# Conexiones persistentes: sin esto la conexión que abre el calentamiento
+# del worker (core.arranque) se cierra al empezar la primera solicitud
+for _base in DATABASES.values():
+    _base['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', '60'))
+    _base['CONN_HEALTH_CHECKS'] = True
+
+DATABASE_ROUTERS = ['core.replicas.RouterReplica']
+
+# Vistas (namespace de URL) cuyas lecturas GET van a la réplica
+REPLICA_NAMESPACES = ['adminpanel']
+
+# Segundos que un usuario lee de la primaria después de escribir
+REPLICA_PEGADO_SEGUNDOS = 5
+
+# Caché compartida por todos los workers: el resumen del panel (un solo
+# recálculo a la vez), las facetas del catálogo y LimitadorCache dependen de
+# que cache.add() sea visible entre procesos. Con REDIS_URL se usa Redis
+# (requiere el paquete redis); si no, una tabla en la base de datos, que se
+# crea al desplegar con `python manage.py createcachetable`
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'saboresgo_cache',
+        }
+    }
 
 # Validación de passwords
 AUTH_PASSWORD_VALIDATORS = [
@@ -110,5 +160,25 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Límite de solicitudes (core.limites): en memoria por proceso, o
+# 'core.limites.LimitadorCache' para compartirlo entre workers vía CACHES
+LIMITADOR = 'core.limites.LimitadorMemoria'
+
+# LIMITES_ACTIVOS=0 los desactiva (p. ej. al correr prueba_carga desde una sola IP)
+LIMITES_ACTIVOS = os.environ.get('LIMITES_ACTIVOS', '1') != '0'
+
+# /metrics (Prometheus): si hay token, el scraper debe enviarlo como
+# "Authorization: Bearer <token>". Con varios workers, definir además
+# PROMETHEUS_MULTIPROC_DIR (ver core/metricas.py)
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+# Calentamiento del worker (core.arranque): al cargar saboresgo.wsgi se
+# resuelven las URLs, se compilan las plantillas, se ceba el caché del
+# catálogo y se abren las conexiones. CALENTAR=0 lo desactiva.
+CALENTAR_AL_INICIAR = os.environ.get('CALENTAR', '1') != '0'
+# PRECARGA=1 cuando gunicorn corre con --preload: el calentamiento en el
+# maestro no deja conexiones abiertas (cada worker las abre en post_fork)
+PRECARGA = os.environ.get('PRECARGA', '0') == '1'
+
 # Auto field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
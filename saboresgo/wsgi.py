@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saboresgo.settings')
 
 application = get_wsgi_application()
+
+# URLs, plantillas, caché del catálogo (e índice de autocompletado) y
+# conexiones listos antes de la primera solicitud (ver core/arranque.py)
+from django.conf import settings  # noqa: E402
+
+if settings.CALENTAR_AL_INICIAR:
+    from core.arranque import calentar
+
+    calentar(conexiones=not settings.PRECARGA)